@@ -0,0 +1,215 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE = dict(
+    qi_boed=850.0,        # initial rate
+    b=1.1, di=0.75,       # hyperbolic decline (annual nominal Di)
+    capex_mm=8.5,
+    opex_fixed_kmo=18.0,  # $k/month
+    opex_var=6.5,         # $/bbl
+    royalty=0.1875, tax=0.25,
+    disc=0.10, months=360,
+)
+
+SWINGS = {
+    "capex_mm": (6.5, 11.0), "qi_boed": (650, 1_050), "di": (0.55, 0.95),
+    "b": (0.8, 1.4), "opex_var": (4.5, 9.0), "royalty": (0.125, 0.25),
+}
+
+DAYS_PER_MONTH = 30.44
+
+
+def as_cases(cases=None, base=BASE):
+    """
+    Normalize parameter sets to a DataFrame with every BASE column.
+
+    Accepts a DataFrame, a dict of arrays/scalars or a list of dicts; missing
+    parameters are filled from `base`.
+    """
+    if cases is None:
+        cases = [base]
+    if isinstance(cases, dict):
+        n = max((np.size(v) for v in cases.values()), default=1)
+        cases = pd.DataFrame({k: np.broadcast_to(v, n) for k, v in cases.items()})
+    df = pd.DataFrame(cases).reset_index(drop=True)
+    for key, value in base.items():
+        if key not in df:
+            df[key] = value
+    return df
+
+
+def _profiles(p):
+    """
+    Monthly volume (n_cases, max_months) and discount factors, zero past each
+    case's months. Discount rows are computed once per distinct rate.
+    """
+    months = p["months"].astype(int)
+    m = np.arange(months.max())
+    t = m / 12
+    b, di = p["b"][:, None], p["di"][:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q = np.where(b > 0, np.exp(np.log1p(b * di * t) * (-1 / b)), np.exp(-di * t))
+    vol = q * (p["qi_boed"] * DAYS_PER_MONTH)[:, None]                                 # boe/month
+    rates, inverse = np.unique(p["disc"], return_inverse=True)
+    disc = (1 + rates[:, None]) ** (-t)
+    if (months != len(m)).any():
+        live = m < months[:, None]
+        vol *= live
+        disc = disc[inverse] * live
+    else:
+        disc = disc[inverse] if len(rates) > 1 else disc
+    return vol, disc
+
+
+def _evaluate_chunk(p, price):
+    """
+    NPV at `price`, economic life and exact break-even for one chunk of cases.
+
+    With margin = price * (1 - royalty) - opex_var, month t is alive while
+    vol_t * margin > fixed opex; volumes only decline, so the economic life
+    is the count of months with vol_t > fixed / margin and the NPV follows
+    from cumulative sums of vol * disc (V) and disc (D) at that life.
+
+    For a fixed life the NPV is linear in price, and the price at which
+    month c dies is (fixed / vol_c + opex_var) / (1 - royalty). The NPV at
+    that price, (1 - tax) * fixed * (V_{c-1} / vol_c - D_{c-1}), rises with c,
+    so the break-even life is the number of months where it is still below
+    capex and the break-even price is the linear root at that life.
+    """
+    vol, disc = _profiles(p)
+    n = len(vol)
+    rows = np.arange(n)
+    fixed = p["opex_fixed_kmo"] * 1e3
+    keep = 1 - p["royalty"]
+    target = p["capex_mm"] * 1e6 / (1 - p["tax"])                                     # pre-tax PV to recover
+    V = np.cumsum(vol * disc, axis=1)
+    D = np.cumsum(np.broadcast_to(disc, vol.shape), axis=1)
+
+    margin = price * keep - p["opex_var"]
+    with np.errstate(divide="ignore"):
+        v_limit = np.where(margin > 0, fixed / margin, np.inf)
+    cut = (vol > v_limit[:, None]).sum(axis=1)                                          # economic limit
+    last = np.maximum(cut - 1, 0)
+    pv = np.where(cut > 0, margin * V[rows, last] - fixed * D[rows, last], 0.0)
+    npv = (1 - p["tax"]) * pv / 1e6 - p["capex_mm"]
+
+    V_prev = np.hstack([np.zeros((n, 1)), V[:, :-1]])
+    D_prev = np.hstack([np.zeros((n, 1)), D[:, :-1]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        short = fixed[:, None] * (V_prev / vol - D_prev) < target[:, None]
+    life = short.sum(axis=1)                                                            # break-even economic life
+    last = np.maximum(life - 1, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        breakeven = ((target + fixed * D[rows, last]) / V[rows, last] + p["opex_var"]) / keep
+    breakeven = np.where((life > 0) & np.isfinite(breakeven), breakeven, np.nan)
+    return npv, cut, breakeven
+
+
+def evaluate_cases(cases=None, price=60.0, chunk_size=5_000):
+    """
+    NPV10 ($MM) at `price`, economic life and break-even price for many
+    parameter sets, processed in chunks of `chunk_size` cases.
+
+    Args:
+        cases: Parameter sets (see as_cases); one per row, e.g. 100k Monte Carlo samples.
+        price (float or array): Flat price per case ($/bbl), broadcast against cases.
+
+    Returns:
+        pd.DataFrame: cases with npv_mm, econ_life_yrs and breakeven ($/bbl, NaN if none) appended.
+    """
+    df = as_cases(cases)
+    prices = np.broadcast_to(np.asarray(price, dtype=float), len(df))
+    parts = [_evaluate_chunk(_arrays(df.iloc[s:s + chunk_size]), prices[s:s + chunk_size])
+             for s in range(0, len(df), chunk_size)]
+    npv, cut, breakeven = (np.concatenate(x) for x in zip(*parts))
+    return df.assign(npv_mm=npv, econ_life_yrs=cut / 12, breakeven=breakeven)
+
+
+def batch_cashflow(price, cases=None, chunk_size=5_000):
+    """Tuple of (NPV10 $MM, economic life in months) per case at `price`."""
+    out = evaluate_cases(cases, price, chunk_size)
+    return out["npv_mm"].to_numpy(), (out["econ_life_yrs"] * 12).round().astype(int).to_numpy()
+
+
+def batch_breakeven(cases=None, chunk_size=5_000):
+    """Break-even price (NPV10 = 0) per case; NaN where no price breaks even."""
+    return evaluate_cases(cases, chunk_size=chunk_size)["breakeven"].to_numpy()
+
+
+def _arrays(df):
+    return {k: df[k].to_numpy(dtype=float) for k in BASE}
+
+
+def tornado(base=BASE, swings=SWINGS):
+    """One-at-a-time break-even swings, sorted by spread (as the notebook tornado)."""
+    cases = [{**base, k: v} for k, (lo, hi) in swings.items() for v in (lo, hi)]
+    be = batch_breakeven(cases).reshape(-1, 2)
+    tor = pd.DataFrame({"param": list(swings), "be_low": be[:, 0], "be_high": be[:, 1]})
+    return tor.assign(spread=(tor.be_high - tor.be_low).abs()).sort_values("spread")
+
+
+def two_way(x, xs, y, ys, base=BASE):
+    """Break-even grid Z[len(ys), len(xs)] for a two-way sensitivity heatmap."""
+    X, Y = np.meshgrid(xs, ys)
+    return batch_breakeven(as_cases({x: X.ravel(), y: Y.ravel()}, base)).reshape(X.shape)
+
+
+def sample_cases(n, seed=42, swings=SWINGS, base=BASE):
+    """Uniform Monte Carlo cases over the swing ranges."""
+    rng = np.random.default_rng(seed)
+    return as_cases({k: rng.uniform(lo, hi, n) for k, (lo, hi) in swings.items()}, base)
+
+
+def _cashflow_loop(price, p=BASE):
+    """The notebook's scalar cashflow() (reference for parity and timing)."""
+    t = np.arange(p["months"]) / 12
+    q = p["qi_boed"] / (1 + p["b"] * p["di"] * t) ** (1 / p["b"])
+    vol = q * 30.44
+    rev = vol * price * (1 - p["royalty"])
+    opex = p["opex_fixed_kmo"] * 1e3 + vol * p["opex_var"]
+    net = (rev - opex)
+    alive = net > 0
+    cut = np.argmin(alive) if not alive.all() else p["months"]
+    net[cut:] = 0.0
+    net = net * (1 - p["tax"])
+    disc = (1 + p["disc"]) ** (-np.arange(p["months"]) / 12)
+    return (net * disc).sum() / 1e6 - p["capex_mm"], cut
+
+
+def benchmark(n=100_000, n_ref=300):
+    """Parity with the notebook's cashflow()/brentq break-even, then batch timing."""
+    from scipy.optimize import brentq
+
+    cases = sample_cases(n)
+    ref_cases = cases.head(n_ref).to_dict("records")
+    start = time.perf_counter()
+    ref_be = np.array([brentq(lambda pr: _cashflow_loop(pr, p)[0], 5, 300) for p in ref_cases])
+    t_loop = (time.perf_counter() - start) / n_ref
+    ref_npv = np.array([_cashflow_loop(60.0, p) for p in ref_cases])
+
+    npv, cut = batch_cashflow(60.0, cases.head(n_ref))
+    be = batch_breakeven(cases.head(n_ref))
+    print(f"Parity ({n_ref} cases): NPV max |diff| = {np.abs(npv - ref_npv[:, 0]).max():.1e} $MM, "
+          f"economic life identical: {np.array_equal(cut, ref_npv[:, 1])}, "
+          f"break-even max |diff| = {np.abs(be - ref_be).max():.1e} $/bbl")
+
+    tor = tornado()
+    print(f"Tornado base-swing break-evens: {tor.be_low.round(2).tolist()} / {tor.be_high.round(2).tolist()}")
+
+    grid = two_way("qi_boed", np.linspace(600, 1_100, 30), "capex_mm", np.linspace(6, 12, 30))
+    ref_grid = brentq(lambda pr: _cashflow_loop(pr, {**BASE, "qi_boed": 600.0, "capex_mm": 12.0})[0], 5, 300)
+    print(f"Two-way grid corner: {grid[-1, 0]:.4f} vs brentq {ref_grid:.4f}")
+
+    start = time.perf_counter()
+    out = evaluate_cases(cases)
+    t_batch = time.perf_counter() - start
+    print(f"{n:,} cases (NPV, life, break-even): {t_batch:.2f} s "
+          f"vs ~{t_loop * n:.0f} s for the brentq loop ({t_loop * n / t_batch:,.0f}x)")
+    print(out[["npv_mm", "econ_life_yrs", "breakeven"]].describe(percentiles=[0.1, 0.5, 0.9]).round(2))
+    return out
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,430 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pulp
+
+MONTHLY_DISCOUNT = 0.99                       # ≈ 12%/yr, as in the notebook
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+
+def make_wells(n_wells, seed=42):
+    """
+    Well inventory drawn like the notebook's: NPV 8-55 $MM, 1-3 month wells on 6 pads,
+    and roughly 2 in 9 producers with a dependent injector.
+    """
+    rng = np.random.default_rng(seed)
+    width = len(str(n_wells))
+    wells = pd.DataFrame({
+        "well": [f"W{i + 1:0{width}d}" for i in range(n_wells)],
+        "npv_mm": rng.uniform(8, 55, n_wells).round(1),
+        "duration_mo": rng.integers(1, 4, n_wells),
+        "pad": rng.integers(1, 7, n_wells),
+    })
+    producers = rng.choice(n_wells, max(1, round(n_wells * 2 / 9)), replace=False)
+    deps = {}
+    for p in producers:
+        inj = (p + 7) % n_wells
+        if inj not in producers and wells.well[inj] not in deps:
+            deps[wells.well[inj]] = wells.well[p]
+    wells["depends_on"] = wells.well.map(deps).fillna("")
+    return wells
+
+
+def _deps(wells):
+    dep = wells.set_index("well")["depends_on"].fillna("")
+    return {w: d for w, d in dep.items() if d}
+
+
+def schedule_npv(wells, starts, n_rigs, horizon, discount=MONTHLY_DISCOUNT):
+    """
+    Discounted NPV ($MM) of a {well: start month} schedule, after checking it is feasible.
+
+    Raises:
+        ValueError: if a well overruns the horizon, a dependency is violated or
+            more than n_rigs wells are active in any month.
+    """
+    W = wells.set_index("well")
+    deps = _deps(wells)
+    load = np.zeros(horizon, dtype=int)
+    total = 0.0
+    for w, s in starts.items():
+        d = int(W.at[w, "duration_mo"])
+        if s < 0 or s + d > horizon:
+            raise ValueError(f"{w} runs outside the horizon")
+        dep = deps.get(w)
+        if dep and (dep not in starts or starts[dep] + int(W.at[dep, "duration_mo"]) > s):
+            raise ValueError(f"{w} starts before its dependency {dep} is done")
+        load[s:s + d] += 1
+        total += W.at[w, "npv_mm"] * discount ** (s + d)
+    if load.max(initial=0) > n_rigs:
+        raise ValueError(f"{load.max()} wells active in month {load.argmax()} with {n_rigs} rigs")
+    return float(total)
+
+
+# ---------------------------------------------------------------------------
+# Heuristics
+# ---------------------------------------------------------------------------
+
+def heuristic_schedule(wells, n_rigs, horizon):
+    """
+    The notebook's value-first heuristic, returning the schedule.
+
+    Wells are taken by descending NPV onto the earliest-free rig. The notebook
+    reads a dependency that is not yet placed as done at month 0, which can
+    put an injector ahead of its producer. Here the producer is placed first.
+    """
+    W = wells.set_index("well")
+    deps = _deps(wells)
+    rig_free = [0] * n_rigs
+    starts, done_time = {}, {}
+
+    def place(w):
+        dep = deps.get(w)
+        if dep and dep not in done_time:
+            place(dep)
+            if dep not in done_time:
+                return
+        earliest = done_time.get(dep, 0) if dep else 0
+        rig = int(np.argmin(rig_free))
+        start = max(rig_free[rig], earliest)
+        d = int(W.at[w, "duration_mo"])
+        if start + d > horizon:
+            return
+        rig_free[rig] = start + d
+        starts[w], done_time[w] = start, start + d
+
+    for w in W.sort_values("npv_mm", ascending=False, kind="stable").index:
+        if w not in starts:
+            place(w)
+    return starts
+
+
+def list_schedule(wells, order, n_rigs, horizon, busy=None, done=None, t0=0):
+    """
+    Serial schedule generation: place wells in `order` at their earliest month >= t0
+    with a free rig for the whole duration and the dependency finished.
+
+    Args:
+        busy (np.ndarray): Rigs already committed per month.
+        done (dict): Completion months of already committed wells.
+
+    Returns:
+        dict: {well: start month}; wells that no longer fit are left out.
+    """
+    W = wells.set_index("well")
+    deps = _deps(wells)
+    free = n_rigs - (np.zeros(horizon, dtype=int) if busy is None else busy)
+    done = dict(done or {})
+    starts = {}
+    for w in order:
+        dep = deps.get(w)
+        if dep and dep not in done:
+            continue
+        d = int(W.at[w, "duration_mo"])
+        t = max(t0, done[dep] if dep else 0)
+        while t + d <= horizon and (free[t:t + d] < 1).any():
+            t += 1
+        if t + d > horizon:
+            continue
+        free[t:t + d] -= 1
+        starts[w], done[w] = t, t + d
+    return starts
+
+
+# ---------------------------------------------------------------------------
+# Time-indexed MILP on a (possibly coarse) start grid
+# ---------------------------------------------------------------------------
+
+def _grid(t0, fine_end, horizon, bucket):
+    """Monthly starts on [t0, fine_end), then one start per `bucket` months; the horizon closes the last bucket."""
+    fine_end = min(fine_end, horizon)
+    return np.unique(np.r_[np.arange(t0, fine_end), np.arange(fine_end, horizon, bucket), horizon])
+
+
+def _build(wells, n_rigs, edges, horizon, discount, busy=None, done=None, allowed=None):
+    """
+    The notebook's formulation with starts restricted to `edges[:-1]`.
+
+    Capacity is a rig-month budget per bucket [edges[b], edges[b + 1]); on a
+    monthly grid this is exactly the notebook's per-month rig limit. `busy` and
+    `done` carry rigs and completions committed before the model's first start,
+    and `allowed` optionally limits each well to a set of start months.
+    """
+    W = wells.set_index("well")
+    deps = _deps(wells)
+    done = done or {}
+    busy = np.zeros(horizon, dtype=int) if busy is None else busy
+    grid = edges[:-1]
+    m = pulp.LpProblem("rig_schedule", pulp.LpMaximize)
+    x, by_well = {}, {}
+    for w, npv, d in zip(W.index, W.npv_mm.to_numpy(), W.duration_mo.to_numpy()):
+        dep = deps.get(w)
+        if dep and dep not in W.index and dep not in done:
+            continue                                           # dependency can no longer be drilled
+        earliest = done.get(dep, 0) if dep else 0
+        starts = grid[(grid >= earliest) & (grid + d <= horizon)]
+        if allowed is not None:
+            starts = starts[np.isin(starts, list(allowed.get(w, ())))]
+        by_well[w] = [int(s) for s in starts]
+        for s in by_well[w]:
+            x[w, s] = pulp.LpVariable(f"x_{w}_{s}", cat="Binary")
+
+    m += pulp.LpAffineExpression([(v, W.at[w, "npv_mm"] * discount ** (s + W.at[w, "duration_mo"]))
+                                  for (w, s), v in x.items()])
+    for w, ss in by_well.items():                              # drill at most once
+        if len(ss) > 1:
+            m += pulp.LpAffineExpression([(x[w, s], 1) for s in ss]) <= 1
+    cap = np.add.reduceat(n_rigs - busy, edges[:-1]) if len(edges) > 1 else np.array([])
+    rows = [[] for _ in range(len(edges) - 1)]
+    for (w, s), v in x.items():                                # rig-months per bucket
+        d = int(W.at[w, "duration_mo"])
+        b = int(np.searchsorted(edges, s, side="right")) - 1
+        while b < len(rows) and edges[b] < s + d:
+            overlap = min(edges[b + 1], s + d) - max(edges[b], s)
+            rows[b].append((v, overlap))
+            b += 1
+    for b, row in enumerate(rows):
+        if sum(c for _, c in row) > cap[b]:
+            m += pulp.LpAffineExpression(row) <= int(cap[b])
+    for w, dep in deps.items():                                # precedence
+        if w not in by_well or dep not in by_well:
+            continue
+        d_dep = int(W.at[dep, "duration_mo"])
+        for s in by_well[w]:
+            m += x[w, s] <= pulp.LpAffineExpression([(x[dep, r], 1) for r in by_well[dep] if r + d_dep <= s])
+    return m, x
+
+
+def _solve(m, x, time_limit, warm=None, relax=False, gap_rel=None):
+    if warm is not None:
+        for (w, s), v in x.items():
+            v.setInitialValue(1 if warm.get(w) == s else 0)
+    m.solve(pulp.PULP_CBC_CMD(msg=0, timeLimit=time_limit, warmStart=warm is not None, mip=not relax,
+                              gapRel=None if relax else gap_rel))
+    if relax:
+        return pulp.value(m.objective)
+    return {w: s for (w, s), v in x.items() if v.value() is not None and v.value() > 0.5}
+
+
+class RigScheduler:
+    """
+    Rig scheduling for large well inventories, built on the notebook's time-indexed MILP.
+
+    Modes of `solve(n_rigs, mode)`:
+        "full": the monthly MILP over the whole horizon, seeded with the heuristic schedule.
+        "aggregate": first a model with monthly starts for `fine` months and `bucket`-month
+            starts after. Its schedule is repaired by list scheduling in model order, then
+            refined by a monthly MILP in which each well may only start near its coarse start.
+        "rolling": a rolling horizon. Each window has monthly starts for `window` months
+            and a `bucket`-month tail to the horizon end. Wells starting in the first `step`
+            months are committed and the window advances. Every window is seeded from the
+            heuristic, and the result is feasible by construction.
+    Every mode returns the best feasible schedule found, never worse than the heuristic.
+
+    Args:
+        wells (pd.DataFrame): well, npv_mm, duration_mo, depends_on.
+        horizon (int): Months.
+        time_limit (float): CBC budget per solve() call (s); aggregate splits it over its two stages,
+            rolling over its windows.
+        gap_rel (float): CBC stops once its incumbent is within this relative gap of its bound.
+    """
+
+    def __init__(self, wells, horizon, discount=MONTHLY_DISCOUNT, time_limit=60, gap_rel=1e-3, fine=12, bucket=6,
+                 window=12, step=6):
+        if window < step + wells.duration_mo.max():
+            raise ValueError("window must cover step plus the longest well so commitments stay feasible")
+        self.wells = wells.reset_index(drop=True)
+        self.horizon, self.discount, self.time_limit, self.gap_rel = horizon, discount, time_limit, gap_rel
+        self.fine, self.bucket, self.window, self.step = fine, bucket, window, step
+
+    def npv(self, starts, n_rigs):
+        return schedule_npv(self.wells, starts, n_rigs, self.horizon, self.discount)
+
+    def lp_bound(self, n_rigs):
+        """LP relaxation of the full monthly model: an upper bound on any schedule's NPV."""
+        m, x = _build(self.wells, n_rigs, np.arange(self.horizon + 1), self.horizon, self.discount)
+        return _solve(m, x, self.time_limit, relax=True)
+
+    def solve(self, n_rigs, mode="rolling"):
+        """
+        Returns:
+            dict: n_rigs, mode, npv, heuristic_npv, starts, solve_s.
+        """
+        start = time.perf_counter()
+        seed = heuristic_schedule(self.wells, n_rigs, self.horizon)
+        starts = {"full": self._full, "aggregate": self._aggregate, "rolling": self._rolling}[mode](n_rigs, seed)
+        h_npv, npv = self.npv(seed, n_rigs), self.npv(starts, n_rigs)
+        if npv < h_npv:
+            starts, npv = seed, h_npv
+        return {"n_rigs": n_rigs, "mode": mode, "npv": npv, "heuristic_npv": h_npv, "starts": starts,
+                "solve_s": time.perf_counter() - start}
+
+    def _full(self, n_rigs, seed):
+        m, x = _build(self.wells, n_rigs, np.arange(self.horizon + 1), self.horizon, self.discount)
+        return _solve(m, x, self.time_limit, gap_rel=self.gap_rel, warm=seed)
+
+    def _snap(self, starts, edges):
+        """Move starts down onto the grid, for use as a (possibly rejected) MIP start."""
+        return {w: int(edges[np.searchsorted(edges, s, side="right") - 1]) for w, s in starts.items()}
+
+    def _aggregate(self, n_rigs, seed):
+        H, W = self.horizon, self.wells
+        edges = _grid(0, self.fine, H, self.bucket)
+        m, x = _build(W, n_rigs, edges, H, self.discount)
+        coarse = _solve(m, x, self.time_limit / 2, gap_rel=self.gap_rel, warm=self._snap(seed, edges))
+        npv = W.set_index("well").npv_mm
+        order = sorted(coarse, key=lambda w: (coarse[w], -npv[w]))
+        repaired = list_schedule(W, order, n_rigs, H)
+        # refine: monthly starts near the coarse solution; unscheduled wells keep coarse-grid options
+        allowed = {}
+        for w in W.well:
+            if w in coarse:
+                c = coarse[w]
+                allowed[w] = set(range(max(0, c - self.bucket), c + 2 * self.bucket)) | {repaired.get(w, c)}
+            else:
+                allowed[w] = set(edges[:-1].tolist())
+        m, x = _build(W, n_rigs, np.arange(H + 1), H, self.discount, allowed=allowed)
+        refined = _solve(m, x, self.time_limit / 2, gap_rel=self.gap_rel, warm=repaired)
+        return max((refined, repaired), key=lambda s: self._safe_npv(s, n_rigs))
+
+    def _rolling(self, n_rigs, seed):
+        H, W = self.horizon, self.wells
+        npv, dur = W.set_index("well").npv_mm, W.set_index("well").duration_mo
+        value_order = npv.sort_values(ascending=False, kind="stable").index
+        busy, committed, done = np.zeros(H, dtype=int), {}, {}
+        t0 = 0
+        while t0 < H:
+            remaining = W[~W.well.isin(committed)]
+            if remaining.empty:
+                break
+            edges = _grid(t0, t0 + self.window, H, self.bucket)
+            warm = list_schedule(W, [w for w in value_order if w not in committed], n_rigs, H, busy, done, t0)
+            m, x = _build(remaining, n_rigs, edges, H, self.discount, busy=busy, done=done)
+            window = _solve(m, x, self.time_limit * self.step / H, gap_rel=self.gap_rel, warm=self._snap(warm, edges))
+            for w, s in window.items():
+                if s < t0 + self.step:
+                    d = int(dur[w])
+                    committed[w], done[w] = s, s + d
+                    busy[s:s + d] += 1
+            t0 += self.step
+        return committed
+
+    def _safe_npv(self, starts, n_rigs):
+        try:
+            return self.npv(starts, n_rigs)
+        except ValueError:
+            return -np.inf
+
+
+def _solve_task(args):
+    scheduler, n_rigs, mode = args
+    return scheduler.solve(n_rigs, mode)
+
+
+def sweep(scheduler, rig_counts, mode="aggregate", n_jobs=1):
+    """
+    Fleet-size sensitivity: one independent solve per rig count, in parallel processes.
+
+    Returns:
+        pd.DataFrame: n_rigs, npv, heuristic_npv, gain_pct, solve_s.
+    """
+    tasks = [(scheduler, n, mode) for n in rig_counts]
+    if n_jobs == 1:
+        results = list(map(_solve_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            results = list(pool.map(_solve_task, tasks))
+    out = pd.DataFrame(results).drop(columns=["starts", "mode"])
+    out["gain_pct"] = 100 * (out.npv / out.heuristic_npv - 1)
+    return out[["n_rigs", "npv", "heuristic_npv", "gain_pct", "solve_s"]]
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def _notebook_solve(wells, deps, n_rigs, horizon):
+    """Drilling_Schedule_Optimization.ipynb: solve(n_rigs) (reference for parity and timing)."""
+    m = pulp.LpProblem("rig_schedule", pulp.LpMaximize)
+    W = wells.set_index("well")
+    starts = range(horizon)
+    x = {(w, t): pulp.LpVariable(f"x_{w}_{t}", cat="Binary")
+         for w in W.index for t in starts if t + W.loc[w, "duration_mo"] <= horizon}
+
+    m += pulp.lpSum(x[w, t] * W.loc[w, "npv_mm"] * MONTHLY_DISCOUNT **
+                    (t + W.loc[w, "duration_mo"]) for (w, t) in x)
+    for w in W.index:
+        m += pulp.lpSum(x[w, t] for t in starts if (w, t) in x) <= 1
+    for t in starts:
+        m += pulp.lpSum(x[w, s] for (w, s) in x
+                        if s <= t < s + W.loc[w, "duration_mo"]) <= n_rigs
+    for w, dep in deps.items():
+        for t in starts:
+            if (w, t) in x:
+                m += x[w, t] <= pulp.lpSum(
+                    x[dep, s] for s in starts
+                    if (dep, s) in x and s + W.loc[dep, "duration_mo"] <= t)
+    m.solve(pulp.PULP_CBC_CMD(msg=0, timeLimit=60))
+    sched = {w: t for (w, t), v in x.items() if v.value() > 0.5}
+    return sched, pulp.value(m.objective)
+
+
+def _notebook_heuristic(wells, deps, n_rigs, horizon):
+    """Drilling_Schedule_Optimization.ipynb: heuristic(n_rigs)."""
+    W = wells.sort_values("npv_mm", ascending=False)
+    rig_free = [0] * n_rigs
+    done_time, total = {}, 0.0
+    for r in W.itertuples():
+        dep = deps.get(r.well, "")
+        earliest = done_time.get(dep, 0) if dep else 0
+        rig = int(np.argmin(rig_free))
+        start = max(rig_free[rig], earliest)
+        if start + r.duration_mo > horizon:
+            continue
+        rig_free[rig] = start + r.duration_mo
+        done_time[r.well] = start + r.duration_mo
+        total += r.npv_mm * MONTHLY_DISCOUNT ** (start + r.duration_mo)
+    return total
+
+
+def benchmark(sizes=((100, 4), (200, 6), (400, 8)), horizon=60, time_limit=60, sweep_rigs=(6, 8, 10, 12),
+              n_jobs=None):
+    """Parity with the notebook on its 18 wells, then solve time, gap and NPV against the heuristic by size."""
+    wells = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "well_schedule_inputs.csv"),
+                        keep_default_na=False)
+    start = time.perf_counter()
+    ref_sched, ref_npv = _notebook_solve(wells, _deps(wells), 2, 24)
+    t_ref = time.perf_counter() - start
+    res = RigScheduler(wells, 24, time_limit=time_limit).solve(2, "full")
+    print(f"Notebook case (18 wells, 2 rigs): notebook MILP ${ref_npv:,.1f}MM in {t_ref:.1f} s, "
+          f"full ${res['npv']:,.1f}MM in {res['solve_s']:.1f} s; heuristic: notebook "
+          f"${_notebook_heuristic(wells, _deps(wells), 2, 24):,.1f}MM, here ${res['heuristic_npv']:,.1f}MM")
+
+    print(f"\n{'wells':>5s} {'rigs':>4s} {'mode':>9s} {'NPV $MM':>9s} {'vs heur.':>8s} {'gap':>6s} {'time':>7s}")
+    for n_wells, n_rigs in sizes:
+        sched = RigScheduler(make_wells(n_wells), horizon, time_limit=time_limit)
+        bound = sched.lp_bound(n_rigs)
+        for mode in ("full", "aggregate", "rolling"):
+            r = sched.solve(n_rigs, mode)
+            if mode == "full":
+                print(f"{n_wells:5d} {n_rigs:4d} {'heuristic':>9s} {r['heuristic_npv']:9,.1f} {'':>8s} "
+                      f"{100 * (1 - r['heuristic_npv'] / bound):5.2f}% {'':>7s}")
+            print(f"{n_wells:5d} {n_rigs:4d} {mode:>9s} {r['npv']:9,.1f} {100 * (r['npv'] / r['heuristic_npv'] - 1):+7.2f}% "
+                  f"{100 * (1 - r['npv'] / bound):5.2f}% {r['solve_s']:6.1f}s")
+
+    n_jobs = n_jobs or min(len(sweep_rigs), os.cpu_count() or 1)
+    sched = RigScheduler(make_wells(sizes[-1][0]), horizon, time_limit=time_limit)
+    start = time.perf_counter()
+    table = sweep(sched, sweep_rigs, "aggregate", n_jobs=n_jobs)
+    print(f"\nRig sweep ({sizes[-1][0]} wells, aggregate, {n_jobs} processes) in {time.perf_counter() - start:.1f} s")
+    print(table.to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,324 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+def _lindley(steps, g0):
+    """
+    CUSUM recursion g[i] = max(0, g[i-1] + steps[i]) along axis 0, without a
+    Python loop: g[n] = S[n] - min(-g0, min_{j<=n} S[j]) with S = cumsum(steps).
+    """
+    S = np.cumsum(steps, axis=0)
+    return S - np.minimum(-g0, np.minimum.accumulate(S, axis=0))
+
+
+def cusum(x, mu0, sigma, k=0.5, h=5.0):
+    """
+    Vectorized two-sided CUSUM (same outputs as the notebook's cusum()).
+
+    x may be (n_samples,) or (n_samples, n_series); statistics run along axis 0.
+
+    Returns:
+        tuple: (alarm index or None per series, gp, gn)
+    """
+    z = (np.asarray(x, dtype=float) - mu0) / sigma
+    zero = np.zeros(z.shape[1:])
+    gp = np.concatenate([zero[None], _lindley(z[1:] - k, zero)])
+    gn = np.concatenate([zero[None], _lindley(-z[1:] - k, zero)])
+    hit = (gp > h) | (gn > h)
+    first = np.where(hit.any(axis=0), hit.argmax(axis=0), -1)
+    if np.ndim(first) == 0:
+        return (int(first) if first >= 0 else None), gp, gn
+    return np.where(first >= 0, first, None), gp, gn
+
+
+class StreamingCusum:
+    """
+    Two-sided CUSUM state for many pipeline segments, updated together.
+
+    Each call to `update` takes a batch of balance residuals
+    (q_in - q_out - dlinepack) shaped (n_segments,) for one minute or
+    (n_minutes, n_segments) for a block, and advances every segment at once.
+    mu0, sigma, k and h may be scalars or per-segment arrays.
+
+    Attributes:
+        gp, gn (np.ndarray): Current upper / lower statistics per segment.
+        alarm_minute (np.ndarray): Minute of the first alarm per segment (-1 = none).
+        alarm_side (np.ndarray): +1 (gain), -1 (loss / leak) or 0.
+    """
+
+    def __init__(self, n_segments, mu0=0.0, sigma=1.0, k=0.25, h=8.0):
+        self.n_segments = n_segments
+        self.mu0 = np.broadcast_to(np.asarray(mu0, dtype=float), (n_segments,)).copy()
+        self.sigma = np.broadcast_to(np.asarray(sigma, dtype=float), (n_segments,)).copy()
+        self.k = np.broadcast_to(np.asarray(k, dtype=float), (n_segments,)).copy()
+        self.h = np.broadcast_to(np.asarray(h, dtype=float), (n_segments,)).copy()
+        self.gp = np.zeros(n_segments)
+        self.gn = np.zeros(n_segments)
+        self.alarm_minute = np.full(n_segments, -1, dtype=np.int64)
+        self.alarm_side = np.zeros(n_segments, dtype=np.int8)
+        self.minute = 0
+
+    @classmethod
+    def from_baseline(cls, residuals, k=0.25, h=8.0):
+        """Calibrate mu0/sigma per segment from a leak-free (n_minutes, n_segments) block."""
+        residuals = np.asarray(residuals, dtype=float)
+        return cls(residuals.shape[1], residuals.mean(axis=0), residuals.std(axis=0), k, h)
+
+    def update(self, residuals):
+        """
+        Advance all segments by one minute or a block of minutes.
+
+        Returns:
+            np.ndarray: Indices of segments that raised a new alarm in this batch.
+        """
+        r = np.asarray(residuals, dtype=float)
+        if r.ndim == 1:
+            r = r[None, :]
+        z = (r - self.mu0) / self.sigma
+
+        if r.shape[0] == 1:
+            gp = np.maximum(0.0, self.gp + z[0] - self.k)[None]
+            gn = np.maximum(0.0, self.gn - z[0] - self.k)[None]
+        else:
+            gp = _lindley(z - self.k, self.gp)
+            gn = _lindley(-z - self.k, self.gn)
+
+        hit = (gp > self.h) | (gn > self.h)
+        new = hit.any(axis=0) & (self.alarm_minute < 0)
+        first = hit.argmax(axis=0)
+        cols = np.flatnonzero(new)
+        self.alarm_minute[cols] = self.minute + first[cols]
+        self.alarm_side[cols] = np.where(gn[first[cols], cols] > self.h[cols], -1, 1)
+
+        self.gp, self.gn = gp[-1], gn[-1]
+        self.minute += r.shape[0]
+        return cols
+
+    def reset(self, segments=None):
+        """Acknowledge alarms and restart the statistics (all segments by default)."""
+        segments = slice(None) if segments is None else segments
+        self.gp[segments] = 0.0
+        self.gn[segments] = 0.0
+        self.alarm_minute[segments] = -1
+        self.alarm_side[segments] = 0
+
+    def status(self, names=None):
+        """Current state per segment as a DataFrame."""
+        return pd.DataFrame({
+            'segment': np.arange(self.n_segments) if names is None else names,
+            'gp': self.gp, 'gn': self.gn, 'k': self.k, 'h': self.h,
+            'alarm_minute': self.alarm_minute,
+            'alarm_side': pd.Series(self.alarm_side).map({-1: 'loss', 0: '', 1: 'gain'}).to_numpy(),
+        })
+
+
+# ----------------------------------------------------------------------
+# Monte Carlo tuning
+# ----------------------------------------------------------------------
+def _first_passage(M, h_grid):
+    """
+    First index where the running max M (n_runs, n) exceeds each h -> (n_runs, n_h), -1 = never.
+    All rows are searched in one np.searchsorted call by stacking them with offsets.
+    """
+    n_runs, n = M.shape
+    h_grid = np.asarray(h_grid, dtype=float)
+    span = max(M.max(), h_grid.max()) + 1.0
+    offset = span * np.arange(n_runs)[:, None]
+    pos = np.searchsorted((M + offset).ravel(), (h_grid[None, :] + offset).ravel(), side='right')
+    pos = pos.reshape(n_runs, len(h_grid)) - n * np.arange(n_runs)[:, None]
+    return np.where(pos < n, pos, -1)
+
+
+def _run_max(z, k):
+    """Running max of max(gp, gn) for standardized series z (n_runs, n)."""
+    zero = np.zeros(z.shape[0])
+    gp = _lindley((z[:, 1:] - k).T, zero)
+    gn = _lindley((-z[:, 1:] - k).T, zero)
+    M = np.maximum.accumulate(np.maximum(gp, gn), axis=0).T
+    return np.concatenate([np.zeros((z.shape[0], 1)), M], axis=1)
+
+
+def _delay_task(args):
+    k, h_grid, deltas, noise, start = args
+    rows = []
+    for delta in deltas:
+        z = noise.copy()
+        z[:, start:] -= delta
+        alarm = _first_passage(_run_max(z, k), h_grid)
+        detected = alarm >= start
+        n_detected = detected.sum(axis=0)
+        total = np.where(detected, (alarm - start) / 60.0, 0.0).sum(axis=0)
+        mean_delay = np.where(n_detected > 0, total / np.maximum(n_detected, 1), np.nan)
+        for j, h in enumerate(h_grid):
+            rows.append({'k': k, 'h': h, 'delta': delta, 'mean_detect_hr': mean_delay[j],
+                         'detect_rate': n_detected[j] / len(alarm)})
+    return rows
+
+
+def _false_alarm_task(args):
+    k, h_grid, noise, horizon_days = args
+    alarm = _first_passage(_run_max(noise, k), h_grid)
+    days = np.where(alarm > 0, alarm / 1440.0, horizon_days)
+    return [{'k': k, 'h': h, 'mean_false_alarm_days': days[:, j].mean()} for j, h in enumerate(h_grid)]
+
+
+def mc_tuning(k_grid, h_grid, leak_fracs, sigma, q_nominal=2_000.0, n_delay_runs=40,
+              n_fa_runs=30, delay_days=3, fa_days=60, n_jobs=1):
+    """
+    Detection delay and false-alarm statistics for a whole (k, h, leak) grid.
+
+    Uses the notebook's experiment (mc_delay / mc_false_alarm_days): the same
+    seeds are shared by every setting (common random numbers), so one noise
+    draw serves the whole grid, and all thresholds h are resolved from a
+    single CUSUM pass per (k, leak) via the running max of the statistic.
+
+    Args:
+        k_grid, h_grid (array-like): CUSUM drift and threshold values.
+        leak_fracs (array-like): Leak sizes as a fraction of q_nominal.
+        sigma (float): Residual standard deviation (bbl/hr).
+        n_jobs (int): Worker processes over k (1 = run in the current process).
+
+    Returns:
+        pd.DataFrame: k, h, leak_frac, mean_detect_hr, detect_rate, mean_false_alarm_days
+    """
+    n = delay_days * 24 * 60
+    noise = np.stack([np.random.default_rng(s).normal(0, sigma, n) for s in range(n_delay_runs)]) / sigma
+    fa_noise = np.stack([np.random.default_rng(1000 + s).normal(0, sigma, fa_days * 24 * 60)
+                         for s in range(n_fa_runs)]) / sigma
+    leak_fracs = np.asarray(leak_fracs, dtype=float)
+    deltas = leak_fracs * q_nominal / sigma
+
+    delay_tasks = [(k, h_grid, deltas, noise, n // 2) for k in k_grid]
+    fa_tasks = [(k, h_grid, fa_noise, fa_days) for k in k_grid]
+    if n_jobs == 1:
+        delay_rows = [r for rows in map(_delay_task, delay_tasks) for r in rows]
+        fa_rows = [r for rows in map(_false_alarm_task, fa_tasks) for r in rows]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            delay_rows = [r for rows in pool.map(_delay_task, delay_tasks) for r in rows]
+            fa_rows = [r for rows in pool.map(_false_alarm_task, fa_tasks) for r in rows]
+
+    table = pd.DataFrame(delay_rows)
+    table['leak_frac'] = table['delta'] * sigma / q_nominal
+    table = table.merge(pd.DataFrame(fa_rows), on=['k', 'h'])
+    return table[['k', 'h', 'leak_frac', 'delta', 'mean_detect_hr', 'detect_rate', 'mean_false_alarm_days']]
+
+
+def select_thresholds(table, min_false_alarm_days=30.0, min_detect_rate=0.95):
+    """
+    Fastest (k, h) per leak size that meets the false-alarm budget.
+
+    Returns:
+        pd.DataFrame: One row per leak size (empty rows dropped if nothing qualifies).
+    """
+    ok = table[(table['mean_false_alarm_days'] >= min_false_alarm_days)
+               & (table['detect_rate'] >= min_detect_rate)]
+    best = ok.sort_values('mean_detect_hr').groupby('delta', sort=True).head(1)
+    return best.sort_values('delta').reset_index(drop=True)
+
+
+def tune_segments(sigma, q_nominal, leak_frac, k_grid, h_grid, min_false_alarm_days=30.0,
+                  n_bins=24, n_jobs=1, **mc_kwargs):
+    """
+    Per-segment (k, h) for thousands of segments.
+
+    In standardized units the CUSUM only sees delta = leak / sigma, so the
+    segments are binned on log(delta), one Monte Carlo grid is run over the
+    bin centres, and each segment takes the thresholds of its bin.
+
+    Returns:
+        pd.DataFrame: Per segment: sigma, delta, k, h, mean_detect_hr, mean_false_alarm_days
+    """
+    sigma = np.asarray(sigma, dtype=float)
+    delta = leak_frac * np.broadcast_to(q_nominal, sigma.shape) / sigma
+    edges = np.geomspace(delta.min(), delta.max() * (1 + 1e-9), n_bins + 1) if delta.min() < delta.max() \
+        else np.array([delta.min(), delta.min() * (1 + 1e-9)])
+    centres = np.sqrt(edges[:-1] * edges[1:])
+    bins = np.clip(np.searchsorted(edges, delta, side='right') - 1, 0, len(centres) - 1)
+    used = np.unique(bins)
+
+    # sigma=1, q_nominal=1 -> leak_fracs are the deltas themselves
+    table = mc_tuning(k_grid, h_grid, centres[used], sigma=1.0, q_nominal=1.0, n_jobs=n_jobs, **mc_kwargs)
+    best = select_thresholds(table, min_false_alarm_days).set_index('delta')
+    picks = best.reindex(centres[used])
+    lookup = pd.DataFrame({'bin': used, 'k': picks['k'].to_numpy(), 'h': picks['h'].to_numpy(),
+                           'mean_detect_hr': picks['mean_detect_hr'].to_numpy(),
+                           'mean_false_alarm_days': picks['mean_false_alarm_days'].to_numpy()})
+    out = pd.DataFrame({'segment': np.arange(sigma.size), 'sigma': sigma, 'delta': delta, 'bin': bins})
+    return out.merge(lookup, on='bin', how='left').drop(columns='bin')
+
+
+def benchmark(sigma=28.0, q_nominal=2_000.0, n_segments=3500, seed=42):
+    """Notebook loop vs vectorized tuning, and one day of streaming for n_segments."""
+
+    def cusum_loop(x, mu0, sigma, k=0.5, h=5.0):
+        z = (x - mu0) / sigma
+        gp = np.zeros(len(x))
+        gn = np.zeros(len(x))
+        alarm = None
+        for i in range(1, len(x)):
+            gp[i] = max(0, gp[i - 1] + z[i] - k)
+            gn[i] = max(0, gn[i - 1] - z[i] - k)
+            if alarm is None and (gp[i] > h or gn[i] > h):
+                alarm = i
+        return alarm, gp, gn
+
+    rng = np.random.default_rng(seed)
+    x = rng.normal(0, sigma, 7200)
+    x[3600:] -= 12.0
+    a_ref, gp_ref, gn_ref = cusum_loop(x, 0, sigma, 0.25, 8.0)
+    a_vec, gp_vec, gn_vec = cusum(x, 0, sigma, 0.25, 8.0)
+    print(f"cusum parity: alarm {a_ref} vs {a_vec}, max |dg| = "
+          f"{max(np.abs(gp_ref - gp_vec).max(), np.abs(gn_ref - gn_vec).max()):.1e}")
+
+    # Notebook-style serial Monte Carlo for one (k, h) and six leak sizes
+    # (h = 18 rather than the notebook's 8: at h = 8 every run false-alarms before the leak)
+    sizes = [0.002, 0.004, 0.006, 0.01, 0.02, 0.04]
+    start = time.perf_counter()
+    ref = []
+    for frac in sizes:
+        delays = []
+        for s in range(40):
+            res = np.random.default_rng(s).normal(0, sigma, 4320)
+            res[2160:] -= frac * q_nominal
+            a, _, _ = cusum_loop(res, 0, sigma, 0.25, 18.0)
+            delays.append((a - 2160) / 60 if a and a >= 2160 else np.nan)
+        ref.append(np.nanmean(delays) if not np.all(np.isnan(delays)) else np.nan)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    one = mc_tuning([0.25], [18.0], sizes, sigma, q_nominal, n_fa_runs=1, fa_days=1)
+    vec_one = time.perf_counter() - start
+    diff = np.abs(one['mean_detect_hr'].to_numpy() - ref)
+    print(f"mc_delay parity: max |d delay| = {np.nanmax(diff):.1e} h "
+          f"(NaN mismatches: {int((np.isnan(one['mean_detect_hr'].to_numpy()) != np.isnan(ref)).sum())})")
+    print(f"1 setting x 6 leaks, 40 runs: loop {loop_time:.2f} s, vectorized {vec_one * 1e3:.0f} ms")
+
+    k_grid = [0.1, 0.25, 0.5, 0.75, 1.0]
+    h_grid = np.arange(2.0, 20.5, 1.0)
+    start = time.perf_counter()
+    grid = mc_tuning(k_grid, h_grid, sizes, sigma, q_nominal)
+    print(f"Full grid ({len(k_grid)} k x {len(h_grid)} h x {len(sizes)} leaks, incl. 60-day "
+          f"false-alarm runs): {time.perf_counter() - start:.2f} s")
+    best = select_thresholds(grid, min_false_alarm_days=30)
+    print(best[['leak_frac', 'k', 'h', 'mean_detect_hr', 'mean_false_alarm_days']].to_string(index=False))
+
+    k, h = best.loc[best['leak_frac'].sub(0.01).abs().idxmin(), ['k', 'h']]
+    detector = StreamingCusum(n_segments, 0.0, rng.uniform(20, 40, n_segments), k, h)
+    leak = rng.random(n_segments) < 0.01
+    start = time.perf_counter()
+    for minute in range(1440):
+        r = rng.normal(0, detector.sigma) - np.where(leak & (minute >= 600), 40.0, 0.0)
+        detector.update(r)
+    per_minute = (time.perf_counter() - start) / 1440
+    caught = (detector.alarm_minute[leak] >= 0).mean()
+    false = (detector.alarm_minute[~leak] >= 0).sum()
+    print(f"Streaming {n_segments} segments (k={k}, h={h}): {per_minute * 1e3:.3f} ms per minute batch; "
+          f"{caught:.0%} of leaking segments alarmed, {false} false alarms in 24 h")
+
+
+if __name__ == "__main__":
+    benchmark()
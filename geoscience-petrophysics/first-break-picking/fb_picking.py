@@ -0,0 +1,321 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+NS = 500
+WIN = 25          # pre/post window used by the refinement features
+MIN_WIN = 5       # shorter pre/post windows give all-zero features (as in the notebook)
+
+
+# ---------------------------------------------------------------------------
+# Batched STA/LTA and window features (one 2D pass per gather / chunk)
+# ---------------------------------------------------------------------------
+
+def sta_lta_batch(traces, sta=8, lta=60, thr=3.0):
+    """
+    STA/LTA trigger for a (n_traces, n_samples) array, identical to sta_lta_pick.
+
+    Returns:
+        tuple: (picks (n_traces,), ratio (n_traces, n_samples - sta - lta + 1))
+    """
+    traces = np.asarray(traces, dtype=float)
+    n_samples = traces.shape[1]
+    csum = np.zeros((traces.shape[0], n_samples + 1))
+    np.cumsum(traces ** 2, axis=1, out=csum[:, 1:])
+    sta_v = (csum[:, sta:] - csum[:, :-sta]) / sta
+    lta_v = (csum[:, lta:] - csum[:, :-lta]) / lta
+    n = min(sta_v.shape[1] - lta, lta_v.shape[1])
+    ratio = sta_v[:, lta - sta:lta - sta + n] / (lta_v[:, :n] + 1e-12)
+
+    above = ratio > thr
+    trig = above.argmax(axis=1)
+    hit = above[np.arange(len(trig)), trig]
+    return np.where(hit, trig + lta, n_samples // 2), ratio
+
+
+def _sliding_max(x, w):
+    """Max over x[:, i:i + w] for every i (van Herk / Gil-Werman, O(n) per row)."""
+    n_rows, n = x.shape
+    n_blocks = -(-(n + w - 1) // w)
+    padded = np.zeros((n_rows, n_blocks * w))           # inputs are |x| >= 0, so zero pad is neutral
+    padded[:, :n] = x
+    blocks = padded.reshape(n_rows, n_blocks, w)
+    prefix = np.maximum.accumulate(blocks, axis=2).reshape(n_rows, -1)
+    suffix = np.maximum.accumulate(blocks[:, :, ::-1], axis=2)[:, :, ::-1].reshape(n_rows, -1)
+    return np.maximum(suffix[:, :n], prefix[:, w - 1:w - 1 + n])
+
+
+def _window_sum(csum, start, stop):
+    """Sum of the series between [start, stop) from its zero-prefixed cumulative sum (row-wise gather)."""
+    rows = np.arange(csum.shape[0])[:, None]
+    return csum[rows, stop] - csum[rows, start]
+
+
+def window_features_batch(traces, picks, half=40):
+    """
+    Candidate-window features for every trace at once, equal to window_features.
+
+    Pre/post RMS, sign-change density and mean |derivative| come from
+    cumulative sums; the pre/post absolute maxima from a sliding max. Each
+    trace's candidates are laid out in a (n_traces, 2 * half) grid.
+
+    Returns:
+        tuple: (features (n_traces, 2 * half, 4), offsets (n_traces, 2 * half), valid mask)
+    """
+    traces = np.asarray(traces, dtype=float)
+    n_traces, n_samples = traces.shape
+    picks = np.asarray(picks)
+
+    lo = np.maximum(picks - half, 0)
+    hi = np.minimum(picks + half, n_samples)
+    offsets = lo[:, None] + np.arange(2 * half)
+    valid = offsets < hi[:, None]
+    c = np.minimum(offsets, n_samples - 1)
+
+    def csum(x):
+        out = np.zeros((n_traces, x.shape[1] + 1))
+        np.cumsum(x, axis=1, out=out[:, 1:])
+        return out
+
+    energy = csum(traces ** 2)
+    abs_diff = csum(np.abs(np.diff(traces, axis=1)))
+    sign_flip = csum((np.diff(np.signbit(traces), axis=1) != 0).astype(float))
+
+    pre_start = np.maximum(c - WIN, 0)
+    post_stop = np.minimum(c + WIN, n_samples)
+    n_pre, n_post = c - pre_start, post_stop - c
+
+    abs_tr = np.abs(traces)
+    fwd_max = _sliding_max(abs_tr, WIN)                               # max |x[i:i+WIN]|
+    rows = np.arange(n_traces)[:, None]
+    post_max = fwd_max[rows, c]
+    pre_max = np.zeros_like(post_max)
+    full_pre = n_pre == WIN
+    pre_max[full_pre] = fwd_max[rows, pre_start][full_pre]
+    short = ~full_pre & (n_pre >= MIN_WIN)                            # first WIN samples: growing prefix max
+    prefix_max = np.maximum.accumulate(abs_tr[:, :WIN], axis=1)
+    pre_max[short] = prefix_max[rows, np.clip(c - 1, 0, WIN - 1)][short]
+
+    rms_post = np.sqrt(_window_sum(energy, c, post_stop) / np.maximum(n_post, 1))
+    rms_pre = np.sqrt(_window_sum(energy, pre_start, c) / np.maximum(n_pre, 1))
+    d_post = _window_sum(abs_diff, c, post_stop - 1) / np.maximum(n_post - 1, 1)
+    d_pre = _window_sum(abs_diff, pre_start, c - 1) / np.maximum(n_pre - 1, 1)
+    flips = _window_sum(sign_flip, c, post_stop - 1) / np.maximum(n_post - 1, 1)
+
+    feats = np.stack([
+        rms_post / (rms_pre + 1e-12),
+        post_max / (pre_max + 1e-12),
+        flips,
+        d_post / (d_pre + 1e-12),
+    ], axis=-1)
+    feats[(n_pre < MIN_WIN) | (n_post < MIN_WIN) | ~valid] = 0.0
+    return feats, offsets, valid
+
+
+def refine_picks(clf, traces, coarse, half=40):
+    """Refined picks for a batch of traces with a single predict_proba call."""
+    feats, offsets, valid = window_features_batch(traces, coarse, half)
+    proba = np.full(valid.shape, -np.inf)
+    proba[valid] = clf.predict_proba(feats[valid])[:, 1]
+    return offsets[np.arange(len(offsets)), proba.argmax(axis=1)]
+
+
+def training_set(traces, coarse, onsets, half=40):
+    """Stacked (X, y) candidate rows for training, in the notebook's row order."""
+    feats, offsets, valid = window_features_batch(traces, coarse, half)
+    y = (offsets == np.asarray(onsets)[:, None]).astype(int)
+    return feats[valid], y[valid]
+
+
+def train_refiner(traces, coarse, onsets, half=40, random_state=42, n_jobs=-1):
+    """Random Forest refinement classifier with the notebook's settings."""
+    X, y = training_set(traces, coarse, onsets, half)
+    clf = RandomForestClassifier(n_estimators=200, min_samples_leaf=5, class_weight="balanced",
+                                 random_state=random_state, n_jobs=n_jobs)
+    return clf.fit(X, y)
+
+
+# ---------------------------------------------------------------------------
+# Out-of-core picking over memory-mapped trace files
+# ---------------------------------------------------------------------------
+
+def open_traces(path, n_samples=None, dtype="float32"):
+    """
+    Memory-map a 2D trace array: a .npy file, or a raw binary file of
+    `dtype` samples with `n_samples` per trace.
+    """
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    if n_samples is None:
+        raise ValueError("n_samples is required for raw trace files")
+    return np.memmap(path, dtype=dtype, mode="r").reshape(-1, n_samples)
+
+
+_WORKER = {}
+
+
+def _init_worker(path, n_samples, dtype, clf, params):
+    clf.set_params(n_jobs=1)          # parallelism comes from the chunk pool
+    _WORKER.update(traces=open_traces(path, n_samples, dtype), clf=clf, params=params)
+
+
+def _pick_chunk(bounds):
+    start, stop = bounds
+    traces = np.asarray(_WORKER["traces"][start:stop], dtype=float)
+    p = _WORKER["params"]
+    coarse, _ = sta_lta_batch(traces, p["sta"], p["lta"], p["thr"])
+    refined = refine_picks(_WORKER["clf"], traces, coarse, p["half"])
+    return start, coarse, refined
+
+
+def pick_file(path, clf, out=None, n_samples=None, dtype="float32", chunk_size=20_000,
+              n_jobs=1, sta=8, lta=60, thr=3.0, half=40):
+    """
+    STA/LTA + ML first-break picks for every trace in a memory-mapped file.
+
+    Chunks of `chunk_size` traces are read from the map, triggered and
+    refined in one classifier call each, across `n_jobs` processes.
+
+    Args:
+        out (str): Optional .npy path; picks are written there as a memory-mapped
+            (n_traces, 2) int32 array [stalta_pick, ml_pick] instead of held in RAM.
+
+    Returns:
+        tuple: (picks (n_traces, 2), traces per second)
+    """
+    n_traces = open_traces(path, n_samples, dtype).shape[0]
+    if out is not None:
+        picks = np.lib.format.open_memmap(out, mode="w+", dtype=np.int32, shape=(n_traces, 2))
+    else:
+        picks = np.empty((n_traces, 2), dtype=np.int32)
+
+    params = dict(sta=sta, lta=lta, thr=thr, half=half)
+    bounds = [(s, min(s + chunk_size, n_traces)) for s in range(0, n_traces, chunk_size)]
+    start_time = time.perf_counter()
+    if n_jobs == 1:
+        _WORKER.update(traces=open_traces(path, n_samples, dtype), clf=clf, params=params)
+        for start, coarse, refined in map(_pick_chunk, bounds):
+            picks[start:start + len(coarse), 0] = coarse
+            picks[start:start + len(coarse), 1] = refined
+        _WORKER.clear()
+    else:
+        with ProcessPoolExecutor(n_jobs, initializer=_init_worker,
+                                 initargs=(path, n_samples, dtype, clf, params)) as pool:
+            for start, coarse, refined in pool.map(_pick_chunk, bounds):
+                picks[start:start + len(coarse), 0] = coarse
+                picks[start:start + len(coarse), 1] = refined
+    elapsed = time.perf_counter() - start_time
+
+    if out is not None:
+        picks.flush()
+    return picks, n_traces / elapsed
+
+
+# ---------------------------------------------------------------------------
+# Notebook reference implementation (parity checks) and benchmark
+# ---------------------------------------------------------------------------
+
+def make_traces(n_traces, seed=42, n_samples=NS):
+    """Synthetic shot traces from the notebook's generator."""
+    rng = np.random.default_rng(seed)
+
+    def make_trace(snr_db):
+        onset = rng.integers(120, 350)
+        sig = np.zeros(n_samples)
+        f = rng.uniform(0.04, 0.09)
+        dur = rng.integers(60, 140)
+        wave = np.sin(2 * np.pi * f * np.arange(dur)) * np.hanning(dur)
+        ramp = rng.uniform(0.4, 1.0)  # emergent vs impulsive onset
+        wave[:20] *= np.linspace(1 - ramp, 1, 20)
+        sig[onset:onset + dur] = wave[:max(0, n_samples - onset)][:dur]
+        noise_amp = np.sqrt(np.mean(wave ** 2)) / (10 ** (snr_db / 20))
+        trace = sig + rng.normal(0, noise_amp, n_samples)
+        if rng.random() < 0.2:  # pre-arrival noise burst (trigger trap)
+            b = rng.integers(30, onset - 40)
+            trace[b:b + 10] += rng.normal(0, 2.2 * noise_amp, 10)
+        return trace, onset
+
+    snrs = rng.uniform(3, 20, n_traces)
+    data = [make_trace(s) for s in snrs]
+    return np.array([d[0] for d in data]), np.array([d[1] for d in data])
+
+
+def _sta_lta_pick(trace, sta=8, lta=60, thr=3.0):
+    e = trace ** 2
+    csum = np.concatenate([[0], np.cumsum(e)])
+    sta_v = (csum[sta:] - csum[:-sta]) / sta
+    lta_v = (csum[lta:] - csum[:-lta]) / lta
+    n = min(len(sta_v) - lta, len(lta_v))
+    ratio = sta_v[lta - sta:lta - sta + n] / (lta_v[:n] + 1e-12)
+    trig = np.argmax(ratio > thr)
+    return (trig + lta) if ratio[trig] > thr else len(trace) // 2
+
+
+def _window_features(trace, pick, half=40):
+    lo, hi = max(pick - half, 0), min(pick + half, len(trace))
+    feats = []
+    for c in range(lo, hi):
+        pre = trace[max(c - 25, 0):c]
+        post = trace[c:c + 25]
+        if len(pre) < 5 or len(post) < 5:
+            feats.append([0, 0, 0, 0])
+            continue
+        feats.append([
+            np.sqrt((post ** 2).mean()) / (np.sqrt((pre ** 2).mean()) + 1e-12),
+            np.abs(post).max() / (np.abs(pre).max() + 1e-12),
+            (np.diff(np.signbit(post)) != 0).mean(),
+            np.abs(np.diff(post)).mean() / (np.abs(np.diff(pre)).mean() + 1e-12),
+        ])
+    return np.array(feats)
+
+
+def benchmark(n_traces=50_000, path="bench_traces.npy", n_jobs=None, chunk_size=20_000):
+    """Parity with the notebook's per-trace loop, then out-of-core picking throughput."""
+    n_jobs = n_jobs or os.cpu_count()
+    traces, onsets = make_traces(1_500)
+
+    # 1. Parity on the notebook-sized survey
+    start = time.perf_counter()
+    ref_coarse = np.array([_sta_lta_pick(tr) for tr in traces])
+    ref_feats = np.vstack([_window_features(tr, p) for tr, p in zip(traces, ref_coarse)])
+    t_loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    coarse, _ = sta_lta_batch(traces)
+    feats, _, valid = window_features_batch(traces, coarse)
+    t_batch = time.perf_counter() - start
+    print(f"STA/LTA picks identical: {np.array_equal(coarse, ref_coarse)}; "
+          f"feature max rel. diff = {np.abs(feats[valid] - ref_feats).max() / np.abs(ref_feats).max():.1e}; "
+          f"features {t_loop / t_batch:.0f}x faster ({t_loop:.2f} s -> {t_batch * 1e3:.0f} ms)")
+
+    clf = train_refiner(traces[:600], coarse[:600], onsets[:600])
+    test = slice(600, None)
+    start = time.perf_counter()
+    ref_ml = np.array([np.arange(max(p - 40, 0), min(p + 40, NS))[
+        clf.predict_proba(_window_features(tr, p))[:, 1].argmax()]
+        for tr, p in zip(traces[test], coarse[test])])
+    t_loop = time.perf_counter() - start
+    start = time.perf_counter()
+    ml = refine_picks(clf, traces[test], coarse[test])
+    t_batch = time.perf_counter() - start
+    print(f"Refined picks agreement: {(ml == ref_ml).mean():.2%}, "
+          f"median |error| {np.median(np.abs(ml - onsets[test])):.1f} samples; "
+          f"refinement {t_loop / t_batch:.0f}x faster")
+
+    # 2. Out-of-core: tile the survey into a memory-mapped file and pick it in chunks
+    survey = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n_traces, NS))
+    for s in range(0, n_traces, len(traces)):
+        survey[s:s + len(traces)] = traces[:n_traces - s]
+    survey.flush()
+    del survey
+    for jobs in sorted({1, n_jobs}):
+        _, rate = pick_file(path, clf, chunk_size=chunk_size, n_jobs=jobs)
+        print(f"{n_traces:,} traces, n_jobs={jobs}: {rate:,.0f} traces/s")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    benchmark()
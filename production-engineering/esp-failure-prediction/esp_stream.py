@@ -0,0 +1,346 @@
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+LOOKBACK_WINDOW = 30
+ROLLING_WINDOW = 12
+GROUP_KEYS = ["pump_id", "cycle_id"]
+FEATURES = ["amp_mean", "amp_std", "vib_mean", "vib_std", "motor_temp_f"]   # notebook Part 2 feature set
+
+
+def _group_starts(df, keys=GROUP_KEYS):
+    """Row index where each (pump, cycle) run starts; df must hold each group contiguously."""
+    k = df[keys].to_numpy()
+    new = np.ones(len(k), dtype=bool)
+    new[1:] = (k[1:] != k[:-1]).any(axis=1)
+    return np.flatnonzero(new)
+
+
+def _contiguous(df, keys=GROUP_KEYS):
+    """df with every group contiguous (stable, so in-group row order is kept as groupby does)."""
+    starts = _group_starts(df, keys)
+    if len(starts) == len(df[keys].drop_duplicates()):
+        return df
+    return df.sort_values(keys, kind="stable")
+
+
+def add_rolling_features(df, window=ROLLING_WINDOW, cols=(("amperage", "amp"), ("vibration", "vib"))):
+    """
+    Per-(pump, cycle) rolling mean and sample std (min_periods=1, std 0 for a
+    single sample), as the notebook's add_rolling_features, in one pass over
+    all groups.
+
+    Values are centred on each group's first sample and window sums are
+    differences of cumulative sums of x and x^2, with the window start
+    clamped to the group start.
+
+    Returns:
+        pd.DataFrame: copy of df (original row order) with <prefix>_mean / <prefix>_std columns.
+    """
+    work = _contiguous(df)
+    starts = _group_starts(work)
+    lengths = np.diff(np.append(starts, len(work)))
+    group_start = np.repeat(starts, lengths)
+    pos = np.arange(len(work))
+    lo = np.maximum(pos - window + 1, group_start)
+    n = (pos - lo + 1).astype(float)
+
+    out = df.copy()
+    for col, prefix in cols:
+        x = work[col].to_numpy(float)
+        x = x - x[group_start]
+        c1 = np.concatenate([[0.0], np.cumsum(x)])
+        c2 = np.concatenate([[0.0], np.cumsum(x * x)])
+        s1 = c1[pos + 1] - c1[lo]
+        s2 = c2[pos + 1] - c2[lo]
+        mean = s1 / n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = np.where(n > 1, np.maximum(s2 - s1 * mean, 0) / (n - 1), 0.0)
+        out.loc[work.index, f"{prefix}_mean"] = mean + work[col].to_numpy(float)[group_start]
+        out.loc[work.index, f"{prefix}_std"] = np.sqrt(var)
+    return out
+
+
+class WindowedSequences:
+    """
+    Lookback windows over per-cycle sensor histories without materializing them.
+
+    Features and targets are kept as one contiguous (N, F) array (groups
+    back to back); window k is a strided view rows[i_k : i_k + window] with
+    target y[i_k + window], exactly the samples create_sequences builds per
+    (pump, cycle) group. Only the batch being served is ever copied.
+
+    Args:
+        frame (pd.DataFrame): Scaled features, target and the group keys.
+        features (list): Feature columns (in model input order).
+        target (str): Target column (e.g. 'RUL_scaled').
+        window (int): Lookback length.
+        dtype: Array dtype fed to the model.
+    """
+
+    def __init__(self, frame, features=FEATURES, target="RUL_scaled", window=LOOKBACK_WINDOW, dtype=np.float32):
+        frame = _contiguous(frame)
+        self.window = window
+        self.n_features = len(features)
+        self.values = np.ascontiguousarray(frame[features].to_numpy(dtype))
+        self.targets = frame[target].to_numpy(dtype)
+        starts = _group_starts(frame)
+        lengths = np.diff(np.append(starts, len(frame)))
+        n_win = np.maximum(lengths - window, 0)
+        self.index = np.repeat(starts, n_win) + (np.arange(n_win.sum()) - np.repeat(np.cumsum(n_win) - n_win, n_win))
+        self.views = sliding_window_view(self.values, window, axis=0).transpose(0, 2, 1)   # (N-w+1, w, F) view
+
+    def __len__(self):
+        return len(self.index)
+
+    def batch(self, idx):
+        """(X (B, window, F), y (B,)) for window numbers idx."""
+        i = self.index[idx]
+        return self.views[i], self.targets[i + self.window]
+
+    def arrays(self):
+        """Every window at once (small data sets only); equals the notebook's X, y."""
+        return self.batch(np.arange(len(self)))
+
+    def batches(self, batch_size=256, shuffle=False, seed=None):
+        """Yield (X, y) batches; a fresh permutation per call when shuffle=True."""
+        order = np.random.default_rng(seed).permutation(len(self)) if shuffle else np.arange(len(self))
+        for s in range(0, len(order), batch_size):
+            yield self.batch(order[s:s + batch_size])
+
+    def split(self, fraction, seed=None):
+        """Window numbers for a (train, validation) split, e.g. to mirror validation_split."""
+        order = np.random.default_rng(seed).permutation(len(self)) if seed is not None else np.arange(len(self))
+        cut = int(round(len(order) * (1 - fraction)))
+        return order[:cut], order[cut:]
+
+    def dataset(self, batch_size=256, shuffle=True, idx=None, seed=None):
+        """
+        tf.data pipeline over the windows (for model.fit / model.predict);
+        reshuffled each epoch when shuffle=True, prefetching in the background.
+        """
+        import tensorflow as tf
+
+        idx = np.arange(len(self)) if idx is None else np.asarray(idx)
+        epoch = [0]
+
+        def gen():
+            rng = np.random.default_rng(None if seed is None else seed + epoch[0])
+            epoch[0] += 1
+            order = rng.permutation(idx) if shuffle else idx
+            for s in range(0, len(order), batch_size):
+                yield self.batch(order[s:s + batch_size])
+
+        dtype = tf.as_dtype(self.values.dtype)
+        signature = (tf.TensorSpec((None, self.window, self.n_features), dtype), tf.TensorSpec((None,), dtype))
+        return tf.data.Dataset.from_generator(gen, output_signature=signature).prefetch(tf.data.AUTOTUNE)
+
+
+class StreamingRULScorer:
+    """
+    Hourly RUL updates for a whole ESP fleet.
+
+    Per pump it keeps a ring of the last `roll_window` raw amperage/vibration
+    readings (for the rolling features) and a ring of the last `window`
+    scaled feature vectors. Each tick ingests one reading per pump, and
+    every pump with a full lookback window is scored in one batched
+    model.predict call. As in training, the output is the RUL one hour
+    after the latest reading, in hours.
+
+    Args:
+        model: Trained Keras model (anything with .predict(X, batch_size=..., verbose=0)).
+        scaler_X (MinMaxScaler): Feature scaler fitted on FEATURES.
+        scaler_y (MinMaxScaler): Target scaler fitted on RUL.
+        n_pumps (int): Fleet size (pumps are addressed 0..n_pumps-1).
+        window (int): Model lookback.
+        roll_window (int): Rolling-feature window.
+        batch_size (int): model.predict batch size.
+    """
+
+    def __init__(self, model, scaler_X, scaler_y, n_pumps, window=LOOKBACK_WINDOW, roll_window=ROLLING_WINDOW,
+                 batch_size=4_096):
+        self.model = model
+        self.x_scale, self.x_min = scaler_X.scale_, scaler_X.min_
+        self.y_scale, self.y_min = scaler_y.scale_[0], scaler_y.min_[0]
+        self.window = window
+        self.roll_window = roll_window
+        self.batch_size = batch_size
+        self.raw = np.zeros((n_pumps, roll_window, 2))
+        self.feats = np.zeros((n_pumps, window, len(FEATURES)), dtype=np.float32)
+        self.count = np.zeros(n_pumps, dtype=np.int64)
+
+    def reset(self, pumps):
+        """Start a new run-life (after a workover) for the given pumps."""
+        self.count[pumps] = 0
+
+    def step(self, amperage, vibration, motor_temp, pumps=None):
+        """
+        Ingest one reading per pump (all pumps, or the subset `pumps`).
+
+        Returns:
+            np.ndarray: RUL (hours) per pump in the update; NaN until a pump has `window` readings.
+        """
+        pumps = np.arange(len(self.count)) if pumps is None else np.asarray(pumps)
+        c = self.count[pumps]
+        self.raw[pumps, c % self.roll_window] = np.column_stack([amperage, vibration])
+
+        n = np.minimum(c + 1, self.roll_window)
+        filled = np.arange(self.roll_window) < n[:, None]                 # ring slots holding this run's data
+        vals = self.raw[pumps]
+        mean = np.where(filled[..., None], vals, 0).sum(axis=1) / n[:, None]
+        dev = np.where(filled[..., None], vals - mean[:, None], 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.where(n[:, None] > 1, np.sqrt((dev ** 2).sum(axis=1) / (n[:, None] - 1)), 0.0)
+        raw_feats = np.column_stack([mean[:, 0], std[:, 0], mean[:, 1], std[:, 1], motor_temp])
+        self.feats[pumps, c % self.window] = raw_feats * self.x_scale + self.x_min
+        self.count[pumps] = c + 1
+
+        rul = np.full(len(pumps), np.nan)
+        ready = c + 1 >= self.window
+        if ready.any():
+            p = pumps[ready]
+            order = (c[ready, None] + 1 + np.arange(self.window)) % self.window      # oldest -> newest
+            X = self.feats[p[:, None], order]
+            y = np.asarray(self.model.predict(X, batch_size=self.batch_size, verbose=0)).reshape(-1)
+            rul[ready] = (y - self.y_min) / self.y_scale
+        return rul
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def make_fleet(n_pumps=400, hours=8_760, seed=0):
+    """Vectorized version of 01_Data_Generator.py: back-to-back run-lives per pump, `hours` rows each."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for pump in range(1, n_pumps + 1):
+        lives = rng.integers(500, 1_500, hours // 500 + 1)
+        lives = lives[:np.searchsorted(np.cumsum(lives), hours) + 1]
+        cycle = np.repeat(np.arange(1, len(lives) + 1), lives)[:hours]
+        t = np.arange(len(cycle)) - np.repeat(np.cumsum(lives) - lives, lives)[:hours]
+        life = np.repeat(lives, lives)[:hours]
+        k = len(cycle)
+        fault = t > 0.8 * life
+        health = np.where(fault, np.exp((t - 0.8 * life) / 50), 0.0)
+        frames.append(pd.DataFrame({
+            "pump_id": pump, "cycle_id": cycle, "timestamp_hour": t,
+            "amperage": np.repeat(50 + rng.normal(0, 2, len(lives)), lives)[:k] + rng.normal(0, 1, k) + 0.05 * health,
+            "vibration": np.repeat(0.5 + rng.normal(0, 0.1, len(lives)), lives)[:k] + rng.normal(0, 0.05, k) + 0.02 * health,
+            "motor_temp_f": np.repeat(180 + rng.normal(0, 5, len(lives)), lives)[:k] + t / life + rng.normal(0, 1, k),
+            "RUL": life - t - 1,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+class _RidgeWindowModel:
+    """
+    Linear model on flattened windows, fitted from streamed batches
+    (normal equations), standing in for the Keras LSTM when timing the data path.
+    """
+
+    def fit(self, batches, alpha=1e-3):
+        A = b = 0
+        for X, y in batches:
+            Z = np.column_stack([X.reshape(len(X), -1), np.ones(len(X))]).astype(float)
+            A = A + Z.T @ Z
+            b = b + Z.T @ y
+        self.coef = np.linalg.solve(A + alpha * np.eye(len(A)), b)
+        return self
+
+    def predict(self, X, batch_size=None, verbose=0):
+        return (X.reshape(len(X), -1) @ self.coef[:-1] + self.coef[-1])[:, None]
+
+
+def _create_sequences_loop(data, feature_cols, target_col, window_size):
+    """The notebook's create_sequences (reference for parity and timing)."""
+    X, y = [], []
+    for i in range(len(data) - window_size):
+        X.append(data[i:i + window_size][feature_cols].values)
+        y.append(data.iloc[i + window_size][target_col])
+    return np.array(X), np.array(y)
+
+
+def _add_rolling_features_loop(df, window_size=ROLLING_WINDOW):
+    """The notebook's add_rolling_features (reference for parity and timing)."""
+    grouped = df.groupby(GROUP_KEYS)
+    df["amp_mean"] = grouped["amperage"].transform(lambda x: x.rolling(window=window_size, min_periods=1).mean())
+    df["amp_std"] = grouped["amperage"].transform(lambda x: x.rolling(window=window_size, min_periods=1).std()).fillna(0)
+    df["vib_mean"] = grouped["vibration"].transform(lambda x: x.rolling(window=window_size, min_periods=1).mean())
+    df["vib_std"] = grouped["vibration"].transform(lambda x: x.rolling(window=window_size, min_periods=1).std()).fillna(0)
+    return df
+
+
+def benchmark(csv="esp_sensor_data.csv", n_pumps=4_000, fleet_pumps=400, fleet_hours=8_760, n_ticks=200):
+    """Parity with the notebook pipeline, fleet-scale preprocessing timings and streaming tick latency."""
+    from sklearn.preprocessing import MinMaxScaler
+
+    # Parity on the notebook data set
+    df = pd.read_csv(csv)
+    ref = _add_rolling_features_loop(df.copy())
+    fast = add_rolling_features(df)
+    print(f"Rolling features max |diff| vs notebook: {np.abs(fast[FEATURES].to_numpy() - ref[FEATURES].to_numpy()).max():.1e}")
+
+    scaler_X, scaler_y = MinMaxScaler(), MinMaxScaler()
+    fast[FEATURES] = scaler_X.fit_transform(fast[FEATURES])
+    fast["RUL_scaled"] = scaler_y.fit_transform(fast[["RUL"]])
+    X_ref, y_ref = zip(*[_create_sequences_loop(g, FEATURES, "RUL_scaled", LOOKBACK_WINDOW)
+                         for _, g in fast.groupby(GROUP_KEYS)])
+    X, y = WindowedSequences(fast, dtype=np.float64).arrays()
+    print(f"Windows identical to create_sequences: "
+          f"{np.array_equal(X, np.concatenate(X_ref)) and np.array_equal(y, np.concatenate(y_ref))} ({len(X):,} windows)")
+
+    # Fleet-scale preprocessing
+    fleet = make_fleet(fleet_pumps, fleet_hours)
+    sub = fleet[fleet.pump_id <= 10].copy()
+    start = time.perf_counter()
+    _add_rolling_features_loop(sub)
+    t_loop = (time.perf_counter() - start) * fleet_pumps / 10
+    start = time.perf_counter()
+    fleet = add_rolling_features(fleet)
+    t_fast = time.perf_counter() - start
+    print(f"Rolling features, {len(fleet):,} rows ({fleet_pumps} pumps x {fleet_hours:,} h): {t_fast:.2f} s "
+          f"(notebook ~{t_loop:.0f} s)")
+
+    fleet[FEATURES] = scaler_X.fit_transform(fleet[FEATURES])
+    fleet["RUL_scaled"] = scaler_y.fit_transform(fleet[["RUL"]])
+    g = fleet[fleet.pump_id == 1].groupby("cycle_id").get_group(1)
+    start = time.perf_counter()
+    _create_sequences_loop(g, FEATURES, "RUL_scaled", LOOKBACK_WINDOW)
+    per_window = (time.perf_counter() - start) / (len(g) - LOOKBACK_WINDOW)
+    start = time.perf_counter()
+    seq = WindowedSequences(fleet)
+    model = _RidgeWindowModel().fit(seq.batches(8_192))
+    t_epoch = time.perf_counter() - start
+    print(f"{len(seq):,} windows: one streamed pass (index + ridge fit) in {t_epoch:.1f} s, "
+          f"{seq.values.nbytes / 1e6:.0f} MB resident vs {len(seq) * LOOKBACK_WINDOW * len(FEATURES) * 4 / 1e9:.1f} GB "
+          f"for the full tensor; create_sequences ~{per_window * len(seq):.0f} s")
+
+    # Streaming: parity against offline windows for one run-life, then fleet tick latency
+    one = make_fleet(1, 1_400, seed=3)
+    one = one[one.cycle_id == 1]
+    offline = add_rolling_features(one)
+    offline[FEATURES] = scaler_X.transform(offline[FEATURES])
+    offline["RUL_scaled"] = 0.0
+    want = (model.predict(WindowedSequences(offline).arrays()[0])[:, 0] - scaler_y.min_[0]) / scaler_y.scale_[0]
+    scorer = StreamingRULScorer(model, scaler_X, scaler_y, 1)
+    got = np.array([scorer.step(r.amperage, r.vibration, r.motor_temp_f)[0] for r in one.itertuples()])
+    print(f"Streaming vs offline RUL max |diff|: {np.abs(got[LOOKBACK_WINDOW - 1:-1] - want).max():.1e} h")
+
+    rng = np.random.default_rng(1)
+    scorer = StreamingRULScorer(model, scaler_X, scaler_y, n_pumps)
+    ticks = []
+    for _ in range(n_ticks):
+        amp, vib, temp = rng.normal(50, 1, n_pumps), rng.normal(0.5, 0.05, n_pumps), rng.normal(180, 1, n_pumps)
+        start = time.perf_counter()
+        scorer.step(amp, vib, temp)
+        ticks.append(time.perf_counter() - start)
+    ticks = np.array(ticks[LOOKBACK_WINDOW:]) * 1e3
+    print(f"Fleet tick ({n_pumps:,} ESPs, one batched predict): p50 {np.median(ticks):.1f} ms, "
+          f"p99 {np.percentile(ticks, 99):.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
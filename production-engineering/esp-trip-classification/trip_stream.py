@@ -0,0 +1,344 @@
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+SPACY_MODEL = "en_core_web_sm"
+# The lemmatizer only needs tok2vec/tagger/attribute_ruler; is_stop/is_punct/is_alpha are lexical.
+DISABLED_PIPES = ("parser", "ner", "senter")
+
+_WS = re.compile(r"\s+")
+_TRAILING = re.compile(r"[\s.,;:!?]+$")
+
+
+def normalize(text):
+    """
+    Cache key for a comment: lowercased, whitespace collapsed, trailing punctuation dropped.
+
+    The notebook lowercases before spaCy and then drops punctuation and
+    whitespace tokens, so "UL trip." and "ul  trip" clean to the same string.
+    They share one key here and are lemmatized once.
+    """
+    return _TRAILING.sub("", _WS.sub(" ", str(text).lower())).strip()
+
+
+def _clean(doc):
+    """The notebook's token filter on a spaCy Doc."""
+    return " ".join(t.lemma_ for t in doc if not t.is_stop and not t.is_punct and t.is_alpha)
+
+
+# ---------------------------------------------------------------------------
+# Persistent lemma cache
+# ---------------------------------------------------------------------------
+
+class LemmaCache:
+    """
+    Normalized comment -> cleaned lemma string, kept in SQLite with an in-memory front.
+
+    Args:
+        path (str): SQLite file (":memory:" for a throwaway cache).
+        chunk (int): Keys per IN (...) query.
+    """
+
+    def __init__(self, path="trip_lemmas.sqlite", chunk=900):
+        self.path, self.chunk = path, chunk
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS lemmas (key TEXT PRIMARY KEY, clean TEXT NOT NULL)")
+        self._mem = {}
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM lemmas").fetchone()[0]
+
+    def get_many(self, keys):
+        """{key: cleaned} for the keys that are cached (memory first, then SQLite)."""
+        found = {k: self._mem[k] for k in keys if k in self._mem}
+        rest = [k for k in keys if k not in found]
+        for s in range(0, len(rest), self.chunk):
+            part = rest[s:s + self.chunk]
+            rows = self._db.execute(f"SELECT key, clean FROM lemmas WHERE key IN ({','.join('?' * len(part))})", part)
+            found.update(rows)
+        self._mem.update(found)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        items = dict(items)
+        self._mem.update(items)
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO lemmas VALUES (?, ?)", items.items())
+
+    def close(self):
+        self._db.close()
+
+
+# ---------------------------------------------------------------------------
+# Batched, cached lemmatization
+# ---------------------------------------------------------------------------
+
+_NLP = None
+
+
+def _load_nlp(model=SPACY_MODEL):
+    import spacy
+
+    return spacy.load(model, disable=list(DISABLED_PIPES))
+
+
+def _init_worker(model):
+    global _NLP
+    _NLP = _load_nlp(model)
+
+
+def _lemmatize_chunk(args):
+    texts, batch_size = args
+    return [_clean(doc) for doc in _NLP.pipe(texts, batch_size=batch_size)]
+
+
+class TripPreprocessor:
+    """
+    preprocess_text for millions of comments.
+
+    Comments are normalized and de-duplicated, and cached keys skip spaCy
+    entirely. Only unseen keys go through nlp.pipe, with the parser and NER
+    disabled. With n_jobs > 1 the unseen keys are split into chunks and
+    lemmatized in a process pool that lives as long as the preprocessor, so
+    each worker loads spaCy once across all transform() calls. Call close()
+    (or use it as a context manager) to shut the pool down.
+
+    Args:
+        cache (LemmaCache): Persistent cache (a throwaway in-memory one if None).
+        model (str): spaCy model name.
+        batch_size (int): nlp.pipe batch size.
+        n_jobs (int): Worker processes for cache misses.
+        chunk_size (int): Unseen comments per worker task.
+    """
+
+    def __init__(self, cache=None, model=SPACY_MODEL, batch_size=1_000, n_jobs=1, chunk_size=20_000):
+        self.cache = LemmaCache(":memory:") if cache is None else cache
+        self.model, self.batch_size = model, batch_size
+        self.n_jobs, self.chunk_size = n_jobs, chunk_size
+        self._nlp = None
+        self._pool = None
+        self.n_lemmatized = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shut down the worker pool (if one was started)."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _lemmatize(self, texts):
+        tasks = [(texts[s:s + self.chunk_size], self.batch_size) for s in range(0, len(texts), self.chunk_size)]
+        if self.n_jobs == 1 or len(tasks) == 1:
+            if self._nlp is None:
+                self._nlp = _load_nlp(self.model)
+            return [_clean(doc) for doc in self._nlp.pipe(texts, batch_size=self.batch_size)]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.n_jobs, initializer=_init_worker, initargs=(self.model,))
+        return [c for chunk in self._pool.map(_lemmatize_chunk, tasks) for c in chunk]
+
+    def transform(self, comments):
+        """
+        Returns:
+            np.ndarray: Cleaned lemma strings (object dtype), one per comment.
+        """
+        keys, inverse = np.unique(np.array([normalize(c) for c in comments], dtype=object), return_inverse=True)
+        keys = keys.tolist()
+        found = self.cache.get_many(keys)
+        missing = [k for k in keys if k not in found]
+        if missing:
+            cleaned = self._lemmatize(missing)
+            self.cache.put_many(zip(missing, cleaned))
+            found.update(zip(missing, cleaned))
+            self.n_lemmatized += len(missing)
+        return np.array([found[k] for k in keys], dtype=object)[inverse]
+
+
+# ---------------------------------------------------------------------------
+# Stateless vectorizer + incremental classifier
+# ---------------------------------------------------------------------------
+
+class TripClassifier:
+    """
+    HashingVectorizer + SGD linear SVM (hinge loss) trained with partial_fit.
+
+    The vectorizer has no vocabulary to refit, so a daily batch of labelled
+    comments updates the model in place and old data is never revisited.
+    Hashing has no IDF weighting; uni+bi-grams with l2 norm keep the
+    short shorthand phrases separable.
+
+    Args:
+        classes (list): All categories (required up front by partial_fit).
+        n_features (int): Hash space size.
+        preprocessor (TripPreprocessor): Shared cached lemmatizer.
+    """
+
+    def __init__(self, classes, n_features=2 ** 20, ngram_range=(1, 2), alpha=1e-5, preprocessor=None, seed=42):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.linear_model import SGDClassifier
+
+        self.classes = np.asarray(sorted(classes))
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=ngram_range,
+                                            alternate_sign=False, norm="l2")
+        self.clf = SGDClassifier(loss="hinge", alpha=alpha, random_state=seed)
+        self.preprocessor = TripPreprocessor() if preprocessor is None else preprocessor
+
+    def partial_fit(self, comments, labels, epochs=5, seed=0):
+        """Update on one batch (e.g. a day of labelled trips); a few shuffled passes over the batch."""
+        X = self.vectorizer.transform(self.preprocessor.transform(comments))
+        y = np.asarray(labels)
+        rng = np.random.default_rng(seed)
+        for _ in range(epochs):
+            order = rng.permutation(len(y))
+            self.clf.partial_fit(X[order], y[order], classes=self.classes)
+        return self
+
+    def predict(self, comments, chunk_size=100_000):
+        """Categories for raw operator comments, vectorized and scored in chunks."""
+        cleaned = self.preprocessor.transform(comments)
+        return np.concatenate([self.clf.predict(self.vectorizer.transform(cleaned[s:s + chunk_size]))
+                               for s in range(0, len(cleaned), chunk_size)]) if len(cleaned) else np.array([])
+
+
+def classify_stream(classifier, chunks):
+    """
+    Classify an iterable of comment chunks (e.g. CMMS export pages).
+
+    Yields:
+        tuple: (predictions, stats) with stats = {'n', 'seconds', 'comments_per_s', 'lemmatized'}.
+    """
+    for chunk in chunks:
+        before = classifier.preprocessor.n_lemmatized
+        start = time.perf_counter()
+        pred = classifier.predict(chunk)
+        elapsed = time.perf_counter() - start
+        yield pred, {"n": len(chunk), "seconds": elapsed, "comments_per_s": len(chunk) / max(elapsed, 1e-9),
+                     "lemmatized": classifier.preprocessor.n_lemmatized - before}
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def make_comments(df, n, seed=0):
+    """Near-duplicate CMMS-style comments: the labelled phrases with case, spacing, punctuation and well tags varied."""
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(df), n)
+    base = df["Operator_Comment"].to_numpy()[idx]
+    wells = rng.integers(100, 400, n)
+    style = rng.integers(0, 5, n)
+    out = np.empty(n, dtype=object)
+    for i, (text, s, w) in enumerate(zip(base, style, wells)):
+        out[i] = (text, text.upper(), text + ".", f"W-{w} {text}", f"  {text}  - see log {w % 7}")[s]
+    return out, df["Standard_Category"].to_numpy()[idx]
+
+
+def _notebook_preprocess(nlp, texts):
+    """ESP_Trip_Classifier.ipynb: preprocess_text via df.apply, one nlp() call per comment."""
+    def preprocess_text(text):
+        text = text.lower()
+        doc = nlp(text)
+        tokens = [token.lemma_ for token in doc if not token.is_stop and not token.is_punct and token.is_alpha]
+        return " ".join(tokens)
+
+    return pd.Series(texts).apply(preprocess_text).to_numpy()
+
+
+def benchmark(n_history=1_000_000, n_daily=50_000, n_jobs=2, model=SPACY_MODEL):
+    """Parity with preprocess_text, cold/warm throughput, pooled chunks, daily partial_fit and accuracy."""
+    import shutil
+    import tempfile
+
+    import spacy
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.pipeline import Pipeline
+    from sklearn.svm import LinearSVC
+
+    df = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "esp_trip_logs.csv"))
+    history, y_hist = make_comments(df, n_history, seed=0)
+    daily, y_daily = make_comments(df, n_daily, seed=1)
+    workdir = tempfile.mkdtemp()
+    cache_path = os.path.join(workdir, "trip_lemmas.sqlite")
+
+    # 1. Parity and per-comment baseline (full pipeline, one nlp() call per comment)
+    nlp_full = spacy.load(model)
+    sample = history[:5_000]
+    start = time.perf_counter()
+    ref = _notebook_preprocess(nlp_full, sample)
+    t_ref = time.perf_counter() - start
+    ref_rows = _notebook_preprocess(nlp_full, df["Operator_Comment"].to_numpy())
+
+    with TripPreprocessor(LemmaCache(":memory:"), model=model) as pre:
+        rows = pre.transform(df["Operator_Comment"].to_numpy())
+        start = time.perf_counter()
+        got = pre.transform(sample)
+        t_cold = time.perf_counter() - start
+    print(f"Parity with preprocess_text: {np.mean(rows == ref_rows):.1%} of the {len(df)} notebook comments, "
+          f"{np.mean(got == ref):.1%} of {len(sample):,} generated comments")
+    print(f"Notebook df.apply: {len(sample) / t_ref:,.0f} comments/s; cold cache, batched nlp.pipe: "
+          f"{len(sample) / t_cold:,.0f} comments/s")
+
+    # 2. Pooled chunks: same output as the serial path, one pool reused across calls
+    texts = np.array([f"{c} unit {i}" for i, c in enumerate(sample[:2_000])], dtype=object)
+    with TripPreprocessor(LemmaCache(":memory:"), model=model, n_jobs=n_jobs, chunk_size=250) as pooled:
+        first = pooled.transform(texts[:1_000])
+        pool = pooled._pool
+        start = time.perf_counter()
+        second = pooled.transform(texts[1_000:])
+        t_pool = time.perf_counter() - start
+        reused = pool is not None and pooled._pool is pool
+    with TripPreprocessor(LemmaCache(":memory:"), model=model) as serial:
+        same = np.array_equal(np.concatenate([first, second]), serial.transform(texts))
+    print(f"Pool of {n_jobs} workers: output identical to serial {same}, pool reused across calls {reused}, "
+          f"{1_000 / t_pool:,.0f} comments/s on the second call")
+
+    # 3. History + daily incremental training on a persistent cache
+    cache = LemmaCache(cache_path)
+    pre = TripPreprocessor(cache, model=model)
+    clf = TripClassifier(df["Standard_Category"].unique(), preprocessor=pre)
+    start = time.perf_counter()
+    for s in range(0, n_history, 100_000):
+        clf.partial_fit(history[s:s + 100_000], y_hist[s:s + 100_000])
+    t_hist = time.perf_counter() - start
+    print(f"History ({n_history:,} comments, {pre.n_lemmatized:,} distinct keys lemmatized): trained in "
+          f"{t_hist:.1f} s ({n_history / t_hist:,.0f} comments/s)")
+
+    start = time.perf_counter()
+    clf.partial_fit(daily, y_daily)
+    t_day = time.perf_counter() - start
+    print(f"Daily update ({n_daily:,} comments, partial_fit): {t_day:.2f} s")
+    cache.close()
+
+    # 4. Warm cache reopened from disk: classification never reaches spaCy
+    warm = TripClassifier(df["Standard_Category"].unique(),
+                          preprocessor=TripPreprocessor(LemmaCache(cache_path), model=model))
+    warm.clf = clf.clf
+    pages = [daily[s:s + 10_000] for s in range(0, n_daily, 10_000)]
+    stats = [st for _, st in classify_stream(warm, pages)]
+    rate = sum(st["n"] for st in stats) / sum(st["seconds"] for st in stats)
+    print(f"Warm cache reopened from SQLite: {rate:,.0f} comments/s over {len(pages)} pages, "
+          f"{sum(st['lemmatized'] for st in stats)} comments sent to spaCy")
+
+    base = Pipeline([("tfidf", TfidfVectorizer()), ("clf", LinearSVC(random_state=42))])
+    base.fit(ref_rows, df["Standard_Category"])
+    acc_inc = np.mean(warm.predict(daily) == y_daily)
+    acc_ref = np.mean(base.predict(warm.preprocessor.transform(daily)) == y_daily)
+    print(f"Accuracy on the daily batch: incremental {acc_inc:.3f}, notebook TF-IDF + LinearSVC {acc_ref:.3f}")
+    warm.preprocessor.cache.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,383 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+IMG_SIZE = 64
+N_POINTS = 100
+CLASSES = ["Normal", "Fluid Pound", "Gas Interference"]
+
+
+# ---------------------------------------------------------------------------
+# Card store
+# ---------------------------------------------------------------------------
+
+def resample_cards(position, load, counts, n_points=N_POINTS):
+    """
+    Ragged cards (concatenated points, `counts` per card) to fixed length by
+    linear interpolation over the normalized sample index.
+
+    Returns:
+        np.ndarray: (n_cards, n_points, 2) float32, [..., 0] = position, [..., 1] = load.
+    """
+    counts = np.asarray(counts)
+    starts = np.cumsum(counts) - counts
+    u = np.linspace(0, 1, n_points)
+    pos = u[None, :] * (counts[:, None] - 1)                         # fractional sample index per card
+    k = np.minimum(np.floor(pos).astype(np.int64), np.maximum(counts[:, None] - 2, 0))
+    f = np.where(counts[:, None] > 1, pos - k, 0.0)
+    lo = starts[:, None] + k
+    hi = np.minimum(lo + 1, starts[:, None] + counts[:, None] - 1)
+    out = np.empty((len(counts), n_points, 2), dtype=np.float32)
+    for c, v in enumerate((np.asarray(position, float), np.asarray(load, float))):
+        out[..., c] = v[lo] * (1 - f) + v[hi] * f
+    return out
+
+
+def cards_from_frame(df, n_points=None):
+    """
+    Long-format cards (Card_ID, Label, Position, Load, Sequence_Index, one row
+    per point) to fixed-length arrays in one pass. Cards are resampled only
+    when their point counts differ or n_points is given.
+
+    Returns:
+        tuple: (cards (N, n_points, 2) float32, index DataFrame with Card_ID, Label)
+    """
+    df = df.sort_values(["Card_ID", "Sequence_Index"], kind="stable")
+    codes, ids = pd.factorize(df["Card_ID"], sort=False)
+    counts = np.bincount(codes)
+    index = pd.DataFrame({"Card_ID": ids.to_numpy()})
+    if "Label" in df:
+        index["Label"] = df["Label"].to_numpy()[np.cumsum(counts) - counts]
+    if n_points is None and (counts == counts[0]).all():
+        cards = df[["Position", "Load"]].to_numpy(np.float32).reshape(len(counts), counts[0], 2)
+    else:
+        cards = resample_cards(df["Position"].to_numpy(), df["Load"].to_numpy(), counts, n_points or N_POINTS)
+    return cards, index
+
+
+class CardStore:
+    """
+    Append-only on-disk card store.
+
+    A directory with `cards.f32` (raw float32, C-order (N, n_points, 2),
+    read back as a memory map), `index.csv` (Card_ID, Label side table in
+    the same order) and `meta.json` (n_points). Daily controller uploads are
+    appended without rewriting earlier cards.
+
+    Args:
+        path (str): Store directory (created if missing).
+        n_points (int): Points per card (fixed when the store is created).
+    """
+
+    def __init__(self, path, n_points=N_POINTS):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta = os.path.join(path, "meta.json")
+        if os.path.exists(meta):
+            with open(meta) as f:
+                n_points = json.load(f)["n_points"]
+        else:
+            with open(meta, "w") as f:
+                json.dump({"n_points": n_points}, f)
+        self.n_points = n_points
+        self.data_path = os.path.join(path, "cards.f32")
+        self.index_path = os.path.join(path, "index.csv")
+
+    def __len__(self):
+        if not os.path.exists(self.data_path):
+            return 0
+        return os.path.getsize(self.data_path) // (self.n_points * 2 * 4)
+
+    def append(self, cards, index):
+        """Append (N, n_points, 2) cards and their (Card_ID[, Label]) rows."""
+        cards = np.ascontiguousarray(cards, dtype=np.float32)
+        if cards.shape[1:] != (self.n_points, 2):
+            raise ValueError(f"cards must be (N, {self.n_points}, 2), got {cards.shape}")
+        if len(index) != len(cards):
+            raise ValueError("index and cards differ in length")
+        with open(self.data_path, "ab") as f:
+            cards.tofile(f)
+        index.to_csv(self.index_path, mode="a", index=False, header=not os.path.exists(self.index_path))
+
+    @property
+    def cards(self):
+        """Read-only (N, n_points, 2) memory map."""
+        return np.memmap(self.data_path, dtype=np.float32, mode="r", shape=(len(self), self.n_points, 2))
+
+    @property
+    def index(self):
+        return pd.read_csv(self.index_path)
+
+    @classmethod
+    def from_csv(cls, csv, path, n_points=N_POINTS, chunksize=2_000_000):
+        """
+        Convert a long-format card CSV in chunks of rows. Rows of a card must
+        be consecutive (as the generator and controller exports write them);
+        a card split across a chunk boundary is carried to the next chunk.
+        """
+        store = cls(path, n_points)
+        carry = None
+        for chunk in pd.read_csv(csv, chunksize=chunksize):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            last = chunk["Card_ID"].iloc[-1]
+            tail = (chunk["Card_ID"] == last).to_numpy()
+            carry, chunk = chunk[tail], chunk[~tail]
+            if len(chunk):
+                store.append(*cards_from_frame(chunk, n_points))
+        if carry is not None and len(carry):
+            store.append(*cards_from_frame(carry, n_points))
+        return store
+
+
+# ---------------------------------------------------------------------------
+# Rasterization
+# ---------------------------------------------------------------------------
+
+def normalize_cards(cards, img_size=IMG_SIZE):
+    """Per-card min-max scaling of position and load to [0, img_size - 1], as rasterize_card."""
+    cards = np.asarray(cards, dtype=np.float64)
+    lo = cards.min(axis=1, keepdims=True)
+    hi = cards.max(axis=1, keepdims=True)
+    return (cards - lo) / (hi - lo + 1e-5) * (img_size - 1)
+
+
+def rasterize_batch(cards, img_size=IMG_SIZE, mode="lines", antialias=False, closed=True, dtype=np.float32):
+    """
+    Rasterize many cards at once into (N, img_size, img_size, 1) CNN inputs.
+
+    mode='points' sets the pixel of every sample, exactly as the notebook's
+    rasterize_card. mode='lines' draws the connected stroke: each segment is
+    sampled once per pixel along its major axis (DDA), and with
+    antialias=True the minor-axis coordinate is split between the two
+    nearest pixels (Wu), keeping the brightest value where strokes overlap.
+    closed=True also joins the last point to the first.
+    """
+    xy = normalize_cards(cards, img_size)
+    n = len(xy)
+    img = np.zeros((n, img_size * img_size), dtype=dtype)
+    if mode == "points":
+        xi, yi = xy[..., 0].astype(np.int64), xy[..., 1].astype(np.int64)
+        img[np.arange(n)[:, None], (img_size - 1 - yi) * img_size + xi] = 1
+        return img.reshape(n, img_size, img_size, 1)
+    if mode != "lines":
+        raise ValueError(f"unknown mode '{mode}'")
+
+    end = np.roll(xy, -1, axis=1) if closed else xy[:, 1:]
+    start = xy if closed else xy[:, :-1]
+    d = end - start
+    steps = np.maximum(np.ceil(np.abs(d).max(axis=2)), 1).astype(np.int64).ravel()
+    seg = np.repeat(np.arange(len(steps)), steps)
+    t = (np.arange(len(seg)) - np.repeat(np.cumsum(steps) - steps, steps)) / steps[seg]
+    direction = d.reshape(-1, 2)[seg]
+    p = start.reshape(-1, 2)[seg] + t[:, None] * direction
+    card = seg // start.shape[1]
+    if not closed:                                                   # the last point ends the open stroke
+        p = np.vstack([p, xy[:, -1]])
+        direction = np.vstack([direction, np.tile([1.0, 0.0], (n, 1))])
+        card = np.concatenate([card, np.arange(n)])
+
+    base = card * img_size * img_size
+    if not antialias:
+        r = np.rint(p).astype(np.int64)
+        img.ravel()[base + (img_size - 1 - r[:, 1]) * img_size + r[:, 0]] = 1
+        return img.reshape(n, img_size, img_size, 1)
+
+    x_major = np.abs(direction[:, 0]) >= np.abs(direction[:, 1])
+    major = np.where(x_major, p[:, 0], p[:, 1])
+    minor = np.where(x_major, p[:, 1], p[:, 0])
+    m = np.rint(major)
+    lo = np.floor(minor)
+    f = minor - lo
+    hi = np.minimum(lo + 1, img_size - 1)
+    flat, weight = [], []
+    for q, w in ((lo, 1 - f), (hi, f)):
+        x, y = np.where(x_major, m, q), np.where(x_major, q, m)
+        flat.append(base + (img_size - 1 - y.astype(np.int64)) * img_size + x.astype(np.int64))
+        weight.append(w)
+    np.maximum.at(img.ravel(), np.concatenate(flat), np.concatenate(weight).astype(dtype))   # brightest sample wins
+    return img.reshape(n, img_size, img_size, 1)
+
+
+# ---------------------------------------------------------------------------
+# Batched classification
+# ---------------------------------------------------------------------------
+
+def classify_cards(model, cards, classes=CLASSES, batch_size=8_192, predict_batch_size=1_024, **raster_kwargs):
+    """
+    Rasterize and classify cards (array or CardStore memory map) in batches.
+
+    Args:
+        model: Trained Keras CNN (anything with .predict(X, batch_size=..., verbose=0) returning class probabilities).
+        cards: (N, n_points, 2) cards.
+        classes: Class names in model output order (e.g. le.classes_).
+        batch_size (int): Cards rasterized per step (bounds memory).
+        raster_kwargs: rasterize_batch options; must match how the model was trained.
+
+    Returns:
+        pd.DataFrame: predicted label, its probability and per-class probabilities.
+    """
+    probs = []
+    for s in range(0, len(cards), batch_size):
+        X = rasterize_batch(cards[s:s + batch_size], **raster_kwargs)
+        probs.append(np.asarray(model.predict(X, batch_size=predict_batch_size, verbose=0)))
+    probs = np.concatenate(probs) if probs else np.zeros((0, len(classes)))
+    best = probs.argmax(axis=1)
+    out = pd.DataFrame(probs, columns=[f"p_{c}" for c in classes])
+    out.insert(0, "confidence", probs[np.arange(len(best)), best])
+    out.insert(0, "Predicted", np.asarray(classes)[best])
+    return out
+
+
+def classify_store(model, store, classes=CLASSES, **kwargs):
+    """classify_cards over a CardStore, with its Card_ID / Label side table joined."""
+    return pd.concat([store.index, classify_cards(model, store.cards, classes, **kwargs)], axis=1)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def _smooth(load, box_pts):
+    """np.convolve(y, box, mode='same') per row."""
+    pad = np.pad(load, ((0, 0), ((box_pts - 1) // 2, box_pts // 2)))
+    return sliding_window_view(pad, box_pts, axis=1).sum(axis=2) / box_pts
+
+
+def generate_cards(labels, seed=0, n_points=N_POINTS):
+    """
+    Vectorized 01_Data_Generator.py: cards for an array of class names with
+    the generator's noise (U(0.01, 0.03)) and fluid-pound severity (U(0.3, 0.7)).
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+    n = len(labels)
+    t = np.linspace(0, 2 * np.pi, n_points)
+    pos = 0.5 * (1 - np.cos(t))
+    j = np.arange(n_points)
+    half = n_points // 2
+    load = np.zeros((n, n_points))
+
+    normal = np.where(j < half, 0.8 + 0.1 * pos, 0.25 - 0.05 * pos)
+    tw = n_points // 10
+    normal[half - tw:half + tw] = np.linspace(0.9, 0.2, 2 * tw)
+    normal[-tw:] = np.linspace(0.2, 0.8, tw)
+    normal[:tw] = np.linspace(0.2, 0.8, tw)
+    load[labels == "Normal"] = normal
+
+    fp = labels == "Fluid Pound"
+    pound = half + ((n_points // 2) * rng.uniform(0.3, 0.7, fp.sum())).astype(int)
+    k = j[None, :] - pound[:, None]
+    fluid = np.where(j < half, 0.8 + 0.1 * pos, np.where(k < 0, 0.75 - 0.05 * pos, 0.25 - 0.05 * pos))
+    fluid = np.where((k >= 0) & (k < 5), 0.7 + np.clip(k, 0, 4) * (0.25 - 0.7) / 4, fluid)
+    fluid[:, half - 5:half + 5] = np.linspace(0.9, 0.75, 10)
+    fluid[:, -5:] = np.linspace(0.25, 0.8, 5)
+    fluid[:, :5] = np.linspace(0.25, 0.8, 5)
+    load[fp] = fluid
+
+    gas = labels == "Gas Interference"
+    load[gas] = 0.5 * pos + 0.2 + 0.15 * np.sin(t) + 0.02 * np.sin(t * 5)
+
+    load += rng.normal(0, 1, (n, n_points)) * rng.uniform(0.01, 0.03, n)[:, None]
+    load = np.where(gas[:, None], _smooth(load, 5), _smooth(load, 3))
+    return np.stack([np.broadcast_to(pos, load.shape), load], axis=2).astype(np.float32)
+
+
+def _rasterize_card_loop(group, img_size=IMG_SIZE):
+    """The notebook's rasterize_card (reference for parity and timing)."""
+    x = group["Position"].values
+    y = group["Load"].values
+    x_norm = ((x - x.min()) / (x.max() - x.min() + 1e-5) * (img_size - 1)).astype(int)
+    y_norm = ((y - y.min()) / (y.max() - y.min() + 1e-5) * (img_size - 1)).astype(int)
+    img = np.zeros((img_size, img_size))
+    img[img_size - 1 - y_norm, x_norm] = 1
+    return img
+
+
+class _LogisticCNNStandIn:
+    """Logistic regression on raster pixels with a Keras-style predict, for timing without TensorFlow."""
+
+    def __init__(self, X, y):
+        from sklearn.linear_model import LogisticRegression
+        self.clf = LogisticRegression(max_iter=300).fit(X.reshape(len(X), -1), y)
+        self.classes_ = self.clf.classes_
+
+    def predict(self, X, batch_size=None, verbose=0):
+        return self.clf.predict_proba(X.reshape(len(X), -1))
+
+
+def benchmark(n_csv=3_000, n_cards=200_000, store_path=None):
+    """
+    CSV -> store conversion, parity with rasterize_card, raster and classification throughput.
+
+    The n_cards store (~160 MB) goes to a temp dir that is removed afterwards,
+    unless store_path is given (it is then rebuilt from empty and kept).
+    """
+    import shutil
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    labels = np.asarray(CLASSES)[rng.integers(0, 3, n_csv)]
+    cards = generate_cards(labels, seed=1).astype(np.float64)
+    df = pd.DataFrame({
+        "Card_ID": np.repeat([f"{l}_{i}" for i, l in enumerate(labels)], N_POINTS),
+        "Label": np.repeat(labels, N_POINTS),
+        "Position": cards[..., 0].ravel(), "Load": cards[..., 1].ravel(),
+        "Sequence_Index": np.tile(np.arange(N_POINTS), n_csv),
+    })
+
+    tmp = tempfile.mkdtemp()
+    try:
+        csv = os.path.join(tmp, "synthetic_dyno_cards.csv")
+        df.to_csv(csv, index=False)
+        start = time.perf_counter()
+        store = CardStore.from_csv(csv, os.path.join(tmp, "store"), chunksize=70_001)
+        t_conv = time.perf_counter() - start
+        order = store.index["Card_ID"].map({c: i for i, c in enumerate(df["Card_ID"].unique())}).to_numpy()
+        print(f"CSV -> store: {n_csv:,} cards in {t_conv:.2f} s, round trip max |diff| "
+              f"{np.abs(store.cards - cards[order].astype(np.float32)).max():.1e}, "
+              f"{os.path.getsize(store.data_path) / n_csv:.0f} B/card vs {os.path.getsize(csv) / n_csv:.0f} B/card CSV")
+
+        start = time.perf_counter()
+        ref = np.array([_rasterize_card_loop(g) for _, g in df.groupby("Card_ID", sort=False)])
+        t_loop = (time.perf_counter() - start) / n_csv
+        batch = rasterize_batch(cards, mode="points")[..., 0]
+        print(f"mode='points' identical to rasterize_card: {np.array_equal(ref, batch)}")
+    finally:
+        shutil.rmtree(tmp)
+
+    labels = np.asarray(CLASSES)[rng.integers(0, 3, n_cards)]
+    cards = generate_cards(labels, seed=2)
+    for kwargs in ({"mode": "points"}, {"mode": "lines"}, {"mode": "lines", "antialias": True}):
+        start = time.perf_counter()
+        for s in range(0, 20_000, 5_000):
+            img = rasterize_batch(cards[s:s + 5_000], **kwargs)
+        rate = 20_000 / (time.perf_counter() - start)
+        print(f"rasterize {str(kwargs):38s}: {rate:9,.0f} cards/s (notebook loop {1 / t_loop:,.0f} cards/s), "
+              f"{img[..., 0].astype(bool).sum(axis=(1, 2)).mean():.0f} lit pixels/card")
+
+    train = rasterize_batch(cards[:6_000], mode="lines", antialias=True)
+    model = _LogisticCNNStandIn(train, labels[:6_000])
+    workdir = store_path or tempfile.mkdtemp()
+    shutil.rmtree(workdir, ignore_errors=True)     # always start from an empty store
+    try:
+        store = CardStore(workdir)
+        store.append(cards, pd.DataFrame({"Card_ID": [f"C{i:07d}" for i in range(n_cards)], "Label": labels}))
+        start = time.perf_counter()
+        out = classify_store(model, store, model.classes_, mode="lines", antialias=True)
+        rate = len(out) / (time.perf_counter() - start)
+        held_out = out.iloc[6_000:]
+        print(f"classify_store: {len(out):,} cards at {rate:,.0f} cards/s (~{86_400 * rate / 1e6:,.0f}M cards/day); "
+              f"hold-out accuracy of the stand-in model {np.mean(held_out.Predicted == held_out.Label):.3f}")
+    finally:
+        if store_path is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return out
+
+
+if __name__ == "__main__":
+    benchmark()
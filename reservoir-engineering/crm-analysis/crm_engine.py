@@ -0,0 +1,383 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.signal import lfilter
+
+
+def crm_filter(W, decay, q0):
+    """
+    Evaluates the CRMP recursion for many producers as a first-order linear filter.
+
+        q(t) = q(t-1) * decay + (1 - decay) * w(t),   q(0) = q0
+
+    which is the IIR filter b = [1 - decay], a = [1, -decay] with initial
+    state decay * q0 (scipy.signal.lfilter, C loop instead of Python loop).
+
+    Args:
+        W (np.ndarray): Weighted injection X_inj @ gains, shape (n_steps, n_prod).
+        decay (np.ndarray): exp(-dt / tau) per producer, shape (n_prod,).
+        q0 (np.ndarray): Initial rate per producer, shape (n_prod,).
+
+    Returns:
+        np.ndarray: Predicted rates, shape (n_steps, n_prod).
+    """
+    n_steps, n_prod = W.shape
+    Q = np.empty((n_steps, n_prod))
+    Q[0] = q0
+    for j in range(n_prod):
+        a = decay[j]
+        Q[1:, j] = lfilter([1.0 - a], [1.0, -a], W[1:, j], zi=[a * q0[j]])[0]
+    return Q
+
+
+def _reverse_filter(R, decay):
+    """Adjoint of the recursion: mu(t) = r(t) + decay * mu(t+1), run backwards in time."""
+    M = np.empty_like(R)
+    for j in range(R.shape[1]):
+        M[::-1, j] = lfilter([1.0], [1.0, -decay[j]], R[::-1, j])
+    return M
+
+
+def project_capped_columns(G, n_iter=60):
+    """
+    Euclidean projection of every injector column of G (n_prod, n_inj) onto
+    {0 <= f_ij <= 1, sum_j f_ij <= 1}, vectorized over injectors.
+
+    Columns that violate the sum are shifted by a threshold theta found by
+    bisection so that sum(clip(f - theta, 0, 1)) == 1.
+    """
+    P = np.clip(G, 0.0, 1.0)
+    over = P.sum(axis=0) > 1.0
+    if not over.any():
+        return P
+
+    Gc = G[:, over]
+    lo = np.zeros(Gc.shape[1])
+    hi = Gc.max(axis=0)
+    for _ in range(n_iter):
+        theta = 0.5 * (lo + hi)
+        total = np.clip(Gc - theta, 0.0, 1.0).sum(axis=0)
+        lo = np.where(total > 1.0, theta, lo)
+        hi = np.where(total > 1.0, hi, theta)
+    P[:, over] = np.clip(Gc - hi, 0.0, 1.0)
+    return P
+
+
+class _WeightedInjectionCache:
+    """
+    Remembers the last X_inj @ gains.T product so that an overlapping window
+    evaluated at the same gains only computes the rows it does not have yet.
+    """
+
+    def __init__(self):
+        self.key = None
+        self.start = None
+        self.W = None
+
+    def get(self, X_full, G, start, end):
+        key = G.tobytes()
+        if self.key == key and self.W is not None:
+            cached_end = self.start + len(self.W)
+            if self.start <= start < cached_end:
+                reuse = self.W[start - self.start:min(end, cached_end) - self.start]
+                if len(reuse) < end - start:
+                    extra = X_full[start + len(reuse):end] @ G.T
+                    reuse = np.vstack([reuse, extra])
+                self.start, self.W = start, reuse
+                return reuse
+        self.key, self.start, self.W = key, start, X_full[start:end] @ G.T
+        return self.W
+
+    def put(self, G, start, W):
+        self.key, self.start, self.W = G.tobytes(), start, W
+
+
+def _loss_and_grad(tau, G, X, Y, lambda_reg, W=None):
+    """
+    CRMP loss (SSE + L2 on gains, as in CRMRegressor) and its analytic
+    gradient for all producers at once.
+
+    Returns:
+        tuple: (loss per producer, d/dtau (n_prod,), d/dG (n_prod, n_inj), W)
+    """
+    decay = np.exp(-1.0 / tau)
+    if W is None:
+        W = X @ G.T
+    Q = crm_filter(W, decay, Y[0])
+    R = Q - Y
+
+    loss = np.sum(R ** 2, axis=0) + lambda_reg * np.sum(G ** 2, axis=1)
+
+    # Adjoint pass: mu = reverse filter of 2r; dL/dw = (1 - decay) * mu
+    mu = _reverse_filter(2.0 * R[1:], decay)
+    grad_G = ((1.0 - decay) * mu).T @ X[1:] + 2.0 * lambda_reg * G
+
+    # dq(t)/d(decay) obeys the same recursion driven by q(t-1) - w(t)
+    U = Q[:-1] - W[1:]
+    grad_decay = np.sum(U * mu, axis=0)
+    grad_tau = grad_decay * decay / tau ** 2
+    return loss, grad_tau, grad_G, W
+
+
+def _fit_lbfgsb(X, Y, tau0, G0, tau_bounds, lambda_reg, max_iter, W0=None):
+    """
+    Fits a block of producers as one bounded L-BFGS-B problem. The loss is
+    separable, so this is equivalent to independent fits but uses a single
+    vectorized objective and analytic gradient.
+    """
+    n_prod, n_inj = G0.shape
+    scale = float(tau_bounds[1])
+    state = {"W0": W0, "last": (None, None)}
+
+    def objective(x):
+        tau = x[:n_prod] * scale
+        G = x[n_prod:].reshape(n_prod, n_inj)
+        W, state["W0"] = state["W0"], None
+        loss, g_tau, g_G, W = _loss_and_grad(tau, G, X, Y, lambda_reg, W)
+        state["last"] = (x.copy(), W)
+        return loss.sum(), np.concatenate([g_tau * scale, g_G.ravel()])
+
+    x0 = np.concatenate([tau0 / scale, G0.ravel()])
+    bounds = ([(tau_bounds[0] / scale, tau_bounds[1] / scale)] * n_prod
+              + [(0.0, 1.0)] * (n_prod * n_inj))
+    res = minimize(objective, x0, jac=True, method='L-BFGS-B', bounds=bounds,
+                   options={"maxiter": max_iter})
+    # L-BFGS-B normally returns its last evaluated point; keep that X @ G.T for the caller
+    x_last, W = state["last"]
+    W = W if x_last is not None and np.array_equal(x_last, res.x) else None
+    return res.x[:n_prod] * scale, res.x[n_prod:].reshape(n_prod, n_inj), res.success, res.nit, W
+
+
+def _fit_chunk(args):
+    """Process-pool worker for a subset of producers."""
+    return _fit_lbfgsb(*args)
+
+
+def _fit_spg(X, Y, tau0, G0, tau_bounds, lambda_reg, max_iter, W0=None, tol=1e-6, ftol=1e-6, memory=10):
+    """
+    Spectral projected gradient (non-monotone Barzilai-Borwein steps) for the
+    coupled field-wide problem with sum_j f_ij <= 1 for every injector.
+
+    Stops when the projected step is below tol or the objective improved by
+    less than ftol (relative) over the last `memory` iterations.
+    """
+    n_prod, n_inj = G0.shape
+    scale = float(tau_bounds[1])
+    lo, hi = tau_bounds[0] / scale, tau_bounds[1] / scale
+
+    def project(z, G):
+        return np.clip(z, lo, hi), project_capped_columns(G)
+
+    def evaluate(z, G, W=None):
+        loss, g_tau, g_G, W = _loss_and_grad(z * scale, G, X, Y, lambda_reg, W)
+        return loss.sum(), g_tau * scale, g_G, W
+
+    z, G = project(tau0 / scale, G0)
+    f, gz, gG, W = evaluate(z, G, W0 if np.array_equal(G, G0) else None)
+    history = [f]
+    alpha = 1.0 / max(np.abs(np.concatenate([gz, gG.ravel()])).max(), 1e-12)
+    converged, it = False, 0
+
+    for it in range(1, max_iter + 1):
+        # 1. Projected gradient direction
+        pz, pG = project(z - alpha * gz, G - alpha * gG)
+        dz, dG = pz - z, pG - G
+        if max(np.abs(dz).max(), np.abs(dG).max()) < tol:
+            converged = True
+            break
+        slope = np.dot(gz, dz) + np.sum(gG * dG)
+
+        # 2. Non-monotone Armijo backtracking
+        f_ref, step = max(history[-memory:]), 1.0
+        while True:
+            z_new, G_new = z + step * dz, G + step * dG
+            f_new, gz_new, gG_new, W_new = evaluate(z_new, G_new)
+            if f_new <= f_ref + 1e-4 * step * slope or step < 1e-10:
+                break
+            step *= 0.5
+
+        # 3. Barzilai-Borwein step length for the next iteration
+        sz, sG = z_new - z, G_new - G
+        yz, yG = gz_new - gz, gG_new - gG
+        sy = np.dot(sz, yz) + np.sum(sG * yG)
+        ss = np.dot(sz, sz) + np.sum(sG * sG)
+        alpha = np.clip(ss / sy, 1e-12, 1e12) if sy > 0 else 1e12
+
+        z, G, f, gz, gG, W = z_new, G_new, f_new, gz_new, gG_new, W_new
+        history.append(f)
+        if len(history) > memory and min(history[:-memory]) - min(history[-memory:]) <= ftol * abs(f):
+            converged = True
+            break
+
+    return z * scale, G, converged, it, W
+
+
+class FieldCRM:
+    """
+    Field-wide CRMP engine: fits every producer of a waterflood together.
+
+    Compared with looping CRMRegressor over producers this
+      * evaluates the recursion as a linear filter (lfilter) instead of a
+        Python time loop,
+      * uses analytic adjoint gradients w.r.t. tau and all gains,
+      * fits all producers in one vectorized objective, optionally spread
+        over a process pool, or jointly with the field-wide material
+        balance constraint sum_j f_ij <= 1 for each injector,
+      * warm-starts rolling windows from the previous window and reuses the
+        cached X_inj @ gains product on the overlapping rows.
+
+    Attributes:
+        tau_ (np.ndarray): Time constant per producer (n_prod,).
+        gains_ (np.ndarray): Connectivity f_ij (n_prod, n_inj).
+    """
+
+    def __init__(self, tau_bounds=(1, 100), lambda_reg=0.1, field_constraint=False,
+                 n_jobs=1, chunk_size=100, max_iter=500):
+        """
+        Args:
+            tau_bounds (tuple): Min and Max valid days for Tau.
+            lambda_reg (float): L2 Regularization strength (per producer).
+            field_constraint (bool): Enforce sum over producers of f_ij <= 1.
+            n_jobs (int): Worker processes for the unconstrained fit.
+            chunk_size (int): Producers per worker task.
+            max_iter (int): Optimizer iteration cap.
+        """
+        self.tau_bounds = tau_bounds
+        self.lambda_reg = lambda_reg
+        self.field_constraint = field_constraint
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.max_iter = max_iter
+        self.tau_ = None
+        self.gains_ = None
+        self.converged_ = None
+        self._cache = _WeightedInjectionCache()
+
+    def _initial_guess(self, n_prod, n_inj):
+        # Same cold start as CRMRegressor: Tau=10, Gains=Equal split
+        tau0 = np.full(n_prod, np.clip(10.0, *self.tau_bounds))
+        G0 = np.full((n_prod, n_inj), 1.0 / n_inj)
+        if self.field_constraint:
+            G0 /= n_prod
+        return tau0, G0
+
+    def _solve(self, X, Y, tau0, G0, W0=None):
+        if self.field_constraint:
+            tau, G, ok, _, W = _fit_spg(X, Y, tau0, G0, self.tau_bounds, self.lambda_reg,
+                                        self.max_iter, W0)
+            return tau, G, np.full(len(tau), ok), W
+
+        n_prod = Y.shape[1]
+        chunks = [slice(s, s + self.chunk_size) for s in range(0, n_prod, self.chunk_size)]
+        tasks = [(X, Y[:, sl], tau0[sl], G0[sl], self.tau_bounds, self.lambda_reg, self.max_iter,
+                  None if W0 is None else W0[:, sl]) for sl in chunks]
+        if self.n_jobs == 1 or len(tasks) == 1:
+            results = [_fit_chunk(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_jobs) as pool:
+                results = list(pool.map(_fit_chunk, tasks))
+
+        tau = np.concatenate([r[0] for r in results])
+        G = np.vstack([r[1] for r in results])
+        ok = np.concatenate([np.full(r[1].shape[0], r[2]) for r in results])
+        W = np.hstack([X @ r[1].T if r[4] is None else r[4] for r in results])
+        return tau, G, ok, W
+
+    def fit(self, X_inj, Y_prod, warm_start=False):
+        """
+        Args:
+            X_inj (np.ndarray): Injection rates (n_steps, n_inj).
+            Y_prod (np.ndarray): Production rates (n_steps, n_prod).
+            warm_start (bool): Start from the current tau_/gains_ if fitted.
+        """
+        X = np.asarray(X_inj, dtype=float)
+        Y = np.asarray(Y_prod, dtype=float)
+        if Y.ndim == 1:
+            Y = Y[:, None]
+
+        if warm_start and self.tau_ is not None:
+            tau0, G0 = self.tau_, self.gains_
+        else:
+            tau0, G0 = self._initial_guess(Y.shape[1], X.shape[1])
+
+        self.tau_, self.gains_, self.converged_, _ = self._solve(X, Y, tau0, G0)
+        return self
+
+    def predict(self, X_inj, q0=None):
+        if self.tau_ is None:
+            raise ValueError("Model not trained yet.")
+        if q0 is None:
+            q0 = np.zeros(len(self.tau_))  # Default if not provided
+        W = np.asarray(X_inj, dtype=float) @ self.gains_.T
+        return crm_filter(W, np.exp(-1.0 / self.tau_), np.broadcast_to(q0, self.tau_.shape))
+
+    def fit_rolling(self, X_inj, Y_prod, window_size=365, step_size=90):
+        """
+        Rolling-window connectivity for every producer.
+
+        Each window starts from the previous window's solution. The solver
+        hands back the X_inj @ gains product from its final objective
+        evaluation, so the next window's first evaluation only multiplies
+        the step_size new days.
+
+        Returns:
+            list: (start, end, tau, gains) per window.
+        """
+        X = np.asarray(X_inj, dtype=float)
+        Y = np.asarray(Y_prod, dtype=float)
+        if Y.ndim == 1:
+            Y = Y[:, None]
+
+        tau, G = self._initial_guess(Y.shape[1], X.shape[1])
+        windows = []
+        for start in range(0, len(X) - window_size, step_size):
+            end = start + window_size
+            W0 = self._cache.get(X, G, start, end)
+            tau, G, ok, W = self._solve(X[start:end], Y[start:end], tau, G, W0)
+            self._cache.put(G, start, W)
+            windows.append((start, end, tau, G))
+
+        self.tau_, self.gains_, self.converged_ = tau, G, ok
+        return windows
+
+
+def results_frame(tau, gains, inj_cols, prod_cols):
+    """Static results in the notebook layout: index Producer, columns Tau + injectors."""
+    df = pd.DataFrame(gains, index=pd.Index(prod_cols, name='Producer'), columns=inj_cols)
+    df.insert(0, 'Tau', tau)
+    return df
+
+
+def rolling_frame(windows, index, inj_cols, prod_cols):
+    """Long rolling-window table with a (Window_Midpoint, Producer) index."""
+    frames = []
+    for start, end, tau, G in windows:
+        mid = index[start] + (index[end - 1] - index[start]) / 2
+        df = results_frame(tau, G, inj_cols, prod_cols)
+        df.insert(0, 'Window_Midpoint', mid)
+        frames.append(df.reset_index())
+    return pd.concat(frames).set_index(['Window_Midpoint', 'Producer'])
+
+
+if __name__ == "__main__":
+    df = pd.read_csv('production_injection_data_advance.csv', parse_dates=['Date'], index_col='Date')
+    inj_cols = [c for c in df.columns if c.startswith('I')]
+    prod_cols = [c for c in df.columns if c.startswith('P')]
+
+    start = time.perf_counter()
+    model = FieldCRM(tau_bounds=(5, 100), lambda_reg=0.5).fit(df[inj_cols].values, df[prod_cols].values)
+    print(f"Independent fit of {len(prod_cols)} producers: {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    joint = FieldCRM(tau_bounds=(5, 100), lambda_reg=0.5, field_constraint=True)
+    joint.fit(df[inj_cols].values, df[prod_cols].values)
+    print(f"Field-constrained fit: {time.perf_counter() - start:.2f} s "
+          f"(max injector allocation {joint.gains_.sum(axis=0).max():.3f})")
+
+    start = time.perf_counter()
+    windows = FieldCRM(lambda_reg=0.5).fit_rolling(df[inj_cols].values, df[prod_cols].values)
+    print(f"Rolling windows ({len(windows)} x {len(prod_cols)} producers): {time.perf_counter() - start:.2f} s")
+    print(results_frame(model.tau_, model.gains_, inj_cols, prod_cols).head())
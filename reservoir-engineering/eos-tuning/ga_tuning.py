@@ -0,0 +1,298 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from deap import algorithms, base, creator, tools
+
+R_gas = 10.7316  # psi ft3 / (lb-mol R)
+MW = 150  # Assumed Molecular Weight for this synthetic oil
+LB_FT3_TO_KG_M3 = 16.0185
+PENALTY = 1e6  # Density assigned to rows with no real positive root
+
+
+def smallest_positive_root(c2, c1, c0):
+    """
+    Smallest real positive root of Z^3 + c2 Z^2 + c1 Z + c0 = 0 for arrays
+    of coefficients (NaN where none exists).
+
+    Cardano's formula is used where the cubic has one real root and the
+    trigonometric form where it has three, so the whole population x data
+    grid is solved without a per-row np.roots call.
+    """
+    p = c1 - c2 ** 2 / 3.0
+    q = 2.0 * c2 ** 3 / 27.0 - c2 * c1 / 3.0 + c0
+    disc = (q / 2.0) ** 2 + (p / 3.0) ** 3
+    shift = -c2 / 3.0
+
+    # 1. One real root (disc > 0)
+    one = disc > 0
+    sq = np.sqrt(np.where(one, disc, 0.0))
+    single = np.cbrt(-q / 2.0 + sq) + np.cbrt(-q / 2.0 - sq) + shift
+
+    # 2. Three real roots (disc <= 0)
+    m = 2.0 * np.sqrt(np.where(one, 0.0, -p / 3.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        arg = np.where(~one & (p < 0), 3.0 * q / (p * m), 0.0)
+    theta = np.arccos(np.clip(arg, -1.0, 1.0)) / 3.0
+    three = m[..., None] * np.cos(theta[..., None] - 2.0 * np.pi * np.arange(3) / 3.0) + shift[..., None]
+
+    nan = np.full_like(single, np.nan)
+    roots = np.where(one[..., None], np.stack([single, nan, nan], axis=-1), three)
+    with np.errstate(invalid='ignore'):
+        Z = np.where(roots > 0, roots, np.inf).min(axis=-1)
+    return np.where(np.isinf(Z), np.nan, Z)
+
+
+def calculate_pr_density_batch(P, T_F, Pc, Tc_F, omega):
+    """
+    Vectorized version of calculate_pr_density (see 02_Eos_Tuning_Workflow.ipynb).
+
+    Args:
+        P, T_F (np.ndarray): Lab pressures (psia) and temperatures (F), shape (n_rows,).
+        Pc, Tc_F, omega (np.ndarray): Candidate parameters, shape (n_pop,).
+
+    Returns:
+        np.ndarray: Liquid-root density (kg/m3), shape (n_pop, n_rows); NaN on failure.
+    """
+    P = np.asarray(P, dtype=float)[None, :]
+    T = np.asarray(T_F, dtype=float)[None, :] + 459.67
+    Pc = np.asarray(Pc, dtype=float)[:, None]
+    Tc = np.asarray(Tc_F, dtype=float)[:, None] + 459.67
+    omega = np.asarray(omega, dtype=float)[:, None]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        Tr = T / Tc
+        kappa = 0.37464 + 1.54226 * omega - 0.26992 * omega ** 2
+        alpha = (1 + kappa * (1 - np.sqrt(Tr))) ** 2
+
+        a = 0.45724 * (R_gas ** 2 * Tc ** 2) / Pc * alpha
+        b = 0.07780 * (R_gas * Tc) / Pc
+
+        A = (a * P) / (R_gas ** 2 * T ** 2)
+        B = (b * P) / (R_gas * T)
+
+        Z = smallest_positive_root(-(1 - B), A - 3 * B ** 2 - 2 * B, -(A * B - B ** 2 - B ** 3))
+
+        Vm = Z * R_gas * T / P
+        return MW / Vm * LB_FT3_TO_KG_M3
+
+
+def population_rmse(params, P, T_F, rho_exp):
+    """
+    RMSE of every candidate against the full PVT table, with the same
+    penalties as evaluate_eos (1e6 for non-physical Pc/Tc and failed roots).
+
+    Args:
+        params (np.ndarray): (n_pop, 3) array of [Pc, Tc, Omega].
+
+    Returns:
+        np.ndarray: RMSE per candidate, shape (n_pop,).
+    """
+    params = np.asarray(params, dtype=float).reshape(-1, 3)
+    rho = calculate_pr_density_batch(P, T_F, params[:, 0], params[:, 1], params[:, 2])
+    rho = np.where(np.isnan(rho), PENALTY, rho)
+    rmse = np.sqrt(np.mean((rho - np.asarray(rho_exp, dtype=float)[None, :]) ** 2, axis=1))
+    invalid = (params[:, 0] <= 0) | (params[:, 1] <= 0)
+    return np.where(invalid, PENALTY, rmse)
+
+
+def _rmse_chunk(args):
+    params, P, T_F, rho_exp = args
+    return population_rmse(params, P, T_F, rho_exp)
+
+
+class PopulationEvaluator:
+    """
+    Drop-in DEAP evaluation that scores a whole population at once.
+
+    Register both the evaluator and its `map` on the toolbox; eaSimple then
+    hands every generation's invalid individuals to a single vectorized
+    Peng-Robinson pass over the full PVT table:
+
+        evaluator = PopulationEvaluator(df, n_jobs=4)
+        toolbox.register("evaluate", evaluator)
+        toolbox.register("map", evaluator.map)
+
+    Fitness values are memoized per genome, so clones that survive crossover
+    and mutation unchanged are not re-scored. With n_jobs > 1 the unseen
+    genomes are split into chunks and scored in a process pool.
+    """
+
+    def __init__(self, df, p_col='Pressure_psia', t_col='Temperature_F',
+                 rho_col='Exp_Density_kgm3', n_jobs=1, chunk_size=256):
+        self.P = df[p_col].to_numpy(dtype=float)
+        self.T_F = df[t_col].to_numpy(dtype=float)
+        self.rho_exp = df[rho_col].to_numpy(dtype=float)
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.cache = {}
+        self.n_evaluated = 0
+        self.batch_sizes = []  # one entry per batched toolbox.map call
+        self._pool = None
+
+    def __call__(self, individual):
+        """Single-individual fallback with the evaluate_eos signature."""
+        return self.evaluate_many([individual])[0]
+
+    def map(self, func, individuals):
+        """toolbox.map replacement: batches calls to this evaluator, defers anything else to map()."""
+        # toolbox.register wraps the evaluator in a functools.partial
+        if getattr(func, "func", func) is self:
+            individuals = list(individuals)
+            self.batch_sizes.append(len(individuals))
+            return self.evaluate_many(individuals)
+        return list(map(func, individuals))
+
+    def evaluate_many(self, individuals):
+        """Return a list of (rmse,) fitness tuples, scoring only unseen genomes."""
+        keys = [tuple(float(g) for g in ind) for ind in individuals]
+        missing = list(dict.fromkeys(k for k in keys if k not in self.cache))
+        if missing:
+            scores = self._score(np.array(missing))
+            self.cache.update(zip(missing, ((float(s),) for s in scores)))
+            self.n_evaluated += len(missing)
+        return [self.cache[k] for k in keys]
+
+    def _score(self, params):
+        if self.n_jobs == 1 or len(params) <= self.chunk_size:
+            return population_rmse(params, self.P, self.T_F, self.rho_exp)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.n_jobs)
+        tasks = [(params[s:s + self.chunk_size], self.P, self.T_F, self.rho_exp)
+                 for s in range(0, len(params), self.chunk_size)]
+        return np.concatenate(list(self._pool.map(_rmse_chunk, tasks)))
+
+    def close(self):
+        """Shut down the worker pool (if one was started)."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        return state
+
+
+def build_toolbox(evaluate, map_func=map):
+    """The notebook's GA setup (genes, operators, selection) with a pluggable evaluate/map."""
+    if not hasattr(creator, "FitnessMin"):
+        creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
+    if not hasattr(creator, "Individual"):
+        creator.create("Individual", list, fitness=creator.FitnessMin)
+
+    toolbox = base.Toolbox()
+    toolbox.register("attr_pc", np.random.uniform, 300, 1000)
+    toolbox.register("attr_tc", np.random.uniform, 500, 1500)
+    toolbox.register("attr_om", np.random.uniform, 0.01, 1.0)
+    toolbox.register("individual", tools.initCycle, creator.Individual,
+                     (toolbox.attr_pc, toolbox.attr_tc, toolbox.attr_om), n=1)
+    toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+
+    toolbox.register("evaluate", evaluate)
+    toolbox.register("map", map_func)
+    toolbox.register("mate", tools.cxBlend, alpha=0.5)
+    toolbox.register("mutate", tools.mutGaussian, mu=0, sigma=10, indpb=0.2)
+    toolbox.register("select", tools.selTournament, tournsize=3)
+    return toolbox
+
+
+def run_ga(df, pop_size=50, ngen=15, cxpb=0.5, mutpb=0.2, n_jobs=1, seed=None, verbose=False):
+    """
+    Tune [Pc, Tc, Omega] against every row of the PVT table.
+
+    Returns:
+        tuple: (best individual, DEAP logbook, PopulationEvaluator)
+    """
+    if seed is not None:
+        random.seed(seed)  # DEAP operators draw from the random module
+        np.random.seed(seed)
+    with PopulationEvaluator(df, n_jobs=n_jobs) as evaluator:
+        toolbox = build_toolbox(evaluator, evaluator.map)
+        pop = toolbox.population(n=pop_size)
+        hof = tools.HallOfFame(1)
+        stats = tools.Statistics(lambda ind: ind.fitness.values)
+        stats.register("min", np.min)
+        pop, log = algorithms.eaSimple(pop, toolbox, cxpb=cxpb, mutpb=mutpb, ngen=ngen,
+                                       stats=stats, halloffame=hof, verbose=verbose)
+    return hof[0], log, evaluator
+
+
+def benchmark(df, ngen=15, pop_size=50, n_jobs=1, seed=42):
+    """
+    Generations per second of the notebook's per-row evaluate_eos (50-row
+    subsample) vs. the vectorized evaluator on the full table.
+    """
+    def _scalar_density(P, T_F, Pc, Tc_F, omega):
+        # Original notebook path: one np.roots call per row
+        T = T_F + 459.67
+        Tc = Tc_F + 459.67
+        kappa = 0.37464 + 1.54226 * omega - 0.26992 * omega ** 2
+        alpha = (1 + kappa * (1 - np.sqrt(T / Tc))) ** 2
+        a = 0.45724 * (R_gas ** 2 * Tc ** 2) / Pc * alpha
+        b = 0.07780 * (R_gas * Tc) / Pc
+        A = (a * P) / (R_gas ** 2 * T ** 2)
+        B = (b * P) / (R_gas * T)
+        roots = np.roots([1.0, -(1 - B), A - 3 * B ** 2 - 2 * B, -(A * B - B ** 2 - B ** 3)])
+        real_roots = roots[np.isreal(roots)].real
+        real_roots = real_roots[real_roots > 0]
+        if len(real_roots) == 0:
+            return np.nan
+        return MW / (np.min(real_roots) * R_gas * T / P) * LB_FT3_TO_KG_M3
+
+    def evaluate_eos(individual):
+        Pc_curr, Tc_curr, Om_curr = individual
+        if Pc_curr <= 0 or Tc_curr <= 0:
+            return (1e6,)
+        subset = df.sample(n=50, random_state=42)
+        calc = []
+        for _, row in subset.iterrows():
+            rho = _scalar_density(row['Pressure_psia'], row['Temperature_F'], Pc_curr, Tc_curr, Om_curr)
+            calc.append(PENALTY if np.isnan(rho) else rho)
+        return (float(np.sqrt(np.mean((subset['Exp_Density_kgm3'].values - np.array(calc)) ** 2))),)
+
+    # Parity check of the vectorized density on a spread of candidates
+    rng = np.random.default_rng(seed)
+    cand = np.column_stack([rng.uniform(300, 1000, 20), rng.uniform(500, 1500, 20), rng.uniform(0.01, 1.0, 20)])
+    rows = df.iloc[:50]
+    ref = np.array([[_scalar_density(p, t, *c) for p, t in zip(rows['Pressure_psia'], rows['Temperature_F'])] for c in cand])
+    vec = calculate_pr_density_batch(rows['Pressure_psia'], rows['Temperature_F'], cand[:, 0], cand[:, 1], cand[:, 2])
+    max_diff = np.nanmax(np.abs(vec - ref) / ref)
+    print(f"Max relative density difference vs np.roots: {max_diff:.2e} "
+          f"(NaN mismatches: {int((np.isnan(vec) != np.isnan(ref)).sum())})")
+
+    random.seed(seed)
+    np.random.seed(seed)
+    toolbox = build_toolbox(evaluate_eos)
+    pop = toolbox.population(n=pop_size)
+    start = time.perf_counter()
+    algorithms.eaSimple(pop, toolbox, cxpb=0.5, mutpb=0.2, ngen=ngen, verbose=False)
+    loop_rate = ngen / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    best, log, evaluator = run_ga(df, pop_size=pop_size, ngen=ngen, n_jobs=n_jobs, seed=seed)
+    vec_rate = ngen / (time.perf_counter() - start)
+
+    print(f"Notebook evaluate_eos (50-row subsample): {loop_rate:8.1f} generations/s")
+    print(f"PopulationEvaluator (all {len(df)} rows):    {vec_rate:8.1f} generations/s "
+          f"({vec_rate / loop_rate:.0f}x)")
+    print(f"Unique genomes scored: {evaluator.n_evaluated} (cache hits skipped)")
+    print(f"Batched map calls: {len(evaluator.batch_sizes)} for {ngen} generations + initial population "
+          f"(sizes {min(evaluator.batch_sizes)}-{max(evaluator.batch_sizes)})")
+    assert len(evaluator.batch_sizes) == ngen + 1, "evaluation is not batched per generation"
+    print(f"Best: Pc={best[0]:.2f} psia, Tc={best[1]:.2f} F, Omega={best[2]:.4f}, "
+          f"RMSE={best.fitness.values[0]:.3f} kg/m3")
+    return {'loop_gen_per_s': loop_rate, 'vectorized_gen_per_s': vec_rate}
+
+
+if __name__ == "__main__":
+    df = pd.read_csv('pvt_data_synthetic.csv')
+    benchmark(df)
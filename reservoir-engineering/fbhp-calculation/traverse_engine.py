@@ -0,0 +1,353 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+# Flow regime codes returned by beggs_and_brill_gradient
+SEGREGATED, TRANSITION, INTERMITTENT, DISTRIBUTED = 0, 1, 2, 3
+REGIMES = np.array(["Segregated", "Transition", "Intermittent", "Distributed"])
+
+BBL_DAY_TO_CFS = 5.615 / 86400
+
+
+# ---------------------------------------------------------------------------
+# PVT helpers (array versions of the notebook functions, same equations)
+# ---------------------------------------------------------------------------
+
+def calc_z_factor(P, T):
+    """
+    Simplified constant Z-factor for demonstration.
+    In a full production scenario, use Dranchuk-Abou-Kassem correlation.
+    """
+    return np.full(np.shape(P), 0.9)
+
+
+def calc_bg(P, T, z):
+    """
+    Gas Formation Volume Factor (Bg) in bbl/scf, P in psi, T in Rankine.
+    Returns 0 where P == 0.
+    """
+    P = np.asarray(P, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(P == 0, 0.0, 0.005035 * z * T / P)
+
+
+def calc_rs(P, api, sg_gas, T):
+    """
+    Simplified Solution GOR (Rs) using a linear approximation for the showcase.
+    """
+    return 0.03 * P * (10 ** (0.0125 * api))
+
+
+def calc_oil_viscosity(api, temp_f):
+    """
+    Beggs-Robinson Correlation for dead oil viscosity (cp).
+    """
+    return 1.8653e6 * np.power(api, -2.22) * np.power(temp_f, -0.7931)
+
+
+def calc_gas_viscosity(temp_f, sg_gas, rho_g):
+    """
+    Lee, Gonzalez, Eakin correlation (same scaling as the notebook helper).
+    """
+    T_r = temp_f + 460
+    K = (9.4 + 0.02 * T_r ** 1.5) / (209 + T_r + 19 * 28.97 * sg_gas)
+    X = 3.5 + (986 / T_r) + 0.01 * 28.97 * sg_gas
+    Y = 2.4 - 0.2 * X
+    return K * np.exp(X * (rho_g / 62.4) ** Y)
+
+
+def calc_surface_tension(api, temp_f, p_psi):
+    """
+    Baker and Swerdloff correlation for Oil Surface Tension (dyne/cm).
+    """
+    sigma_68 = 39 - 0.2571 * api
+    sigma_100 = 37.5 - 0.2571 * api
+
+    # Temp correction only above 68 F
+    sigma_t = np.where(temp_f > 68, sigma_68 - (temp_f - 68) * (sigma_68 - sigma_100) / 32, sigma_68)
+
+    # Pressure correction (simplified)
+    sigma = sigma_t * (1 - 0.002 * p_psi)
+    return np.maximum(1.0, sigma)  # Minimum 1 dyne/cm
+
+
+# ---------------------------------------------------------------------------
+# Gradient models
+# ---------------------------------------------------------------------------
+
+def beggs_and_brill_gradient(P, T, v_sl, v_sg, rho_l, rho_g, mu_l, mu_g, sigma, d_ft, angle=90):
+    """
+    Vectorized Beggs & Brill dP/dZ with the Payne-Palmer vertical correction.
+
+    Same logic tree as the scalar notebook function, but the flow regime is
+    selected with boolean masks (np.select keeps the if/elif precedence).
+
+    Returns:
+        tuple: (gradient psi/ft, regime code array; see REGIMES)
+    """
+    # 1. Mixture Velocity & Properties
+    v_m = np.maximum(v_sl + v_sg, 1e-12)
+    lambda_l = np.clip(v_sl / v_m, 1e-12, 1.0)  # Input Liquid Content
+    rho_m = rho_l * lambda_l + rho_g * (1 - lambda_l)
+    mu_m = mu_l * lambda_l + mu_g * (1 - lambda_l)
+
+    # 2. Froude Number
+    N_fr = v_m ** 2 / (32.2 * d_ft)
+
+    # 3. Regime boundaries
+    L1 = 316 * lambda_l ** 0.302
+    L2 = 0.0009252 * lambda_l ** -2.4684
+    L3 = 0.1 * lambda_l ** -1.4516
+    L4 = 0.5 * lambda_l ** -6.738
+
+    # 4. Regime masks, evaluated in the scalar if/elif order
+    regime = np.select(
+        [
+            ((lambda_l < 0.01) & (N_fr < L1)) | ((lambda_l >= 0.01) & (N_fr < L2)),
+            (lambda_l >= 0.01) & (L2 <= N_fr) & (N_fr <= L3),
+            ((lambda_l >= 0.01) & (lambda_l < 0.4) & (L3 < N_fr) & (N_fr <= L1))
+            | ((lambda_l >= 0.4) & (L3 < N_fr) & (N_fr <= L4)),
+            ((lambda_l < 0.4) & (N_fr >= L1)) | ((lambda_l >= 0.4) & (N_fr > L4)),
+        ],
+        [SEGREGATED, TRANSITION, INTERMITTENT, DISTRIBUTED],
+        default=SEGREGATED,
+    )
+
+    # 5. Horizontal holdup; Transition uses the Intermittent coefficients
+    coef = np.array([
+        [0.98, 0.4846, 0.0868],    # Segregated
+        [0.845, 0.5351, 0.0173],   # Transition
+        [0.845, 0.5351, 0.0173],   # Intermittent
+        [1.065, 0.5824, 0.0609],   # Distributed
+    ])
+    a, b, c = coef[regime].T
+    H_l0 = a * lambda_l ** b / N_fr ** c
+    H_l0 = np.maximum(np.minimum(H_l0, 1.0), lambda_l)
+
+    # 6. Vertical correction (Payne et al.)
+    correction = np.array([0.924, 0.685, 0.685, 1.0])[regime]
+    H_l = correction * H_l0
+
+    # 7. Friction Factor (smooth pipe) and two-phase ratio
+    N_re = 1488 * rho_m * v_m * d_ft / mu_m
+    f_n = 1 / ((2 * np.log10(N_re / (4.5223 * np.log10(N_re) - 3.8215))) ** 2)
+
+    y = np.maximum(lambda_l / H_l ** 2, 0.001)
+    ln_y = np.log(y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(
+            (y > 1) & (y < 1.2),
+            np.log(np.maximum(2.2 * y - 1.2, 1e-12)),
+            ln_y / (-0.0523 + 3.182 * ln_y - 0.8725 * ln_y ** 2 + 0.01853 * ln_y ** 4),
+        )
+    f_tp = f_n * np.exp(s)
+
+    # 8. Final Gradient (psi/ft)
+    rho_tp = rho_l * H_l + rho_g * (1 - H_l)
+    grad_fric = f_tp * rho_tp * v_m ** 2 / (2 * 32.2 * d_ft)
+    return (rho_tp + grad_fric) / 144, regime
+
+
+def _segment_gradient(p, t, wells, method):
+    """
+    Pressure gradient (psi/ft) of one segment for every well.
+
+    Downhole rates follow the conventions of calculate_pressure_traverse.
+    """
+    z = calc_z_factor(p, t)
+    bg = calc_bg(p, t, z)
+    rs = calc_rs(p, wells["api"], wells["sg_gas"], t)
+    bo = 1.0 + 0.0001 * (p - 14.7)  # Simplified Bo
+
+    qg_free = np.maximum(0, wells["qg"] - wells["qo"] * rs)
+    qo_down = wells["qo"] * bo * BBL_DAY_TO_CFS
+    qw_down = wells["qw"] * BBL_DAY_TO_CFS
+    qg_down = qg_free * bg * (1 / 86400)
+
+    rho_o = 62.4 * 0.8  # approx oil density
+    rho_w = 62.4 * 1.0  # water density
+
+    if method == "no_slip":
+        q_total = qo_down + qw_down + qg_down
+        vm = q_total / wells["area"]
+        lambda_l = (qo_down + qw_down) / q_total
+        rho_mix = lambda_l * rho_o + lambda_l * rho_w + (1 - lambda_l) * 2.0
+        grad_fric = 0.02 * rho_mix * vm ** 2 / (2 * 32.2 * wells["d_ft"])
+        return (rho_mix + grad_fric) / 144, np.full(len(p), -1)
+
+    # Beggs & Brill: real-gas density and mixture liquid properties
+    temp_f = t - 460
+    rho_g = 2.7 * wells["sg_gas"] * p / (z * t)
+    q_liq = np.maximum(qo_down + qw_down, 1e-12)
+    wo = qo_down / q_liq
+    rho_l = wo * rho_o + (1 - wo) * rho_w
+    mu_l = wo * calc_oil_viscosity(wells["api"], temp_f) + (1 - wo) * 1.0
+    mu_g = calc_gas_viscosity(temp_f, wells["sg_gas"], rho_g) * 1e-4  # LGE K is in micropoise
+    sigma = calc_surface_tension(wells["api"], temp_f, p)
+
+    return beggs_and_brill_gradient(
+        p, t, q_liq / wells["area"], qg_down / wells["area"],
+        rho_l, rho_g, mu_l, mu_g, sigma, wells["d_ft"],
+    )
+
+
+def calculate_pressure_traverse_batch(df, n_steps=50, method="no_slip", converge=True,
+                                      tol=0.01, max_iter=20, store_profile=False):
+    """
+    Marches the pressure traverse of every well in `df` simultaneously.
+
+    Each of the n_steps segments is solved for all wells as NumPy arrays.
+    With converge=False the segment properties are evaluated at
+    p + 10 psi exactly like calculate_pressure_traverse; with converge=True
+    the mid-segment pressure is iterated per well until it moves less than
+    `tol` psi (wells that have converged are masked out of later passes).
+
+    Args:
+        df (pd.DataFrame): well_test_data.csv layout.
+        n_steps (int): Number of depth segments.
+        method (str): 'no_slip' (notebook model) or 'beggs_brill'.
+        converge (bool): Iterate the segment pressure to convergence.
+        tol (float): Convergence tolerance on mid-segment pressure (psi).
+        max_iter (int): Iteration cap per segment.
+        store_profile (bool): Keep the full (n_wells, n_steps + 1) profile.
+
+    Returns:
+        dict: 'fbhp' (n_wells,), 'iterations' (max per segment), and when
+              store_profile is set 'depth', 'pressure' and 'regime'.
+    """
+    # 1. Surface conditions and geometry as arrays
+    depth_total = df['Depth_ft'].to_numpy(dtype=float)
+    d_in = df['Tubing_ID_in'].to_numpy(dtype=float)
+    wells = {
+        "qo": df['Qo_bpd'].to_numpy(dtype=float),
+        "qw": df['Qw_bpd'].to_numpy(dtype=float),
+        "qg": df['Qg_mscfd'].to_numpy(dtype=float) * 1000,
+        "api": df['API_gravity'].to_numpy(dtype=float),
+        "sg_gas": df['SG_gas'].to_numpy(dtype=float),
+        "d_ft": d_in / 12,
+        "area": (np.pi / 4) * (d_in / 12) ** 2,
+    }
+    p = df['P_wh_psi'].to_numpy(dtype=float).copy()
+    t = df['T_wh_f'].to_numpy(dtype=float) + 460
+    # Geothermal gradient between wellhead and reservoir temperature
+    temp_grad = (df['T_res_f'].to_numpy(dtype=float) - df['T_wh_f'].to_numpy(dtype=float)) / depth_total
+    dz = depth_total / n_steps
+    n = len(p)
+
+    if store_profile:
+        pressure = np.empty((n, n_steps + 1))
+        regimes = np.empty((n, n_steps), dtype=int)
+        pressure[:, 0] = p
+    iterations = np.zeros(n_steps, dtype=int)
+    dp = np.zeros(n)
+
+    # 2. Integration loop (top-down), all wells per step
+    for i in range(n_steps):
+        t_mid = t + temp_grad * dz / 2
+
+        if not converge:
+            grad, regime = _segment_gradient(p + 10, t_mid, wells, method)
+            dp = grad * dz
+            iterations[i] = 1
+        else:
+            # Start from the previous segment's drop and iterate the mid pressure
+            p_mid = p + (dp / 2 if i else 10)
+            regime = np.empty(n, dtype=int)
+            active = np.arange(n)
+            for it in range(max_iter):
+                sub = {k: v[active] for k, v in wells.items()}
+                grad, reg = _segment_gradient(p_mid[active], t_mid[active], sub, method)
+                dp[active] = grad * dz[active]
+                regime[active] = reg
+                p_new = p[active] + dp[active] / 2
+                done = np.abs(p_new - p_mid[active]) < tol
+                p_mid[active] = p_new
+                active = active[~done]
+                if active.size == 0:
+                    break
+            iterations[i] = it + 1
+
+        p = p + dp
+        t = t + temp_grad * dz
+        if store_profile:
+            pressure[:, i + 1] = p
+            regimes[:, i] = regime
+
+    result = {"fbhp": p, "iterations": iterations}
+    if store_profile:
+        result["depth"] = dz[:, None] * np.arange(n_steps + 1)[None, :]
+        result["pressure"] = pressure
+        result["regime"] = regimes
+    return result
+
+
+def _apply_traverse(row, n_steps=50):
+    """
+    Scalar reference for benchmarking: the notebook's calculate_pressure_traverse
+    loop (with the T_res - T_wh geothermal gradient used by the batch engine).
+    """
+    depth_total = row['Depth_ft']
+    p_current = row['P_wh_psi']
+    t_current = row['T_wh_f'] + 460
+    d_in = row['Tubing_ID_in']
+    area_sqft = (np.pi / 4) * (d_in / 12) ** 2
+    qo, qg, qw = row['Qo_bpd'], row['Qg_mscfd'] * 1000, row['Qw_bpd']
+    temp_grad = (row['T_res_f'] - row['T_wh_f']) / depth_total
+    dz = depth_total / n_steps
+
+    for _ in range(n_steps):
+        t_mid = t_current + (temp_grad * dz / 2)
+        p_guess = p_current + 10
+        bg = 0.005035 * 0.9 * t_mid / p_guess
+        rs = 0.03 * p_guess * (10 ** (0.0125 * row['API_gravity']))
+        bo = 1.0 + 0.0001 * (p_guess - 14.7)
+        qg_free = max(0, qg - qo * rs)
+        qo_down = qo * bo * BBL_DAY_TO_CFS
+        qw_down = qw * BBL_DAY_TO_CFS
+        qg_down = qg_free * bg * (1 / 86400)
+        q_total = qo_down + qw_down + qg_down
+        vm = q_total / area_sqft
+        lambda_l = (qo_down + qw_down) / q_total
+        rho_mix = (lambda_l * 62.4 * 0.8) + (lambda_l * 62.4) + ((1 - lambda_l) * 2.0)
+        grad_fric = (0.02 * rho_mix * vm ** 2) / (2 * 32.2 * (d_in / 12))
+        p_current += (rho_mix + grad_fric) / 144 * dz
+        t_current += temp_grad * dz
+    return p_current
+
+
+def benchmark(df, n_wells=8000, n_apply=500):
+    """
+    Wells-per-second of the row-wise df.apply path vs. the batch engine.
+
+    The fleet is built by resampling `df` up to n_wells rows; the apply path
+    is timed on the first n_apply wells and extrapolated.
+
+    Returns:
+        dict: Throughput figures and the max |FBHP| difference vs. apply.
+    """
+    fleet = df.sample(n=n_wells, replace=True, random_state=0).reset_index(drop=True)
+    stats = {}
+
+    start = time.perf_counter()
+    ref = fleet.iloc[:n_apply].apply(_apply_traverse, axis=1).to_numpy()
+    stats["apply_wells_per_s"] = n_apply / (time.perf_counter() - start)
+
+    for label, kwargs in [
+        ("batch_no_slip", dict(method="no_slip", converge=False)),
+        ("batch_no_slip_converged", dict(method="no_slip", converge=True)),
+        ("batch_beggs_brill_converged", dict(method="beggs_brill", converge=True)),
+    ]:
+        start = time.perf_counter()
+        out = calculate_pressure_traverse_batch(fleet, **kwargs)
+        stats[f"{label}_wells_per_s"] = n_wells / (time.perf_counter() - start)
+        if label == "batch_no_slip":
+            stats["max_abs_diff_vs_apply_psi"] = np.abs(out["fbhp"][:n_apply] - ref).max()
+
+    return stats
+
+
+if __name__ == "__main__":
+    df = pd.read_csv('well_test_data.csv')
+    for key, value in benchmark(df).items():
+        print(f"{key:>40s}: {value:,.3f}")
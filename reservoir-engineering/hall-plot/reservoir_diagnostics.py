@@ -132,4 +132,357 @@ class ReservoirDiagnostics:
         ax.legend()
         
         plt.tight_layout()
-        plt.show()
\ No newline at end of file
+        plt.show()
+
+
+def _savgol_operator(window_length, poly_order):
+    """
+    (window x window) matrix M such that savgol_filter(x) equals, for a
+    series of at least window_length points:
+        interior points -> M[half] . x[i-half : i+half+1]
+        first half      -> M[:half] @ x[:window]
+        last half       -> M[half+1:] @ x[-window:]
+    """
+    return savgol_filter(np.eye(window_length), window_length, poly_order, axis=0)
+
+
+def _effective_window(n, window_length):
+    """Window rule of ReservoirDiagnostics._calculate_wor_derivative for a well with n rows."""
+    n = np.asarray(n)
+    short = np.where(n % 2 != 0, n, n - 1)
+    return np.where(n < window_length, np.maximum(short, 3), window_length)
+
+
+def _segmented_savgol(values, starts, lengths, window_length, poly_order):
+    """
+    savgol_filter applied independently to many concatenated segments that all
+    use the same window (every segment must be longer than the window).
+    """
+    M = _savgol_operator(window_length, poly_order)
+    half = window_length // 2
+    out = np.correlate(values, M[half], mode='same')
+
+    ends = starts + lengths
+    k = np.arange(window_length)
+    head = values[starts[:, None] + k] @ M[:half].T
+    tail = values[ends[:, None] - window_length + k] @ M[half + 1:].T
+    out[starts[:, None] + np.arange(half)] = head
+    out[ends[:, None] - half + np.arange(half)] = tail
+    return out
+
+
+def _window_slopes(x, y):
+    """Least-squares slope of y on x along the last axis (rows are windows)."""
+    dx = x - x.mean(axis=-1, keepdims=True)
+    dy = y - y.mean(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (dx * dy).sum(axis=-1) / (dx * dx).sum(axis=-1)
+
+
+class FleetDiagnostics:
+    """
+    Chan and Hall surveillance for many wells at once, without plotting.
+
+    `fit` ingests long-format production and injection tables (one row per
+    well per date) and computes, grouped and vectorized:
+        * Chan WOR derivatives (raw and Savitzky-Golay smoothed), identical
+          to ReservoirDiagnostics._calculate_wor_derivative per well.
+        * Hall cumulative injection and pressure-time integrals, the baseline
+          slope (first `baseline_points` records, as in plot_hall) and a
+          sliding-window slope over the last `slope_window` records.
+        * Slope-break flags: 'Plugging' when the sliding slope exceeds the
+          baseline by more than `break_threshold`, 'Fracturing' when it falls
+          below it by more than that, otherwise 'Normal'.
+
+    `update` then appends new daily records and advances running sums and
+    fixed-size per-well buffers, so each day costs O(n_wells x window)
+    instead of a recompute over the whole history.
+    """
+
+    STATUS = np.array(['Insufficient Data', 'Normal', 'Plugging', 'Fracturing'], dtype=object)
+
+    def __init__(self, window_length=5, poly_order=2, baseline_points=4,
+                 slope_window=30, break_threshold=0.25, well_col='Well', date_col='Date'):
+        self.window_length = window_length
+        self.poly_order = poly_order
+        self.baseline_points = baseline_points
+        self.slope_window = slope_window
+        self.break_threshold = break_threshold
+        self.well_col = well_col
+        self.date_col = date_col
+        self.chan = None
+        self.hall = None
+        self._prod_state = None
+        self._inj_state = None
+
+    @staticmethod
+    def _read(data):
+        return pd.read_csv(data) if isinstance(data, str) else data.copy()
+
+    @staticmethod
+    def _groups(wells):
+        """Segment starts/lengths of a table already sorted by well."""
+        codes, uniques = pd.factorize(wells, sort=False)
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        lengths = np.diff(np.r_[starts, codes.size])
+        local = np.arange(codes.size) - np.repeat(starts, lengths)
+        return codes, uniques, starts, lengths, local
+
+    # ------------------------------------------------------------------
+    # Batch
+    # ------------------------------------------------------------------
+    def fit(self, production=None, injection=None):
+        """Ingest long-format tables (DataFrames or CSV paths) and compute every well."""
+        if production is not None:
+            self.chan = self._fit_chan(self._read(production))
+        if injection is not None:
+            self.hall = self._fit_hall(self._read(injection))
+        return self
+
+    def _fit_chan(self, df):
+        df = df.sort_values([self.well_col, 'Cumulative_Oil_bbl'], kind='stable').reset_index(drop=True)
+        codes, wells, starts, lengths, local = self._groups(df[self.well_col].to_numpy())
+        n_p = df['Cumulative_Oil_bbl'].to_numpy(dtype=float)
+        wor = df['Water_Oil_Ratio'].to_numpy(dtype=float)
+
+        # 1. Finite difference within each well
+        d_np = np.diff(n_p, prepend=np.nan)
+        d_np[d_np == 0] = 1e-6
+        raw = np.diff(wor, prepend=np.nan) / d_np
+        raw[local == 0] = np.nan
+
+        # 2. Savitzky-Golay per well on the valid points, batched by effective window
+        smooth = raw.copy()
+        eff = _effective_window(lengths, self.window_length)
+        smoothable = (lengths - 1) > eff
+        for w in np.unique(eff[smoothable]):
+            sel = np.flatnonzero(smoothable & (eff == w))
+            rows = np.flatnonzero(np.isin(codes, sel) & (local > 0))
+            seg_len = lengths[sel] - 1
+            seg_start = np.r_[0, np.cumsum(seg_len)[:-1]]
+            smooth[rows] = _segmented_savgol(raw[rows], seg_start, seg_len, int(w), self.poly_order)
+
+        df['WOR_Derivative'] = raw
+        df['WOR_Derivative_Smooth'] = smooth
+        self._prod_state = self._init_prod_state(wells, starts, lengths, n_p, wor, raw)
+        return df
+
+    def _fit_hall(self, df):
+        df = df.sort_values([self.well_col, self.date_col], kind='stable').reset_index(drop=True)
+        codes, wells, starts, lengths, local = self._groups(df[self.well_col].to_numpy())
+        grouped = df.groupby(codes, sort=False)
+        df['Wi'] = grouped['Daily_Injection_Rate_bbl'].cumsum()
+        df['P_dt'] = grouped['Injection_Pressure_psi'].cumsum()  # Assuming dt=1 day
+        x = df['Wi'].to_numpy(dtype=float)
+        y = df['P_dt'].to_numpy(dtype=float)
+
+        # Baseline: least squares on the first `baseline_points` records of each well
+        B = self.baseline_points
+        base = local < B
+        cnt = np.bincount(codes[base], minlength=len(wells))
+        mx = np.bincount(codes[base], x[base], len(wells)) / np.maximum(cnt, 1)
+        my = np.bincount(codes[base], y[base], len(wells)) / np.maximum(cnt, 1)
+        dx, dy = x[base] - mx[codes[base]], y[base] - my[codes[base]]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope0 = np.bincount(codes[base], dx * dy, len(wells)) / np.bincount(codes[base], dx * dx, len(wells))
+        slope0 = np.where(lengths > B, slope0, np.nan)
+        intercept0 = my - slope0 * mx
+
+        # Sliding slope over the last `slope_window` records (windows never cross wells)
+        W = self.slope_window
+        rolling = np.full(x.size, np.nan)
+        rows = np.flatnonzero(local >= W - 1)
+        for chunk in np.array_split(rows, max(1, rows.size // 100_000)):
+            idx = chunk[:, None] - (W - 1) + np.arange(W)
+            rolling[chunk] = _window_slopes(x[idx], y[idx])
+
+        df['Baseline_Slope'] = slope0[codes]
+        df['Baseline_P_dt'] = intercept0[codes] + slope0[codes] * x
+        df['Rolling_Slope'] = rolling
+        df['Slope_Ratio'] = rolling / slope0[codes]
+        df['Status'] = self._status(df['Slope_Ratio'].to_numpy())
+        self._inj_state = self._init_inj_state(wells, starts, lengths, x, y, slope0, intercept0, rolling)
+        return df
+
+    def _status(self, ratio):
+        code = np.select([np.isnan(ratio), ratio > 1 + self.break_threshold,
+                          ratio < 1 - self.break_threshold], [0, 2, 3], 1)
+        return self.STATUS[code]
+
+    # ------------------------------------------------------------------
+    # Incremental state
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _tail(values, starts, lengths, size):
+        """Last `size` values of every well, left-padded with NaN -> (n_wells, size)."""
+        k = np.arange(size) - size
+        idx = (starts + lengths)[:, None] + k
+        valid = k >= -lengths[:, None]
+        return np.where(valid, values[np.clip(idx, 0, None)], np.nan)
+
+    def _init_prod_state(self, wells, starts, lengths, n_p, wor, raw):
+        last = starts + lengths - 1
+        return {
+            'index': {w: i for i, w in enumerate(wells)},
+            'count': lengths.copy(),
+            'last_np': n_p[last].copy(),
+            'last_wor': wor[last].copy(),
+            'raw_buffer': self._tail(raw, starts, lengths, self.window_length),
+        }
+
+    def _init_inj_state(self, wells, starts, lengths, x, y, slope0, intercept0, rolling):
+        last = starts + lengths - 1
+        B = self.baseline_points
+        first = starts[:, None] + np.arange(B)
+        in_well = np.arange(B) < lengths[:, None]
+        return {
+            'index': {w: i for i, w in enumerate(wells)},
+            'count': lengths.copy(),
+            'wi': x[last].copy(),
+            'p_dt': y[last].copy(),
+            'base_x': np.where(in_well, x[np.minimum(first, x.size - 1)], np.nan),
+            'base_y': np.where(in_well, y[np.minimum(first, y.size - 1)], np.nan),
+            'slope0': slope0.copy(),
+            'intercept0': intercept0.copy(),
+            'x_buffer': self._tail(x, starts, lengths, self.slope_window),
+            'y_buffer': self._tail(y, starts, lengths, self.slope_window),
+            'rolling': rolling[last].copy(),
+        }
+
+    @staticmethod
+    def _rows(state, wells, defaults):
+        """Row index of each well in the state, adding unseen wells."""
+        index = state['index']
+        new = [w for w in dict.fromkeys(wells) if w not in index]
+        if new:
+            for w in new:
+                index[w] = len(index)
+            for key, fill in defaults.items():
+                arr = state[key]
+                pad = np.full((len(new),) + arr.shape[1:], fill, dtype=arr.dtype)
+                state[key] = np.concatenate([arr, pad])
+        return np.array([index[w] for w in wells], dtype=int)
+
+    @staticmethod
+    def _push(buffer, rows, values):
+        buffer[rows] = np.roll(buffer[rows], -1, axis=1)
+        buffer[rows, -1] = values
+
+    def update(self, production=None, injection=None):
+        """
+        Stream new daily records (long format; several days per well are
+        processed in date order). Returns the updated rows.
+
+        Returns:
+            dict: {'chan': DataFrame, 'hall': DataFrame} for the new records.
+        """
+        out = {}
+        if production is not None:
+            out['chan'] = self._rounds(self._read(production), 'Cumulative_Oil_bbl', self._update_chan)
+        if injection is not None:
+            out['hall'] = self._rounds(self._read(injection), self.date_col, self._update_hall)
+        return out
+
+    def _rounds(self, df, order_col, step):
+        # k-th new record of every well goes in round k, so each round is fully vectorized
+        df = df.sort_values([self.well_col, order_col], kind='stable').reset_index(drop=True)
+        rounds = df.groupby(self.well_col, sort=False).cumcount().to_numpy()
+        results = [step(df[rounds == k].copy()) for k in range(rounds.max() + 1)] if len(df) else []
+        return pd.concat(results).sort_index() if results else df
+
+    def _update_chan(self, new):
+        if self._prod_state is None:
+            self._prod_state = self._init_prod_state(np.array([]), np.array([], dtype=int), np.array([], dtype=int),
+                                                     np.array([]), np.array([]), np.array([]))
+        s = self._prod_state
+        rows = self._rows(s, new[self.well_col].tolist(),
+                          {'count': 0, 'last_np': np.nan, 'last_wor': np.nan, 'raw_buffer': np.nan})
+        n_p = new['Cumulative_Oil_bbl'].to_numpy(dtype=float)
+        wor = new['Water_Oil_Ratio'].to_numpy(dtype=float)
+
+        d_np = n_p - s['last_np'][rows]
+        d_np[d_np == 0] = 1e-6
+        raw = (wor - s['last_wor'][rows]) / d_np      # NaN for a well's first record
+        s['count'][rows] += 1
+        s['last_np'][rows], s['last_wor'][rows] = n_p, wor
+        self._push(s['raw_buffer'], rows, raw)
+
+        # Newest point of the full-history filter = end-edge row of the SG operator
+        # (valid once the well has more derivative points than the window)
+        smooth = raw.copy()
+        ready = (s['count'][rows] - 1) > self.window_length
+        if ready.any():
+            M = _savgol_operator(self.window_length, self.poly_order)
+            smooth[ready] = s['raw_buffer'][rows[ready]] @ M[-1]
+
+        new['WOR_Derivative'] = raw
+        new['WOR_Derivative_Smooth'] = smooth
+        return new
+
+    def _update_hall(self, new):
+        if self._inj_state is None:
+            empty = np.array([])
+            self._inj_state = self._init_inj_state(empty, np.array([], dtype=int), np.array([], dtype=int),
+                                                   empty, empty, empty, empty, empty)
+        s = self._inj_state
+        rows = self._rows(s, new[self.well_col].tolist(),
+                          {'count': 0, 'wi': 0.0, 'p_dt': 0.0, 'base_x': np.nan, 'base_y': np.nan,
+                           'slope0': np.nan, 'intercept0': np.nan, 'x_buffer': np.nan,
+                           'y_buffer': np.nan, 'rolling': np.nan})
+
+        # Running cumulative sums
+        s['wi'][rows] += new['Daily_Injection_Rate_bbl'].to_numpy(dtype=float)
+        s['p_dt'][rows] += new['Injection_Pressure_psi'].to_numpy(dtype=float)
+        x, y = s['wi'][rows], s['p_dt'][rows]
+        count = s['count'][rows]
+        s['count'][rows] += 1
+
+        # Baseline points are kept until the well has more than `baseline_points` records
+        B = self.baseline_points
+        fill = count < B
+        s['base_x'][rows[fill], count[fill]] = x[fill]
+        s['base_y'][rows[fill], count[fill]] = y[fill]
+        fit = count == B
+        if fit.any():
+            bx, by = s['base_x'][rows[fit]], s['base_y'][rows[fit]]
+            slope0 = _window_slopes(bx, by)
+            s['slope0'][rows[fit]] = slope0
+            s['intercept0'][rows[fit]] = by.mean(axis=1) - slope0 * bx.mean(axis=1)
+
+        # Sliding window
+        self._push(s['x_buffer'], rows, x)
+        self._push(s['y_buffer'], rows, y)
+        full = count + 1 >= self.slope_window
+        rolling = np.full(len(rows), np.nan)
+        if full.any():
+            rolling[full] = _window_slopes(s['x_buffer'][rows[full]], s['y_buffer'][rows[full]])
+        s['rolling'][rows] = rolling
+
+        slope0 = s['slope0'][rows]
+        new['Wi'] = x
+        new['P_dt'] = y
+        new['Baseline_Slope'] = slope0
+        new['Baseline_P_dt'] = s['intercept0'][rows] + slope0 * x
+        new['Rolling_Slope'] = rolling
+        new['Slope_Ratio'] = rolling / slope0
+        new['Status'] = self._status(new['Slope_Ratio'].to_numpy())
+        return new
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def hall_summary(self):
+        """Latest Hall state per injector (cumulatives, slopes, break flag)."""
+        s = self._inj_state
+        wells = sorted(s['index'], key=s['index'].get)
+        ratio = s['rolling'] / s['slope0']
+        return pd.DataFrame({
+            self.well_col: wells, 'Records': s['count'], 'Wi': s['wi'], 'P_dt': s['p_dt'],
+            'Baseline_Slope': s['slope0'], 'Rolling_Slope': s['rolling'],
+            'Slope_Ratio': ratio, 'Status': self._status(ratio),
+        })
+
+    def slope_breaks(self):
+        """Injectors currently flagged with a Hall slope break."""
+        summary = self.hall_summary()
+        return summary[summary['Status'].isin(['Plugging', 'Fracturing'])].reset_index(drop=True)
@@ -0,0 +1,478 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import lasio
+import numpy as np
+import pandas as pd
+
+ALIAS_MAP = {
+    'GR': ['GR', 'GAMMA', 'G.R.', 'GAMMA_RAY'],
+    'NPHI': ['NPHI', 'NEUT', 'NPHI_V1'],
+    'RHOB': ['RHOB', 'DENS', 'RHOB_FINAL']
+}
+
+MANIFEST = 'manifest.json'
+DEPTH = 'DEPT'
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-1 of the file contents (read in blocks)."""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def resolve_aliases(mnemonics, alias_map):
+    """
+    Map raw curve mnemonics to standard keys.
+
+    For each standard key the first alias (in alias_map order) present in the
+    file wins, matching welly's alias behaviour. Mnemonics that are not
+    mapped are left out of the result.
+
+    Returns:
+        dict: {raw mnemonic: standard key}
+    """
+    present = set(mnemonics)
+    mapping = {}
+    for key, aliases in alias_map.items():
+        for alias in aliases:
+            if alias in present and alias not in mapping:
+                mapping[alias] = key
+                break
+    return mapping
+
+
+def _partition_name(well, source):
+    """
+    Filesystem-safe partition directory for one source file: the well name plus a
+    hash of the source path, so several runs of a well never share a directory.
+    """
+    name = re.sub(r'[^A-Za-z0-9_.-]+', '_', well).strip('._') or 'UNNAMED'
+    return f"{name}-{hashlib.sha1(os.path.abspath(source).encode()).hexdigest()[:10]}"
+
+
+def _mnemonic(curve):
+    """
+    Curve mnemonic, repairing dotted names that the LAS header split on the
+    first period (e.g. 'G.R.      .API' is parsed as mnemonic 'G', unit 'R',
+    value '.API').
+    """
+    if isinstance(curve.value, str) and curve.value.startswith('.') and curve.unit:
+        return f"{curve.mnemonic}.{curve.unit}."
+    return curve.mnemonic
+
+
+def _well_name(las, path):
+    for key in ('WELL', 'UWI'):
+        if key in las.well and str(las.well[key].value).strip():
+            return str(las.well[key].value).strip()
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _ingest_file(args):
+    """
+    Worker: parse one LAS file, normalize its curves and write its partition.
+
+    Returns the manifest entry, None if the content hash is unchanged, or an
+    entry with an 'error' field if the file could not be parsed.
+    """
+    path, root, alias_map, keep_unmapped, dtype, known_hash = args
+    digest = file_hash(path)
+    if digest == known_hash:
+        return None
+    stat = os.stat(path)
+    try:
+        return _write_partition(path, root, alias_map, keep_unmapped, dtype, digest, stat)
+    except Exception as exc:  # one bad file must not abort the whole ingest
+        return {'source': os.path.abspath(path), 'hash': digest, 'size': stat.st_size,
+                'mtime': stat.st_mtime, 'error': f"{type(exc).__name__}: {exc}"}
+
+
+def _write_partition(path, root, alias_map, keep_unmapped, dtype, digest, stat):
+    las = lasio.read(path)
+    well = _well_name(las, path)
+    mnemonics = [_mnemonic(c) for c in las.curves]
+    mapping = resolve_aliases(mnemonics[1:], alias_map)
+
+    depth = np.asarray(las.index, dtype=float)
+    order = np.argsort(depth, kind='stable')
+    curves = {}
+    for mnem, curve in zip(mnemonics[1:], las.curves[1:]):
+        name = mapping.get(mnem, mnem if keep_unmapped else None)
+        if name is None or name in curves or name == DEPTH:
+            continue
+        curves[name] = np.asarray(curve.data, dtype=dtype)[order]
+
+    # Write to a scratch directory and swap it in, so readers never see a half-written well
+    partition = _partition_name(well, path)
+    final_dir = os.path.join(root, 'wells', partition)
+    tmp_dir = f"{final_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        np.save(os.path.join(tmp_dir, f'{DEPTH}.npy'), depth[order])
+        for name, values in curves.items():
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), values)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    shutil.rmtree(final_dir, ignore_errors=True)
+    os.replace(tmp_dir, final_dir)
+
+    return {
+        'source': os.path.abspath(path),
+        'hash': digest,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'well': well,
+        'partition': partition,
+        'curves': sorted(curves),
+        'raw_curves': {m: mapping.get(m, m) for m in mnemonics[1:]},
+        'n_samples': int(depth.size),
+        'top': float(depth[order][0]) if depth.size else None,
+        'base': float(depth[order][-1]) if depth.size else None,
+    }
+
+
+class LogStore:
+    """
+    Partitioned, memory-mapped well-log store.
+
+    Layout (one partition per source file, one .npy array per curve):
+
+        root/
+            manifest.json                source file -> hash, well, curves, depth range (or parse error)
+            wells/<WELL>-<src hash>/DEPT.npy
+            wells/<WELL>-<src hash>/GR.npy
+            ...
+
+    A well logged in several runs (several LAS files with the same WELL) has
+    one partition per run; reads merge the runs by depth. Curves are opened
+    with np.load(mmap_mode='r'), so reading a depth window for a few wells
+    only touches the pages it needs.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(os.path.join(root, 'wells'), exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+    def _load_manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, path)
+
+    def _ingested(self):
+        return [entry for entry in self.manifest.values() if 'error' not in entry]
+
+    @property
+    def wells(self):
+        """Sorted list of well names in the store."""
+        return sorted({entry['well'] for entry in self._ingested()})
+
+    def _runs(self, well):
+        """Manifest entries of every run of a well, shallowest first."""
+        runs = [entry for entry in self._ingested() if entry['well'] == well]
+        if not runs:
+            raise KeyError(f"Well '{well}' is not in the store")
+        return sorted(runs, key=lambda e: (e['top'] is None, e['top'], e['source']))
+
+    def curves(self, well):
+        """Curve names stored for a well (union over its runs)."""
+        return sorted({c for entry in self._runs(well) for c in entry['curves']})
+
+    def summary(self):
+        """One row per ingested file: well, source, curves, sample count and depth range."""
+        rows = [{'WELL': e['well'], 'source': os.path.basename(e['source']),
+                 'curves': ','.join(e['curves']), 'n_samples': e['n_samples'],
+                 'top': e['top'], 'base': e['base']} for e in self._ingested()]
+        return pd.DataFrame(rows).sort_values(['WELL', 'top']).reset_index(drop=True)
+
+    def failures(self):
+        """Files that could not be parsed, with the recorded error."""
+        rows = [{'source': e['source'], 'error': e['error']} for e in self.manifest.values() if 'error' in e]
+        return pd.DataFrame(rows, columns=['source', 'error'])
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+    def ingest(self, pattern, alias_map=None, n_jobs=1, chunk_size=64,
+               keep_unmapped=False, dtype=np.float64, prune=False):
+        """
+        Parse LAS files in parallel and write them into the store.
+
+        Files whose size and mtime match the manifest are skipped without
+        being read; the rest are hashed and only re-ingested if their content
+        changed.
+
+        Args:
+            pattern (str or list): Glob pattern or list of LAS paths.
+            alias_map (dict): {standard key: [aliases]}; defaults to ALIAS_MAP.
+            n_jobs (int): Worker processes (1 = run in the current process).
+            chunk_size (int): Files per worker task.
+            keep_unmapped (bool): Also store curves that have no alias.
+            dtype: Storage dtype for curve values.
+            prune (bool): Drop wells whose source file no longer exists.
+
+        Returns:
+            dict: Counts of 'ingested', 'unchanged', 'failed' and 'pruned' files.
+                Parse errors are recorded per file in the manifest (see failures()).
+        """
+        alias_map = ALIAS_MAP if alias_map is None else alias_map
+        paths = sorted(glob.glob(pattern)) if isinstance(pattern, str) else list(pattern)
+
+        tasks, unchanged = [], 0
+        for path in paths:
+            key = os.path.abspath(path)
+            entry = self.manifest.get(key)
+            if entry is not None:
+                stat = os.stat(path)
+                if stat.st_size == entry['size'] and stat.st_mtime == entry['mtime']:
+                    unchanged += 1
+                    continue
+            tasks.append((path, self.root, alias_map, keep_unmapped, dtype,
+                          entry['hash'] if entry else None))
+
+        if n_jobs == 1 or len(tasks) <= 1:
+            results = list(map(_ingest_file, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                results = list(pool.map(_ingest_file, tasks, chunksize=chunk_size))
+
+        ingested = failed = 0
+        for task, result in zip(tasks, results):
+            key = os.path.abspath(task[0])
+            if result is None:
+                # Touched but identical content: refresh the stat fields only
+                stat = os.stat(task[0])
+                self.manifest[key].update(size=stat.st_size, mtime=stat.st_mtime)
+                unchanged += 1
+                continue
+            old = self.manifest.get(key)
+            self.manifest[key] = result
+            if old and 'partition' in old and old['partition'] != result.get('partition'):
+                # partitions are per source file, so the old one has no other owner
+                shutil.rmtree(os.path.join(self.root, 'wells', old['partition']), ignore_errors=True)
+            if 'error' in result:
+                failed += 1
+            else:
+                ingested += 1
+
+        pruned = 0
+        if prune:
+            live = {os.path.abspath(p) for p in paths}
+            for key in [k for k in self.manifest if k not in live]:
+                entry = self.manifest.pop(key)
+                if 'partition' in entry:
+                    shutil.rmtree(os.path.join(self.root, 'wells', entry['partition']), ignore_errors=True)
+                pruned += 1
+
+        self._save_manifest()
+        return {'ingested': ingested, 'unchanged': unchanged, 'failed': failed, 'pruned': pruned}
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def _open(self, entry, curve):
+        path = os.path.join(self.root, 'wells', entry['partition'], f'{curve}.npy')
+        return np.load(path, mmap_mode='r')
+
+    def read_well(self, well, curves=None, top=None, base=None):
+        """
+        Read a depth window of one well without loading the rest of the file(s).
+
+        Runs are merged by depth (stable, so overlapping runs keep their
+        shallowest-first order). Curves missing from a run or from the well
+        come back as NaN so every well has the same schema.
+
+        Returns:
+            pd.DataFrame: Columns DEPT + curves.
+        """
+        runs = self._runs(well)
+        curves = self.curves(well) if curves is None else list(curves)
+        pieces = {DEPTH: []}
+        pieces.update({curve: [] for curve in curves})
+        for entry in runs:
+            depth = self._open(entry, DEPTH)
+            lo = 0 if top is None else np.searchsorted(depth, top, side='left')
+            hi = depth.size if base is None else np.searchsorted(depth, base, side='right')
+            pieces[DEPTH].append(np.array(depth[lo:hi]))
+            for curve in curves:
+                pieces[curve].append(np.array(self._open(entry, curve)[lo:hi]) if curve in entry['curves']
+                                     else np.full(hi - lo, np.nan))
+        data = {name: np.concatenate(parts) for name, parts in pieces.items()}
+        if len(runs) > 1:
+            order = np.argsort(data[DEPTH], kind='stable')
+            data = {name: values[order] for name, values in data.items()}
+        return pd.DataFrame(data)
+
+    def iter_wells(self, wells=None, curves=None, top=None, base=None):
+        """Yield (well, DataFrame) one well at a time for streaming workflows."""
+        for well in (self.wells if wells is None else wells):
+            yield well, self.read_well(well, curves, top, base)
+
+    def read(self, wells=None, curves=None, top=None, base=None):
+        """
+        Long DataFrame (WELL, DEPT, curves) for selected wells and a depth window;
+        the store equivalent of project.df(keys=..., alias=alias_map).
+        """
+        frames = [df.assign(WELL=well) for well, df in self.iter_wells(wells, curves, top, base)]
+        if not frames:
+            return pd.DataFrame(columns=['WELL', DEPTH] + list(curves or []))
+        df = pd.concat(frames, ignore_index=True)
+        return df[['WELL'] + [c for c in df.columns if c != 'WELL']]
+
+    def write_curve(self, well, curve, values):
+        """
+        Add or replace a derived curve (e.g. GR_PATCHED) on an existing well.
+
+        `values` follow the row order of read_well(well); they are split back
+        onto the well's runs.
+        """
+        runs = self._runs(well)
+        values = np.asarray(values)
+        n_samples = sum(entry['n_samples'] for entry in runs)
+        if values.shape != (n_samples,):
+            raise ValueError(f"Expected {n_samples} samples for '{well}', got {values.shape}")
+        if len(runs) > 1:
+            order = np.argsort(np.concatenate([self._open(e, DEPTH) for e in runs]), kind='stable')
+            merged, values = values, np.empty_like(values)
+            values[order] = merged
+        offsets = np.cumsum([0] + [entry['n_samples'] for entry in runs])
+        for entry, lo, hi in zip(runs, offsets[:-1], offsets[1:]):
+            partition = os.path.join(self.root, 'wells', entry['partition'])
+            tmp = os.path.join(partition, f'.{curve}.tmp.npy')
+            np.save(tmp, values[lo:hi])
+            os.replace(tmp, os.path.join(partition, f'{curve}.npy'))
+            if curve not in entry['curves']:
+                entry['curves'] = sorted(entry['curves'] + [curve])
+        self._save_manifest()
+
+
+def fit_streaming_patch(store, features=('NPHI', 'RHOB'), target='GR', wells=None):
+    """
+    Least-squares fit of target = b0 + b . features, accumulated well by well
+    from the store (normal equations), so the field never sits in memory at once.
+
+    Returns:
+        tuple: (intercept, coefficients, n_train)
+    """
+    features = list(features)
+    k = len(features) + 1
+    XtX = np.zeros((k, k))
+    Xty = np.zeros(k)
+    n_train = 0
+    for _, df in store.iter_wells(wells, features + [target]):
+        ok = df[features + [target]].notna().all(axis=1).to_numpy()
+        X = np.column_stack([np.ones(ok.sum()), df.loc[ok, features].to_numpy()])
+        XtX += X.T @ X
+        Xty += X.T @ df.loc[ok, target].to_numpy()
+        n_train += int(ok.sum())
+    beta = np.linalg.solve(XtX, Xty)
+    return beta[0], beta[1:], n_train
+
+
+def patch_curve(store, intercept, coef, features=('NPHI', 'RHOB'), target='GR',
+                output=None, wells=None):
+    """
+    Fill gaps in the target curve with the regression, well by well, and write
+    the result back to the store as `output` (default '<target>_PATCHED').
+
+    Returns:
+        int: Number of patched samples.
+    """
+    features = list(features)
+    output = output or f'{target}_PATCHED'
+    n_patched = 0
+    for well, df in store.iter_wells(wells, features + [target]):
+        pred = intercept + df[features].to_numpy() @ np.asarray(coef)
+        gap = df[target].isna().to_numpy() & df[features].notna().all(axis=1).to_numpy()
+        store.write_curve(well, output, np.where(gap, pred, df[target].to_numpy()))
+        n_patched += int(gap.sum())
+    return n_patched
+
+
+def benchmark(pattern='data/*.las', root=None, n_jobs=1):
+    """
+    Cold ingest, no-op re-run, windowed read and streaming GR patch on the sample data.
+
+    The store goes to a temp dir that is removed afterwards, unless root is
+    given (it is then rebuilt from empty and kept).
+
+    Returns:
+        pd.DataFrame: Store summary after the run.
+    """
+    workdir = root or tempfile.mkdtemp()
+    shutil.rmtree(workdir, ignore_errors=True)
+    try:
+        store = LogStore(workdir)
+
+        start = time.perf_counter()
+        counts = store.ingest(pattern, n_jobs=n_jobs)
+        cold = time.perf_counter() - start
+        print(f"Cold ingest: {counts} in {cold * 1e3:.1f} ms")
+
+        start = time.perf_counter()
+        counts = store.ingest(pattern, n_jobs=n_jobs)
+        print(f"Re-run:      {counts} in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+        start = time.perf_counter()
+        window = store.read(wells=store.wells[:3], curves=['GR', 'RHOB'], top=1200, base=1250)
+        print(f"Window read: {len(window)} rows from 3 wells in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+        intercept, coef, n_train = fit_streaming_patch(store)
+        n_patched = patch_curve(store, intercept, coef)
+        print(f"Streaming patch: GR = {intercept:.2f} + {coef[0]:.2f}*NPHI + {coef[1]:.2f}*RHOB "
+              f"({n_train} training samples, {n_patched} samples patched)")
+
+        # A second, deeper run of the first well plus an unreadable file
+        first = sorted(glob.glob(pattern))[0]
+        extra = os.path.join(workdir, 'extra_las')
+        os.makedirs(extra, exist_ok=True)
+        las = lasio.read(first)
+        las.set_data(las.df().set_axis(las.df().index + 600.0, axis=0))
+        las.write(os.path.join(extra, 'run2.las'))
+        with open(os.path.join(extra, 'broken.las'), 'w') as f:
+            f.write('~Version\nVERS. 2.0 :\nWRAP. NO :\n~Curve\nDEPT.M :\nGR.API :\n~A\n1 2\n3\n')  # truncated
+        well = _well_name(las, first)
+        before = store.read_well(well)
+        counts = store.ingest(os.path.join(extra, '*.las'), n_jobs=n_jobs)
+        merged = store.read_well(well)
+        runs = store._runs(well)
+        assert len({e['partition'] for e in runs}) == 2 and len(merged) == 2 * len(before)
+        assert np.all(np.diff(merged[DEPTH].to_numpy()) >= 0) and len(store.failures()) == 1
+        print(f"Second run + bad file: {counts}; {well} now {len(runs)} runs, {len(merged)} samples; "
+              f"failure recorded: {store.failures().error.iloc[0][:60]}")
+        shutil.rmtree(extra, ignore_errors=True)
+        store.ingest(pattern, n_jobs=n_jobs, prune=True)
+        summary = store.summary()
+    finally:
+        if root is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return summary
+
+
+if __name__ == "__main__":
+    print(benchmark())
@@ -0,0 +1,378 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtri
+from scipy.stats import qmc
+
+DISTRIBUTIONS = ("normal", "lognormal", "uniform", "triangular")
+
+
+# ---------------------------------------------------------------------------
+# Design generation
+# ---------------------------------------------------------------------------
+
+def specs_from_frame(df):
+    """
+    Parameter specs from a parameters.csv-style table (Parameter, Distribution,
+    P1, P2) or from the notebook's {name: {'dist', 'p1', 'p2'}} dict.
+
+    Returns:
+        pd.DataFrame: name, dist, p1, p2 (one row per parameter, design column order)
+    """
+    if isinstance(df, dict):
+        df = pd.DataFrame([{"name": k, "dist": v["dist"], "p1": v["p1"], "p2": v["p2"]} for k, v in df.items()])
+    else:
+        df = df.rename(columns={"Parameter": "name", "Distribution": "dist", "P1": "p1", "P2": "p2"})
+    df = df[["name", "dist", "p1", "p2"]].assign(dist=lambda d: d["dist"].str.lower())
+    unknown = set(df["dist"]) - set(DISTRIBUTIONS)
+    if unknown:
+        raise ValueError(f"Unsupported distributions: {sorted(unknown)}")
+    return df.reset_index(drop=True)
+
+
+def ppf_transform(u, specs):
+    """
+    Map unit samples (N, D) to physical values, one vectorized call per
+    distribution family (same parametrization as the notebooks):
+        normal: p1 = mean, p2 = std          lognormal: p1 = median, p2 = sigma
+        uniform: p1 = min, p2 = max          triangular: p1 = min, p2 = max, mode at the midpoint
+    """
+    out = np.empty_like(u, dtype=float)
+    for dist, group in specs.groupby("dist"):
+        cols = group.index.to_numpy()
+        p1, p2 = group["p1"].to_numpy(float), group["p2"].to_numpy(float)
+        x = u[:, cols]
+        if dist == "normal":
+            out[:, cols] = p1 + p2 * ndtri(x)
+        elif dist == "lognormal":
+            out[:, cols] = p1 * np.exp(p2 * ndtri(x))
+        elif dist == "uniform":
+            out[:, cols] = p1 + (p2 - p1) * x
+        else:
+            width, c = p2 - p1, 0.5
+            out[:, cols] = np.where(x < c, p1 + width * np.sqrt(c * x), p2 - width * np.sqrt((1 - c) * (1 - x)))
+    return out
+
+
+def nearest_correlation(corr, eps=1e-8):
+    """Closest positive-definite correlation matrix by eigenvalue clipping (for large hand-built matrices)."""
+    w, v = np.linalg.eigh((corr + corr.T) / 2)
+    fixed = (v * np.maximum(w, eps)) @ v.T
+    d = np.sqrt(np.diag(fixed))
+    return fixed / np.outer(d, d)
+
+
+def iman_conover(samples, target_corr, fix_pd=False):
+    """
+    Iman-Conover rank re-ordering, vectorized over all columns.
+
+    Same steps as apply_iman_conover in the notebook: normal scores,
+    T = solve(L_current, L_target), scores @ T.T, then each column's sorted
+    original values are placed in the rank order of the correlated scores
+    (one argsort / put_along_axis for the whole matrix).
+    """
+    target_corr = np.asarray(target_corr, dtype=float)
+    if fix_pd:
+        target_corr = nearest_correlation(target_corr)
+    scores = ndtri(samples)
+    try:
+        L_current = np.linalg.cholesky(np.corrcoef(scores, rowvar=False))
+        L_target = np.linalg.cholesky(target_corr)
+    except np.linalg.LinAlgError:
+        raise ValueError("Matrix not positive definite. Check your correlation inputs (or pass fix_pd=True).")
+    correlated = scores @ np.linalg.solve(L_current, L_target).T
+
+    order = np.argsort(correlated, axis=0)
+    out = np.empty_like(samples)
+    np.put_along_axis(out, order, np.sort(samples, axis=0), axis=0)
+    return out
+
+
+def min_distances(u, n_probe=None, max_bytes=64 * 2 ** 20, seed=0):
+    """
+    Nearest-neighbour distance of each probe row to the rest of the design
+    (tiled GEMM, O(n_probe * N * D)). With n_probe < N a random subset of
+    rows estimates the maximin criterion for designs too large to scan fully.
+
+    Distances are computed in (probe block, column block) tiles of at most
+    max_bytes and folded into a running minimum per probe, so memory does
+    not grow with N.
+    """
+    rng = np.random.default_rng(seed)
+    probes = np.arange(len(u)) if n_probe is None or n_probe >= len(u) else rng.choice(len(u), n_probe, replace=False)
+    sq = (u ** 2).sum(axis=1)
+    best = np.full(len(probes), np.inf)
+    tile = max(max_bytes // 8, 1)
+    rows = int(min(len(probes), max(np.sqrt(tile), 1)))
+    cols = max(tile // rows, 1)
+    for s in range(0, len(probes), rows):
+        p = probes[s:s + rows]
+        for c in range(0, len(u), cols):
+            d2 = sq[p, None] + sq[None, c:c + cols] - 2.0 * (u[p] @ u[c:c + cols].T)
+            own = (p >= c) & (p < c + cols)
+            d2[np.flatnonzero(own), p[own] - c] = np.inf
+            np.minimum(best[s:s + rows], d2.min(axis=1), out=best[s:s + rows])
+    return np.sqrt(np.maximum(best, 0))
+
+
+def generate_design(specs, n, target_corr=None, n_candidates=1, n_probe=2_000, seed=42, fix_pd=False):
+    """
+    Correlated LHS design in physical units.
+
+    With n_candidates > 1 that many independent LHS + Iman-Conover designs
+    are drawn and the one with the largest (estimated) minimum inter-point
+    distance in the unit cube is kept (best-of-k maximin).
+
+    Returns:
+        tuple: (design DataFrame, unit-cube samples)
+    """
+    specs = specs_from_frame(specs) if not isinstance(specs, pd.DataFrame) or "dist" not in specs else specs
+    best, best_score = None, -np.inf
+    for k, ss in enumerate(np.random.SeedSequence(seed).spawn(n_candidates)):
+        u = qmc.LatinHypercube(d=len(specs), seed=np.random.default_rng(ss)).random(n)
+        if target_corr is not None:
+            u = iman_conover(u, target_corr, fix_pd)
+        score = min_distances(u, n_probe, seed=k).min() if n_candidates > 1 else 0.0
+        if score > best_score:
+            best, best_score = u, score
+    return pd.DataFrame(ppf_transform(best, specs), columns=specs["name"]), best
+
+
+def simulator_proxy(df):
+    """Vectorized version of the notebook's simulator_proxy (recoverable reserves)."""
+    area = 100 * 43560                                       # sq ft
+    boi = 1.2
+    stoiip = (area * df["Thickness"] * df["Porosity"] * (1 - df["Water_Sat"])) / boi
+    rf = 0.2 + 0.05 * np.log10(df["Permeability"])
+    return stoiip * rf
+
+
+# ---------------------------------------------------------------------------
+# Checkpointed job dispatcher
+# ---------------------------------------------------------------------------
+
+def _run_batch(batch_id, in_path, out_path, command, timeout):
+    cmd = [part.format(input=in_path, output=out_path) for part in command]
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return batch_id, False, time.perf_counter() - start, f"timed out after {timeout} s"
+    ok = proc.returncode == 0 and os.path.exists(out_path)
+    return batch_id, ok, time.perf_counter() - start, proc.stderr[-2_000:]
+
+
+class DesignDispatcher:
+    """
+    Runs a design through an external simulator command in batches of rows.
+
+    Each batch is written to `workdir/inputs/batch_XXXXX.csv` and the command
+    (a list with `{input}` / `{output}` placeholders) must write
+    `workdir/outputs/batch_XXXXX.csv` with the batch's Run_ID column plus
+    results. Completed batches are recorded in `workdir/checkpoint.json`
+    (rewritten atomically after every batch), so an interrupted campaign
+    resumes by re-running only batches that are not recorded.
+
+    Args:
+        command (list): e.g. [sys.executable, 'doe_engine.py', 'simulate', '{input}', '{output}']
+        workdir (str): Campaign directory.
+        batch_size (int): Design rows per simulator call.
+        n_jobs (int): Concurrent simulator processes.
+        retries (int): Extra attempts for failed batches.
+        timeout (float): Seconds per simulator call (None = no limit).
+    """
+
+    def __init__(self, command, workdir, batch_size=1_000, n_jobs=1, retries=1, timeout=None):
+        self.command = list(command)
+        self.workdir = workdir
+        self.batch_size = batch_size
+        self.n_jobs = n_jobs
+        self.retries = retries
+        self.timeout = timeout
+        self.checkpoint = os.path.join(workdir, "checkpoint.json")
+
+    def _paths(self, batch_id):
+        name = f"batch_{batch_id:05d}.csv"
+        return os.path.join(self.workdir, "inputs", name), os.path.join(self.workdir, "outputs", name)
+
+    def _load_state(self, n_rows):
+        if os.path.exists(self.checkpoint):
+            with open(self.checkpoint) as f:
+                state = json.load(f)
+            if state["n_rows"] != n_rows or state["batch_size"] != self.batch_size:
+                raise ValueError("Checkpoint belongs to a different design/batching; use a new workdir.")
+            return state
+        return {"n_rows": n_rows, "batch_size": self.batch_size, "done": {}, "failed": {}}
+
+    def _save_state(self, state):
+        tmp = self.checkpoint + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp, self.checkpoint)
+
+    def run(self, design):
+        """
+        Simulate every design row not yet completed.
+
+        Returns:
+            dict: counts of batches run / skipped / failed and elapsed seconds.
+        """
+        for sub in ("inputs", "outputs"):
+            os.makedirs(os.path.join(self.workdir, sub), exist_ok=True)
+        design = design.rename_axis("Run_ID").reset_index() if "Run_ID" not in design else design
+        state = self._load_state(len(design))
+        n_batches = -(-len(design) // self.batch_size)
+        todo = [b for b in range(n_batches)
+                if str(b) not in state["done"] or not os.path.exists(self._paths(b)[1])]
+        for b in todo:
+            in_path = self._paths(b)[0]
+            design.iloc[b * self.batch_size:(b + 1) * self.batch_size].to_csv(in_path, index=False)
+
+        start = time.perf_counter()
+        attempts = {b: 0 for b in todo}
+        pending = list(todo)
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as pool:
+            while pending:
+                futures = [pool.submit(_run_batch, b, *self._paths(b), self.command, self.timeout) for b in pending]
+                pending = []
+                for fut in as_completed(futures):
+                    b, ok, seconds, err = fut.result()
+                    attempts[b] += 1
+                    if ok:
+                        state["done"][str(b)] = round(seconds, 3)
+                        state["failed"].pop(str(b), None)
+                    elif attempts[b] <= self.retries:
+                        pending.append(b)
+                    else:
+                        state["failed"][str(b)] = err
+                    self._save_state(state)
+        failed = [b for b in todo if str(b) in state["failed"]]
+        return {"batches": n_batches, "run": len(todo), "skipped": n_batches - len(todo),
+                "failed": len(failed), "seconds": time.perf_counter() - start}
+
+    def results(self):
+        """All completed batch outputs concatenated, ordered by Run_ID."""
+        with open(self.checkpoint) as f:
+            done = sorted(int(b) for b in json.load(f)["done"])
+        frames = [pd.read_csv(self._paths(b)[1]) for b in done]
+        return pd.concat(frames, ignore_index=True).sort_values("Run_ID").reset_index(drop=True)
+
+
+def simulate_file(in_path, out_path):
+    """Local simulator stand-in: evaluate the proxy for one batch file."""
+    df = pd.read_csv(in_path)
+    df.assign(Recoverable_Reserves=simulator_proxy(df))[["Run_ID", "Recoverable_Reserves"]] \
+        .to_csv(out_path, index=False)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+PARAMS = {
+    "Porosity": {"dist": "normal", "p1": 0.20, "p2": 0.03},
+    "Permeability": {"dist": "lognormal", "p1": 50, "p2": 0.8},
+    "Water_Sat": {"dist": "uniform", "p1": 0.15, "p2": 0.40},
+    "Thickness": {"dist": "triangular", "p1": 50, "p2": 150},
+}
+TARGET_CORR = np.array([
+    [1.0, 0.8, -0.4, 0.0],
+    [0.8, 1.0, -0.6, 0.0],
+    [-0.4, -0.6, 1.0, 0.0],
+    [0.0, 0.0, 0.0, 1.0],
+])
+
+
+def _iman_conover_loop(lhs_samples, target_corr):
+    """The notebook's apply_iman_conover (reference for parity and timing)."""
+    from scipy.linalg import cholesky
+    from scipy.stats import norm
+    normal_scores = norm.ppf(lhs_samples)
+    L_current = cholesky(np.corrcoef(normal_scores.T), lower=True)
+    L_target = cholesky(target_corr, lower=True)
+    correlated_scores = np.dot(normal_scores, np.linalg.solve(L_current, L_target).T)
+    final_lhs = np.zeros_like(lhs_samples)
+    for d in range(lhs_samples.shape[1]):
+        final_lhs[np.argsort(correlated_scores[:, d]), d] = np.sort(lhs_samples[:, d])
+    return final_lhs
+
+
+def benchmark(n=100_000, n_dim=40, workdir=None, n_jobs=None):
+    """
+    Parity with the notebook on its 4-parameter case, then a 100k x 40 design and a dispatched campaign.
+
+    The campaign runs in a temp dir that is removed afterwards, unless
+    workdir is given (it is then cleared first and kept).
+    """
+    import shutil
+    import tempfile
+
+    from scipy.stats import lognorm, norm, triang
+
+    n_jobs = n_jobs or os.cpu_count()
+    specs = specs_from_frame(PARAMS)
+    u = qmc.LatinHypercube(d=4, seed=42).random(100)
+    ic = iman_conover(u, TARGET_CORR)
+    design = pd.DataFrame(ppf_transform(ic, specs), columns=specs["name"])
+    ref = np.column_stack([norm.ppf(ic[:, 0], 0.20, 0.03), lognorm.ppf(ic[:, 1], s=0.8, scale=50),
+                           0.15 + 0.25 * ic[:, 2], triang.ppf(ic[:, 3], c=0.5, loc=50, scale=100)])
+    row_proxy = design.apply(lambda r: simulator_proxy(r), axis=1)
+    print(f"Iman-Conover identical to notebook loop: {np.array_equal(ic, _iman_conover_loop(u, TARGET_CORR))}; "
+          f"PPF max rel diff {np.abs(design.to_numpy() / ref - 1).max():.1e}; "
+          f"proxy max rel diff {np.abs(simulator_proxy(design) / row_proxy - 1).max():.1e}")
+
+    # Large design: 40 parameters (the notebook's four, repeated), block correlation
+    big_specs = pd.concat([specs.assign(name=specs["name"] + f"_{i}") for i in range(n_dim // 4)], ignore_index=True)
+    big_corr = np.kron(np.eye(n_dim // 4), TARGET_CORR)
+    u = qmc.LatinHypercube(d=n_dim, seed=1).random(n)
+    start = time.perf_counter()
+    _iman_conover_loop(u, big_corr)
+    t_loop = time.perf_counter() - start
+    start = time.perf_counter()
+    ic = iman_conover(u, big_corr)
+    t_vec = time.perf_counter() - start
+    achieved = pd.DataFrame(ic[:, :4]).corr(method="spearman").to_numpy()
+    print(f"{n:,} x {n_dim} Iman-Conover: {t_vec:.2f} s (loop {t_loop:.2f} s); "
+          f"max |rank corr - target| (first block) {np.abs(achieved - TARGET_CORR).max():.3f}")
+
+    start = time.perf_counter()
+    _, u_best = generate_design(big_specs, n, big_corr, n_candidates=4)
+    print(f"Best-of-4 maximin design ({n:,} x {n_dim}): {time.perf_counter() - start:.1f} s, "
+          f"estimated min distance {min_distances(u_best, 2_000).min():.3f}")
+
+    start = time.perf_counter()
+    design, _ = generate_design(specs, n, TARGET_CORR)
+    t_gen = time.perf_counter() - start
+    start = time.perf_counter()
+    design.head(2_000).apply(lambda r: simulator_proxy(r), axis=1)
+    t_apply = (time.perf_counter() - start) / 2_000 * n
+    start = time.perf_counter()
+    simulator_proxy(design)
+    print(f"{n:,}-run design in {t_gen:.2f} s; proxy {t_apply:.1f} s row-wise -> "
+          f"{(time.perf_counter() - start) * 1e3:.0f} ms vectorized")
+
+    command = [sys.executable, os.path.abspath(__file__), "simulate", "{input}", "{output}"]
+    campaign = workdir or tempfile.mkdtemp()
+    shutil.rmtree(campaign, ignore_errors=True)      # the "fresh" run needs an empty checkpoint
+    try:
+        dispatcher = DesignDispatcher(command, campaign, batch_size=5_000, n_jobs=n_jobs)
+        summary = dispatcher.run(design.head(50_000))
+        print(f"Dispatcher (fresh): {summary}")
+        print(f"Dispatcher (resume): {dispatcher.run(design.head(50_000))}")
+        print(f"Collected {len(dispatcher.results()):,} simulated runs")
+    finally:
+        if workdir is None:
+            shutil.rmtree(campaign, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "simulate":
+        simulate_file(sys.argv[2], sys.argv[3])
+    else:
+        benchmark()
@@ -0,0 +1,229 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtri
+from scipy.stats import qmc, t as student_t
+
+PERCENTILES = {"P90": 10, "P50": 50, "P10": 90}   # exceedance convention used in the notebook
+
+
+def prospect_from_data(df):
+    """Distribution parameters derived from offset well data exactly as in the notebook."""
+    return {
+        "area": (df["Area_Estimate_Acres"].min(), df["Area_Estimate_Acres"].mean(),
+                 df["Area_Estimate_Acres"].max()),                                   # triangular
+        "thickness": (df["Net_Pay_ft"].mean(), df["Net_Pay_ft"].std()),             # normal
+        "porosity": (df["Porosity"].mean(), df["Porosity"].std()),                  # normal
+        "saturation": (df["So"].min(), df["So"].max()),                             # uniform
+    }
+
+
+def _marginals(u, prospect):
+    """Area * thickness * porosity and the saturation bounds from (n, 4) unit-cube points."""
+    u = np.clip(u, 1e-12, 1 - 1e-12)
+    a, mode, b = prospect["area"]
+    c = (mode - a) / (b - a)
+    area = np.where(u[:, 0] < c,
+                    a + np.sqrt(u[:, 0] * (b - a) * (mode - a)),
+                    b - np.sqrt((1 - u[:, 0]) * (b - a) * (b - mode)))
+    thickness = prospect["thickness"][0] + prospect["thickness"][1] * ndtri(u[:, 1])
+    porosity = prospect["porosity"][0] + prospect["porosity"][1] * ndtri(u[:, 2])
+    return area * thickness * porosity, prospect["saturation"]
+
+
+def volumes(u, prospect):
+    """
+    HCPV = A * h * phi * So from an (n, 4) array of unit-cube points by
+    inverse-CDF transforms, floored at zero as in the notebook.
+    """
+    pore, (lo, hi) = _marginals(u, prospect)
+    return np.maximum(pore * (lo + (hi - lo) * u[:, 3]), 0)
+
+
+class _Sampler:
+    """Unit-cube points for one replicate: scrambled Sobol, Latin hypercube or plain MC."""
+
+    def __init__(self, method, rng):
+        self.method = method
+        self.rng = rng
+        if method == "sobol":
+            self.engine = qmc.Sobol(d=4, scramble=True, seed=rng)
+        elif method == "lhs":
+            self.engine = qmc.LatinHypercube(d=4, seed=rng)
+        elif method != "mc":
+            raise ValueError(f"unknown method '{method}'")
+
+    def random(self, n):
+        return self.rng.random((n, 4)) if self.method == "mc" else self.engine.random(n)
+
+
+class StreamingCDF:
+    """
+    Fixed-memory CDF estimator on a uniform grid over [0, x_max].
+
+    Each sample contributes a ramp from a to b (0 below a, 1 above b):
+    either the conditional CDF of a uniform factor, or a one-cell ramp for a
+    raw value. A ramp is the difference of two hinge functions, whose grid
+    second differences are two weights each, so any number of samples is
+    accumulated in O(n + grid) and the CDF follows from two cumulative sums.
+    Memory is the grid, however many samples are added.
+    """
+
+    def __init__(self, x_max, n_grid=1 << 16):
+        self.width = x_max / n_grid
+        self.n_grid = n_grid
+        self.d2 = np.zeros(n_grid + 3)
+        self.n = 0
+
+    def _hinge(self, pos, weight):
+        k = np.floor(pos).astype(np.int64)
+        f = pos - k
+        last = self.n_grid + 2                                       # spill slot past the grid
+        self.d2 += np.bincount(np.minimum(k + 1, last), weight * (1 - f), minlength=last + 1)
+        self.d2 += np.bincount(np.minimum(k + 2, last), weight * f, minlength=last + 1)
+
+    def add_ramps(self, a, b):
+        pa, pb = a / self.width, b / self.width
+        w = 1.0 / (pb - pa)
+        self._hinge(pa, w)
+        self._hinge(pb, -w)
+        self.n += len(a)
+
+    def add_values(self, values):
+        # one-cell ramps: at most one grid cell (x_max / n_grid) of smoothing
+        self.add_ramps(values, values + self.width)
+
+    def quantile(self, q, d2=None, n=None):
+        d2 = self.d2 if d2 is None else d2
+        cdf = np.cumsum(np.cumsum(d2))[:self.n_grid + 1] / (self.n if n is None else n)
+        cdf = np.maximum.accumulate(cdf)
+        q = np.asarray(q) / 100
+        k = np.clip(np.searchsorted(cdf, q, side="left"), 1, self.n_grid)
+        frac = (q - cdf[k - 1]) / np.maximum(cdf[k] - cdf[k - 1], 1e-300)
+        return (k - 1 + np.clip(frac, 0, 1)) * self.width
+
+
+def simulate_prospect(prospect, method="sobol", smoothing=True, rel_tol=0.005, confidence=0.95,
+                      n_replicates=8, first_batch=1 << 10, max_samples=1 << 22, seed=0):
+    """
+    Run one prospect until the P90/P50/P10 confidence intervals are tight.
+
+    `n_replicates` independent (randomized) sequences are advanced in
+    power-of-two batches, each into its own StreamingCDF. The estimate comes
+    from the merged CDF and the interval half-width from the spread of the
+    replicate estimates (Student t), the standard randomized-QMC error
+    estimate. Sampling stops once every half-width is below rel_tol of its
+    estimate, or at max_samples.
+
+    With smoothing=True saturation is integrated out analytically: given
+    A * h * phi = P > 0, V is uniform on [P * So_min, P * So_max], so each
+    sample adds that exact conditional CDF (P <= 0 gives V = 0). The CDF
+    estimate becomes a smooth function of the remaining coordinates, which
+    is what lets QMC beat plain sampling for percentiles.
+
+    Returns:
+        dict: P90/P50/P10, their relative half-widths, samples used and convergence flag.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    samplers = [_Sampler(method, np.random.default_rng(s)) for s in seed.spawn(n_replicates)]
+    q = np.array(list(PERCENTILES.values()), dtype=float)
+    t_crit = student_t.ppf(0.5 + confidence / 2, n_replicates - 1)
+
+    def add(cdf, u):
+        if smoothing:
+            pore, (lo, hi) = _marginals(u, prospect)
+            pore = np.maximum(pore, 0)                               # V = 0 whenever A*h*phi <= 0
+            cdf.add_ramps(pore * lo, pore * hi + cdf.width * (pore <= 0))
+        else:
+            cdf.add_values(volumes(u, prospect))
+
+    batch = [s.random(first_batch) for s in samplers]
+    x_max = 2.0 * volumes(np.concatenate(batch), prospect).max()     # shared grid so replicates merge
+    cdfs = [StreamingCDF(x_max) for _ in range(n_replicates)]
+    while True:
+        for cdf, u in zip(cdfs, batch):
+            add(cdf, u)
+        n = cdfs[0].n
+        reps = np.array([c.quantile(q) for c in cdfs])
+        estimate = cdfs[0].quantile(q, sum(c.d2 for c in cdfs), n * n_replicates)
+        half_width = t_crit * reps.std(axis=0, ddof=1) / np.sqrt(n_replicates)
+        rel = half_width / np.maximum(np.abs(estimate), 1e-300)
+        converged = bool((rel < rel_tol).all())
+        if converged or 2 * n * n_replicates > max_samples:
+            break
+        batch = [s.random(n) for s in samplers]                      # doubles each replicate's points
+
+    out = {name: est for name, est in zip(PERCENTILES, estimate)}
+    out.update({f"{name}_rel_ci": r for name, r in zip(PERCENTILES, rel)})
+    out.update(n_samples=n * n_replicates, converged=converged)
+    return out
+
+
+def _run_one(args):
+    name, prospect, kwargs, seed = args
+    return {"prospect": name, **simulate_prospect(prospect, seed=seed, **kwargs)}
+
+
+def run_portfolio(prospects, n_jobs=1, seed=0, **kwargs):
+    """
+    simulate_prospect for many prospects, in parallel processes.
+
+    Args:
+        prospects (dict): {name: prospect parameters}.
+        kwargs: simulate_prospect options (method, rel_tol, ...).
+
+    Returns:
+        pd.DataFrame: one row per prospect.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(prospects))
+    tasks = [(name, p, kwargs, s) for (name, p), s in zip(prospects.items(), seeds)]
+    if n_jobs == 1:
+        rows = list(map(_run_one, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            rows = list(pool.map(_run_one, tasks, chunksize=max(1, len(tasks) // (4 * n_jobs))))
+    return pd.DataFrame(rows)
+
+
+def benchmark(csv="reservoir_data.csv", rel_tol=0.001, n_prospects=600, n_jobs=1):
+    """Samples needed for the same precision by method, and a portfolio timing."""
+    prospect = prospect_from_data(pd.read_csv(csv))
+
+    # Notebook run (10,000 independent draws) for reference
+    np.random.seed(42)
+    n = 10_000
+    v = (np.random.triangular(*prospect["area"], size=n) * np.random.normal(*prospect["thickness"], size=n)
+         * np.random.normal(*prospect["porosity"], size=n) * np.random.uniform(*prospect["saturation"], size=n))
+    ref = np.percentile(np.maximum(v, 0), list(PERCENTILES.values()))
+    print("Notebook (10k MC): " + ", ".join(f"{k} {x:,.1f}" for k, x in zip(PERCENTILES, ref)))
+
+    for method, smoothing in (("mc", False), ("lhs", False), ("sobol", False), ("mc", True), ("sobol", True)):
+        start = time.perf_counter()
+        r = simulate_prospect(prospect, method=method, smoothing=smoothing, rel_tol=rel_tol, max_samples=1 << 26)
+        label = method + (" + smoothing" if smoothing else "")
+        print(f"{label:17s}: " + ", ".join(f"{k} {r[k]:,.1f}" for k in PERCENTILES)
+              + f" | {r['n_samples']:>10,} samples to +/-{rel_tol:.1%} (converged={r['converged']}) "
+                f"in {time.perf_counter() - start:.2f} s")
+
+    rng = np.random.default_rng(1)
+    prospects = {}
+    for i in range(n_prospects):
+        s = rng.uniform(0.5, 2.0)
+        prospects[f"PR-{i:03d}"] = {
+            "area": tuple(np.array(prospect["area"]) * s),
+            "thickness": (prospect["thickness"][0] * rng.uniform(0.7, 1.3), prospect["thickness"][1] * rng.uniform(1, 3)),
+            "porosity": (prospect["porosity"][0] * rng.uniform(0.8, 1.2), prospect["porosity"][1] * rng.uniform(1, 2)),
+            "saturation": prospect["saturation"],
+        }
+    start = time.perf_counter()
+    out = run_portfolio(prospects, n_jobs=n_jobs, rel_tol=0.005)
+    print(f"Portfolio: {n_prospects} prospects to +/-0.5% in {time.perf_counter() - start:.1f} s "
+          f"(median {out.n_samples.median():,.0f} samples, all converged: {out.converged.all()})")
+    return out
+
+
+if __name__ == "__main__":
+    benchmark()
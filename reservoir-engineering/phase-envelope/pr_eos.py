@@ -0,0 +1,564 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+R = 8.314462618e-5  # Gas constant (m3 * bar / K / mol)
+SQRT2 = np.sqrt(2.0)
+
+
+# ---------------------------------------------------------------------------
+# Cubic solver
+# ---------------------------------------------------------------------------
+
+def cubic_roots(c2, c1, c0):
+    """
+    Real roots of Z^3 + c2 Z^2 + c1 Z + c0 = 0 for arrays of coefficients.
+
+    Uses Cardano's formula (one real root) or the trigonometric form (three
+    real roots), followed by one Newton polish step. Missing roots are NaN.
+
+    Returns:
+        np.ndarray: Roots with shape (..., 3), ascending where real.
+    """
+    c2, c1, c0 = np.broadcast_arrays(*(np.asarray(c, dtype=float) for c in (c2, c1, c0)))
+    p = c1 - c2 ** 2 / 3.0
+    q = 2.0 * c2 ** 3 / 27.0 - c2 * c1 / 3.0 + c0
+    disc = (q / 2.0) ** 2 + (p / 3.0) ** 3
+    shift = -c2 / 3.0
+
+    roots = np.full(c2.shape + (3,), np.nan)
+
+    # 1. One real root (disc > 0)
+    one = disc > 0
+    sq = np.sqrt(np.where(one, disc, 0.0))
+    t1 = np.cbrt(-q / 2.0 + sq) + np.cbrt(-q / 2.0 - sq)
+    roots[..., 0] = np.where(one, t1 + shift, np.nan)
+
+    # 2. Three real roots (disc <= 0): trigonometric solution
+    three = ~one
+    m = 2.0 * np.sqrt(np.where(three, -p / 3.0, 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        arg = np.where(three & (p < 0), 3.0 * q / (p * m), 0.0)
+    theta = np.arccos(np.clip(arg, -1.0, 1.0)) / 3.0
+    for k in range(3):
+        tk = m * np.cos(theta - 2.0 * np.pi * k / 3.0)
+        roots[..., k] = np.where(three, tk + shift, roots[..., k])
+
+    # 3. Newton polish
+    f = ((roots + c2[..., None]) * roots + c1[..., None]) * roots + c0[..., None]
+    df = (3.0 * roots + 2.0 * c2[..., None]) * roots + c1[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        polished = roots - f / df
+    roots = np.where(np.isfinite(polished), polished, roots)
+    return np.sort(roots, axis=-1)
+
+
+def _reduced_gibbs(Z, A, B):
+    """Dimensionless residual Gibbs energy of a PR root (used to pick the stable root)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (Z - 1.0 - np.log(Z - B)
+                - A / (2.0 * SQRT2 * B) * np.log((Z + (1.0 + SQRT2) * B) / (Z + (1.0 - SQRT2) * B)))
+
+
+def solve_Z(A, B, phase='liquid'):
+    """
+    Vectorized replacement for the notebook's np.roots-based solve_Z.
+
+    Args:
+        A, B (array-like): Dimensionless PR parameters.
+        phase (str): 'liquid' (smallest root), 'vapor' (largest root) or
+            'stable' (root with the lowest Gibbs energy).
+
+    Returns:
+        np.ndarray: Z with the shape of A/B; 1.0 where no root exceeds B.
+    """
+    A, B = np.broadcast_arrays(np.asarray(A, dtype=float), np.asarray(B, dtype=float))
+    roots = cubic_roots(-(1.0 - B), A - 3.0 * B ** 2 - 2.0 * B, -(A * B - B ** 2 - B ** 3))
+    roots = np.where(roots > B[..., None], roots, np.nan)  # Z must be > B physically
+
+    if phase == 'liquid':
+        Z = np.nanmin(np.where(np.isnan(roots), np.inf, roots), axis=-1)
+    elif phase == 'vapor':
+        Z = np.nanmax(np.where(np.isnan(roots), -np.inf, roots), axis=-1)
+    else:
+        g = _reduced_gibbs(roots, A[..., None], B[..., None])
+        g = np.where(np.isnan(roots), np.inf, g)
+        Z = np.take_along_axis(roots, np.argmin(g, axis=-1)[..., None], axis=-1)[..., 0]
+
+    return np.where(np.isfinite(Z), Z, 1.0)  # Fallback
+
+
+# ---------------------------------------------------------------------------
+# Peng-Robinson mixture
+# ---------------------------------------------------------------------------
+
+class PengRobinson:
+    """
+    Batched Peng-Robinson EOS for a fixed component slate.
+
+    T and P may be scalars or arrays; compositions carry the component axis
+    last, so arrays of (T, P, composition) are evaluated in one call.
+    """
+
+    def __init__(self, Tc, Pc, w):
+        """
+        Args:
+            Tc (array-like): Critical temperatures (K).
+            Pc (array-like): Critical pressures (bar).
+            w (array-like): Acentric factors.
+        """
+        self.Tc = np.asarray(Tc, dtype=float)
+        self.Pc = np.asarray(Pc, dtype=float)
+        self.w = np.asarray(w, dtype=float)
+        self.kappa = 0.37464 + 1.54226 * self.w - 0.26992 * self.w ** 2
+        self.bi = 0.07780 * (R * self.Tc) / self.Pc
+        self.nc = len(self.Tc)
+
+    @classmethod
+    def from_components(cls, components):
+        """Builds the EOS from the notebook dict {name: [Tc, Pc, omega, z]}."""
+        props = np.array(list(components.values()))
+        return cls(props[:, 0], props[:, 1], props[:, 2])
+
+    def calc_params(self, T, P, x_comp):
+        """
+        PR mixture parameters (Van der Waals mixing, no kij) for arrays of
+        T (...), P (...) and x_comp (..., nc).
+
+        Returns:
+            tuple: A, B, b_mix, sqrt_ai (..., nc), sum_x_sqrt_a
+        """
+        T = np.asarray(T, dtype=float)[..., None]
+        P = np.asarray(P, dtype=float)
+        alpha = (1 + self.kappa * (1 - np.sqrt(T / self.Tc))) ** 2
+        sqrt_ai = np.sqrt(0.45724 * (R ** 2 * self.Tc ** 2) / self.Pc * alpha)
+
+        b_mix = np.sum(x_comp * self.bi, axis=-1)
+        sum_x_sqrt_a = np.sum(x_comp * sqrt_ai, axis=-1)
+        a_mix = sum_x_sqrt_a ** 2
+
+        RT = R * T[..., 0]
+        A = a_mix * P / RT ** 2
+        B = b_mix * P / RT
+        return A, B, b_mix, sqrt_ai, sum_x_sqrt_a
+
+    def ln_fugacity_coeffs(self, T, P, x_comp, phase='liquid'):
+        """
+        ln(phi_i) for every component of every (T, P, x) row.
+
+        Returns:
+            np.ndarray: (..., nc)
+        """
+        A, B, b_mix, sqrt_ai, sum_x_sqrt_a = self.calc_params(T, P, x_comp)
+        Z = solve_Z(A, B, phase)[..., None]
+        A, B, b_mix, sum_x_sqrt_a = (v[..., None] for v in (A, B, b_mix, sum_x_sqrt_a))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bi_b = self.bi / b_mix
+            term3 = (A / (2 * SQRT2 * B) * (2 * sqrt_ai / sum_x_sqrt_a - bi_b)
+                     * np.log((Z + (1 + SQRT2) * B) / (Z + (1 - SQRT2) * B)))
+            ln_phi = bi_b * (Z - 1) - np.log(Z - B) - term3
+
+        # Ideal-gas limit where A or B is negligible
+        return np.where((A < 1e-8) | (B < 1e-8), 0.0, ln_phi)
+
+    def calc_fugacity_coeffs(self, T, P, x_comp, phase='liquid'):
+        """Batched counterpart of the notebook's calc_fugacity_coeffs (returns phi)."""
+        return np.exp(self.ln_fugacity_coeffs(T, P, x_comp, phase))
+
+    def wilson_K(self, T, P):
+        """Wilson K-values for arrays of T, P."""
+        T = np.asarray(T, dtype=float)[..., None]
+        P = np.asarray(P, dtype=float)[..., None]
+        return (self.Pc / P) * np.exp(5.37 * (1 + self.w) * (1 - self.Tc / T))
+
+
+# ---------------------------------------------------------------------------
+# Continuation envelope tracer
+# ---------------------------------------------------------------------------
+
+class EnvelopeTracer:
+    """
+    Traces full saturation envelopes by Newton continuation (Michelsen, 1980).
+
+    Unknowns are X = [ln K_1..ln K_nc, ln T, ln P] with
+        ln K_i + ln phi_i(w) - ln phi_i(z) = 0,   w = K z
+        sum(w) - 1 = 0
+        X_spec - S = 0
+    Each new point is predicted along the curve tangent from the previous
+    converged point, and the specified variable is the one changing fastest.
+    Because the ln K are smooth through K = 1, the trace runs from the
+    low-pressure bubble point, through the critical point, and down the dew
+    curve in a single pass.
+
+    Several compositions are traced in lockstep so that every Newton
+    iteration is one batched EOS call for all of them.
+    """
+
+    def __init__(self, eos, P_start=1.0, h0=0.05, h_max=0.5, max_points=400, tol=1e-9):
+        self.eos = eos
+        self.P_start = P_start
+        self.h0 = h0
+        self.h_max = h_max
+        self.max_points = max_points
+        self.tol = tol
+
+    def _jacobian(self, X, Z, eps=1e-7):
+        """
+        Residuals (without the spec row) and forward-difference Jacobians for
+        stacks of X (m, nc + 2) and z (m, nc).
+
+        All perturbed points go through the EOS in batched calls; the feed
+        phase only needs re-evaluating for the ln T and ln P perturbations.
+        """
+        m, n = X.shape
+        nc = self.eos.nc
+        stack = X[:, None, :] + eps * np.vstack([np.zeros(n), np.eye(n)])[None]
+        lnK = stack[..., :nc]
+        T, P = np.exp(stack[..., nc]), np.exp(stack[..., nc + 1])
+        w = Z[:, None, :] * np.exp(lnK)
+        sw = w.sum(axis=-1)
+
+        # Incipient phase at every perturbed point
+        ln_phi_w = self.eos.ln_fugacity_coeffs(T, P, w / sw[..., None], phase='stable')
+
+        # Feed phase at the base point and the T / P perturbations only
+        tp = [0, nc + 1, nc + 2]
+        ln_phi_tp = self.eos.ln_fugacity_coeffs(
+            T[:, tp], P[:, tp], np.broadcast_to(Z[:, None, :], (m, 3, nc)), phase='stable')
+        ln_phi_z = np.repeat(ln_phi_tp[:, :1], n + 1, axis=1)
+        ln_phi_z[:, nc + 1:] = ln_phi_tp[:, 1:]
+
+        F = np.concatenate([lnK + ln_phi_w - ln_phi_z, (sw - 1.0)[..., None]], axis=-1)
+        return F[:, 0], np.transpose((F[:, 1:] - F[:, :1]) / eps, (0, 2, 1))
+
+    def _newton(self, X0, spec, S, Z, max_iter=15):
+        """Batched Newton solve with X[spec] fixed to S for every row."""
+        m, n = X0.shape
+        rows = np.arange(m)
+        X = X0.copy()
+        X[rows, spec] = S
+        converged = np.zeros(m, dtype=bool)
+        iters = np.full(m, max_iter)
+        J_out = np.full((m, n, n), np.nan)
+        active = rows.copy()
+
+        for it in range(1, max_iter + 1):
+            if active.size == 0:
+                break
+            F, J = self._jacobian(X[active], Z[active])
+            J_full = np.concatenate([J, np.eye(n)[spec[active]][:, None, :]], axis=1)
+            R_full = np.column_stack([F, X[active, spec[active]] - S[active]])
+
+            finite = np.isfinite(J_full).all(axis=(1, 2)) & np.isfinite(R_full).all(axis=1)
+            J_safe = np.where(finite[:, None, None], J_full, np.eye(n))
+            try:
+                dX = np.linalg.solve(J_safe, -np.where(finite[:, None], R_full, 0.0)[..., None])[..., 0]
+            except np.linalg.LinAlgError:
+                dX = -np.einsum('mij,mj->mi', np.linalg.pinv(J_safe), np.where(finite[:, None], R_full, 0.0))
+
+            # Damp very large steps in log space
+            scale = np.maximum(1.0, np.abs(dX).max(axis=1) / 0.5)
+            X[active] += dX / scale[:, None]
+
+            done = finite & (np.abs(dX).max(axis=1) < self.tol)
+            converged[active[done]] = True
+            iters[active[done]] = it
+            J_out[active[done]] = J_full[done]
+            active = active[finite & ~done]
+
+        return X, converged, iters, J_out
+
+    def _start(self, Z):
+        """Low-pressure bubble points: Wilson T by bisection, then Newton on ln T."""
+        m, nc = Z.shape
+        P0 = self.P_start
+        lo = np.full(m, 20.0)
+        hi = np.full(m, float(self.eos.Tc.max()) * 2)
+        for _ in range(60):
+            T = 0.5 * (lo + hi)
+            above = np.sum(Z * self.eos.wilson_K(T, P0), axis=1) > 1.0
+            hi = np.where(above, T, hi)
+            lo = np.where(above, lo, T)
+        X0 = np.column_stack([np.log(self.eos.wilson_K(T, P0)), np.log(T), np.full(m, np.log(P0))])
+        return self._newton(X0, np.full(m, nc + 1), X0[:, nc + 1], Z, max_iter=50)
+
+    @staticmethod
+    def _tangent(J, previous=None):
+        """Unit tangent dX/dS from J dX/dS = e_spec, oriented like `previous`."""
+        n = J.shape[-1]
+        t = np.linalg.solve(J, np.broadcast_to(np.eye(n)[-1], J.shape[:-1])[..., None])[..., 0]
+        t /= np.linalg.norm(t, axis=1, keepdims=True)
+        if previous is not None:
+            t *= np.where(np.einsum('mi,mi->m', t, previous) < 0, -1.0, 1.0)[:, None]
+        return t
+
+    def trace(self, z):
+        """Traces a single composition; see trace_many for the returned dict."""
+        return self.trace_many(np.atleast_2d(z))[0]
+
+    def trace_many(self, Z):
+        """
+        Args:
+            Z (np.ndarray): Compositions (m, nc).
+
+        Returns:
+            list: One dict per composition with 'T', 'P' (bar) and 'branch'
+                  ('bubble' | 'dew') along the trace, plus 'critical',
+                  'cricondenbar' and 'cricondentherm' as (T, P) tuples
+                  (critical is None if the trace did not cross it).
+        """
+        Z = np.asarray(Z, dtype=float)
+        Z = Z / Z.sum(axis=1, keepdims=True)
+        m, nc = Z.shape
+
+        X, ok, _, J = self._start(Z)
+        points = [[X[i].copy()] if ok[i] else [] for i in range(m)]
+        active = np.flatnonzero(ok)
+        if active.size == 0:
+            return [self._package([]) for _ in range(m)]
+
+        tangent = np.zeros_like(X)
+        tangent[active] = self._tangent(J[active])
+        # Start by climbing in pressure
+        tangent[active] *= np.where(tangent[active, nc + 1] < 0, -1.0, 1.0)[:, None]
+        h = np.full(m, self.h0)
+
+        for _ in range(4 * self.max_points):
+            if active.size == 0:
+                break
+            Xa, ta = X[active], tangent[active]
+            rows = np.arange(active.size)
+            spec = np.argmax(np.abs(ta), axis=1)
+            step = h[active].copy()
+
+            # Jump symmetrically over K = 1 near the critical point
+            on_k = spec < nc
+            x_s, t_s = Xa[rows, spec], ta[rows, spec]
+            target = x_s + step * t_s
+            jump = on_k & ((np.sign(target) != np.sign(x_s)) | (np.abs(target) < 0.5 * np.abs(x_s)))
+            step = np.where(jump, -2.0 * x_s / np.where(t_s == 0, 1.0, t_s), step)
+
+            X_pred = Xa + step[:, None] * ta
+            X_new, ok, iters, J = self._newton(X_pred, spec, X_pred[rows, spec], Z[active])
+            ok &= np.abs(X_new[:, :nc]).max(axis=1) > 1e-6  # reject the trivial solution
+
+            # Failed steps: halve the step and retry (give up below h = 1e-5)
+            failed = active[~ok]
+            h[failed] *= 0.5
+
+            # Accepted steps: new tangent, store point, adapt step size
+            good = active[ok]
+            if good.size:
+                tangent[good] = self._tangent(J[ok], ta[ok])
+                X[good] = X_new[ok]
+                for i in good:
+                    points[i].append(X[i].copy())
+                it_ok = iters[ok]
+                h[good] = np.where(it_ok <= 3, np.minimum(h[good] * 1.5, self.h_max),
+                                   np.where(it_ok > 6, h[good] * 0.7, h[good]))
+
+            # Stop once the dew branch returns to the starting pressure
+            finished = (tangent[active, nc + 1] < 0) & (X[active, nc + 1] < np.log(self.P_start))
+            finished |= (h[active] < 1e-5)
+            finished |= np.array([len(points[i]) >= self.max_points for i in active])
+            active = active[~finished]
+
+        return [self._package(p) for p in points]
+
+    def _package(self, points):
+        nc = self.eos.nc
+        if not points:
+            return {"T": np.array([]), "P": np.array([]), "branch": np.array([]),
+                    "critical": None, "cricondenbar": None, "cricondentherm": None}
+        X = np.array(points)
+        T, P = np.exp(X[:, nc]), np.exp(X[:, nc + 1])
+
+        # Critical point: where the ln K of the lightest component changes sign
+        lnK = X[:, int(np.argmin(self.eos.Tc))]
+        cross = np.flatnonzero(np.sign(lnK[1:]) != np.sign(lnK[:-1]))
+        critical, branch = None, np.full(len(X), "bubble", dtype=object)
+        if cross.size:
+            i = cross[0]
+            f = lnK[i] / (lnK[i] - lnK[i + 1])
+            critical = (T[i] + f * (T[i + 1] - T[i]), P[i] + f * (P[i + 1] - P[i]))
+            branch[i + 1:] = "dew"
+
+        return {
+            "T": T, "P": P, "branch": branch.astype(str),
+            "critical": critical,
+            "cricondenbar": (T[np.argmax(P)], P.max()),
+            "cricondentherm": (T.max(), P[np.argmax(T)]),
+        }
+
+
+class EnvelopeCache:
+    """
+    LRU cache of traced envelopes keyed by (rounded) composition, so wells
+    that share a fluid reuse the same envelope.
+    """
+
+    def __init__(self, tracer, maxsize=1024, decimals=6):
+        self.tracer = tracer
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self._store = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, z):
+        z = np.asarray(z, dtype=float)
+        return tuple(np.round(z / z.sum(), self.decimals))
+
+    def get(self, z):
+        k = self.key(z)
+        if k in self._store:
+            self._store.move_to_end(k)
+            self.hits += 1
+            return self._store[k]
+        self.misses += 1
+        env = self.tracer.trace(np.array(k))
+        self._put(k, env)
+        return env
+
+    def get_many(self, Z):
+        """Envelopes for a stack of compositions; all misses are traced in one lockstep batch."""
+        keys = [self.key(z) for z in np.atleast_2d(Z)]
+        missing = list(dict.fromkeys(k for k in keys if k not in self._store))
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        found = {k: self._store[k] for k in keys if k in self._store}
+        if missing:
+            found.update(zip(missing, self.tracer.trace_many(np.array(missing))))
+        out = [found[k] for k in keys]
+        # refresh LRU order and evict only once the batch is assembled
+        for k in keys:
+            self._store[k] = found[k]
+            self._store.move_to_end(k)
+        while len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+        return out
+
+    def _put(self, k, env):
+        self._store[k] = env
+        if len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+
+
+# ---------------------------------------------------------------------------
+# Vectorized flow regime classification
+# ---------------------------------------------------------------------------
+
+def classify_regime(T_w, P_w, envelope, chunk_size=20000):
+    """
+    Vectorized replacement of the row-wise get_flow_regime.
+
+    The envelope is treated as a closed curve: for each well temperature
+    the upper and lower saturation pressures are the max/min crossings of
+    the traced polyline with that isotherm.
+
+    Returns:
+        np.ndarray: Regime labels (same vocabulary as the notebook).
+    """
+    T_w = np.asarray(T_w, dtype=float)
+    P_w = np.asarray(P_w, dtype=float)
+    labels = np.full(T_w.shape, "Unknown", dtype=object)
+    if len(envelope["T"]) < 2:
+        return labels
+
+    T_env = np.append(envelope["T"], envelope["T"][0])
+    P_env = np.append(envelope["P"], envelope["P"][0])
+    T0, T1, P0, P1 = T_env[:-1], T_env[1:], P_env[:-1], P_env[1:]
+    t_lo, t_hi = np.minimum(T0, T1), np.maximum(T0, T1)
+    slope = np.divide(P1 - P0, T1 - T0, out=np.zeros_like(P0), where=T1 != T0)
+    T_crit = envelope["critical"][0] if envelope["critical"] else envelope["cricondenbar"][0]
+
+    for s in range(0, len(T_w), chunk_size):
+        t = T_w[s:s + chunk_size, None]
+        p = P_w[s:s + chunk_size]
+        hit = (t >= t_lo) & (t < t_hi)
+        P_cross = P0 + (t - T0) * slope
+        upper = np.where(hit, P_cross, -np.inf).max(axis=1)
+        lower = np.where(hit, P_cross, np.inf).min(axis=1)
+        any_hit = hit.any(axis=1)
+        tt = t[:, 0]
+
+        labels[s:s + chunk_size] = np.select(
+            [
+                tt < T_env.min(),
+                (tt > T_env.max()) | ~any_hit,
+                p > upper,
+                p < lower,
+            ],
+            [
+                "Too Cold (Solid/Hydrate risk)",
+                "Supercritical / Gas",
+                np.where(tt < T_crit, "Liquid (Undersaturated)", "Supercritical / Gas"),
+                "Vapor (Superheated)",
+            ],
+            default="Two-Phase",
+        )
+    return labels
+
+
+def classify_wells(df_wells, compositions, cache):
+    """
+    Classifies every well against the envelope of its own composition.
+
+    Args:
+        df_wells (pd.DataFrame): Temperature_K and Pressure_Bar columns.
+        compositions (np.ndarray): (nc,) shared or (n_wells, nc) per well.
+        cache (EnvelopeCache): Envelope cache (one trace per unique fluid).
+
+    Returns:
+        pd.Series: Regime label per well.
+    """
+    comp = np.asarray(compositions, dtype=float)
+    if comp.ndim == 1:
+        comp = np.broadcast_to(comp, (len(df_wells), len(comp)))
+    comp = comp / comp.sum(axis=1, keepdims=True)
+
+    T_w = df_wells['Temperature_K'].to_numpy(dtype=float)
+    P_w = df_wells['Pressure_Bar'].to_numpy(dtype=float)
+    labels = np.empty(len(df_wells), dtype=object)
+
+    keys = np.round(comp, cache.decimals)
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    envelopes = cache.get_many(unique)
+    for g, env in enumerate(envelopes):
+        idx = np.flatnonzero(inverse == g)
+        labels[idx] = classify_regime(T_w[idx], P_w[idx], env)
+    return pd.Series(labels, index=df_wells.index, name='Regime')
+
+
+if __name__ == "__main__":
+    import time
+
+    # Volatile oil from 01_Phase_Envelope_Generator.ipynb
+    eos = PengRobinson([190.56, 305.32, 369.83, 425.12, 469.70, 507.60],
+                       [45.99, 48.72, 42.48, 37.96, 33.70, 30.25],
+                       [0.011, 0.099, 0.152, 0.200, 0.252, 0.301])
+    z = np.array([0.40, 0.10, 0.10, 0.10, 0.10, 0.20])
+    cache = EnvelopeCache(EnvelopeTracer(eos))
+
+    start = time.perf_counter()
+    env = cache.get(z)
+    print(f"Single envelope: {len(env['T'])} points in {1e3 * (time.perf_counter() - start):.1f} ms, "
+          f"critical point {env['critical']}")
+
+    rng = np.random.default_rng(42)
+    compositions = rng.dirichlet(np.full(6, 2.0), 1000)
+    start = time.perf_counter()
+    envs = cache.get_many(compositions)
+    elapsed = time.perf_counter() - start
+    print(f"{len(envs)} envelopes in lockstep: {1e3 * elapsed / len(envs):.2f} ms per envelope")
+
+    small = EnvelopeCache(cache.tracer, maxsize=3)     # batch larger than the cache
+    again = small.get_many(np.vstack([compositions[:5], compositions[:2]]))
+    assert len(small._store) == 3 and all(a is b for a, b in zip(again[5:], again[:2]))
+
+    df_wells = pd.read_csv('well_sensor_data.csv')
+    df_wells['Regime'] = classify_wells(df_wells, z, cache)
+    print(df_wells['Regime'].value_counts())
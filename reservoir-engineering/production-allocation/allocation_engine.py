@@ -0,0 +1,409 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+ARRAYS = ("theoretical", "allocated")       # (days, wells) per month, stored column-major (one well contiguous)
+SERIES = ("fiscal", "factor")               # (days,) per month
+_KEY = 1 << 22                              # well * _KEY + day keys for searches over (well, day)
+
+
+class AllocationStore:
+    """
+    Daily pro-rata back-allocation with an incremental, month-partitioned store.
+
+    The results are the same as the notebook's full recompute:
+    - theoretical rates are tests linearly interpolated per well, held
+      constant before the first and after the last test;
+    - the allocation factor is K_t = fiscal_t / sum_i q_est,i,t;
+    - allocated volumes are q_est,i,t * K_t;
+    - zone volumes are allocated @ zone splits.
+
+    Every array is kept on disk in one directory per calendar month
+    (`YYYY-MM/theoretical.npy`, ...).
+
+    update() works out which days new or corrected fiscal days and well
+    tests actually change, then rewrites only the months containing them:
+    - a test changes its well's interpolation between the neighbouring
+      tests, or up to the first/last day when it is the first/last test;
+    - that changes the totals, factors and allocations of those days for
+      every well.
+    Tests dated after the last fiscal day wait until the fiscal range
+    reaches them, as the notebook's reindex onto fiscal dates does.
+
+    Args:
+        path (str): Store directory (see AllocationStore.build to create one).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.start = pd.Timestamp(meta["start"])
+        self.n_days = meta["n_days"]
+        self.wells = meta["wells"]
+        self.zones = meta["zones"]
+        t = np.load(os.path.join(path, "tests.npz"))
+        self.test_well, self.test_day, self.test_rate = t["well"], t["day"], t["rate"]
+        self.splits = np.load(os.path.join(path, "zone_splits.npy"))
+
+    # -- construction --------------------------------------------------------
+
+    @classmethod
+    def build(cls, path, fiscal, tests, zone_splits):
+        """
+        Create a store from the full history (the one-off initial load).
+
+        Args:
+            fiscal (pd.DataFrame): Date, Fiscal_Meter_BOPD (as production_daily.csv).
+            tests (pd.DataFrame): Date, Well_ID, Test_Rate_BOPD (as well_tests.csv).
+            zone_splits (pd.DataFrame): Well_ID plus one column per zone (as well_zone_splits.csv).
+        """
+        os.makedirs(path, exist_ok=True)
+        meta = {"start": str(pd.Timestamp(fiscal["Date"].min()).date()), "n_days": 0, "wells": [],
+                "zones": [c for c in zone_splits.columns if c != "Well_ID"]}
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        np.savez(os.path.join(path, "tests.npz"), well=np.zeros(0, np.int64), day=np.zeros(0, np.int64),
+                 rate=np.zeros(0))
+        np.save(os.path.join(path, "zone_splits.npy"), np.zeros((0, len(meta["zones"]))))
+        store = cls(path)
+        store._zone_table = zone_splits
+        store.update(fiscal=fiscal, tests=tests)
+        return store
+
+    def set_zone_splits(self, zone_splits, recompute=True):
+        """Replace the zone split table; zone volumes of every month are recomputed (matrix product only)."""
+        self._zone_table = zone_splits
+        self._align_splits()
+        self._save_meta()
+        if recompute:
+            for month in self._months(np.arange(self.n_days)):
+                part = self._load(month)
+                part["zones"] = np.nan_to_num(part["allocated"]) @ self.splits
+                self._save(month, part)
+
+    # -- incremental update --------------------------------------------------
+
+    def update(self, fiscal=None, tests=None):
+        """
+        Apply new or corrected fiscal days and/or well tests, recomputing only the affected days.
+
+        Returns:
+            dict: days and month partitions recomputed.
+        """
+        old_end = self.n_days - 1
+        affected = []
+
+        fiscal_days = fiscal_vals = None
+        if fiscal is not None and len(fiscal):
+            fiscal_days = (pd.to_datetime(fiscal["Date"]) - self.start).dt.days.to_numpy()
+            if (fiscal_days < 0).any():
+                raise ValueError(f"fiscal dates before the store start {self.start.date()}")
+            fiscal_vals = fiscal["Fiscal_Meter_BOPD"].to_numpy(float)
+            self.n_days = max(self.n_days, int(fiscal_days.max()) + 1)
+            affected.append((fiscal_days, fiscal_days))
+        new_end = self.n_days - 1
+        if new_end > old_end:
+            affected.append((np.array([old_end + 1]), np.array([new_end])))
+
+        changed_w = np.zeros(0, np.int64)
+        changed_d = np.zeros(0, np.int64)
+        if tests is not None and len(tests):
+            changed_w, changed_d = self._merge_tests(tests)
+        if new_end > old_end:                                        # pending tests the fiscal range now reaches
+            pending = (self.test_day > old_end) & (self.test_day <= new_end)
+            changed_w = np.concatenate([changed_w, self.test_well[pending]])
+            changed_d = np.concatenate([changed_d, self.test_day[pending]])
+        if len(changed_w):
+            affected.append(self._spans(changed_w, changed_d, new_end))
+        self._align_splits()
+        self._save_meta()
+        if not affected:
+            return {"days": 0, "partitions": 0}
+
+        mask = np.zeros(self.n_days + 1, dtype=np.int64)              # union of [lo, hi] day intervals
+        for lo, hi in affected:
+            np.add.at(mask, lo, 1)
+            np.add.at(mask, hi + 1, -1)
+        days = np.flatnonzero(np.cumsum(mask)[:-1] > 0)
+        months = self._months(days)
+        table = self._test_table()
+        for month, (first, last) in months.items():
+            part = self._load(month)
+            if fiscal_days is not None:
+                sel = (fiscal_days >= first) & (fiscal_days <= last)
+                part["fiscal"][fiscal_days[sel] - first] = fiscal_vals[sel]
+            local = days[(days >= first) & (days <= last)] - first
+            theo = self._interpolate(local + first, table)
+            total = np.nansum(theo, axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                factor = part["fiscal"][local] / total
+            part["theoretical"][local] = theo
+            part["factor"][local] = factor
+            part["allocated"][local] = theo * factor[:, None]
+            part["zones"][local] = np.nan_to_num(part["allocated"][local]) @ self.splits
+            self._save(month, part)
+        return {"days": len(days), "partitions": len(months)}
+
+    def _merge_tests(self, tests):
+        """Insert/replace tests; returns (well, day) of tests whose rate is new or changed."""
+        ids = tests["Well_ID"].to_numpy()
+        known = pd.Index(self.wells)
+        self.wells += [x for x in pd.unique(ids) if x not in known]
+        w = pd.Index(self.wells).get_indexer(ids).astype(np.int64)
+        d = (pd.to_datetime(tests["Date"]) - self.start).dt.days.to_numpy().astype(np.int64)
+        r = tests["Test_Rate_BOPD"].to_numpy(float)
+
+        old_key = self.test_well * _KEY + self.test_day
+        new_key = w * _KEY + d
+        same = np.zeros(len(new_key), dtype=bool)
+        if len(old_key):
+            pos = np.minimum(np.searchsorted(old_key, new_key), len(old_key) - 1)
+            same = (old_key[pos] == new_key) & (self.test_rate[pos] == r)
+
+        key = np.concatenate([old_key, new_key])
+        rate = np.concatenate([self.test_rate, r])
+        order = np.argsort(key, kind="stable")
+        key, rate = key[order], rate[order]
+        last = np.append(key[1:] != key[:-1], True)                    # a later test on the same day replaces it
+        key, rate = key[last], rate[last]
+        self.test_well, self.test_day, self.test_rate = key // _KEY, key % _KEY, rate
+        np.savez(os.path.join(self.path, "tests.npz"), well=self.test_well, day=self.test_day, rate=self.test_rate)
+        return w[~same], d[~same]
+
+    def _spans(self, w, d, end):
+        """Day interval [lo, hi] whose interpolation a test at (w, d) influences, given active tests <= end."""
+        active = self.test_day <= end
+        key = (self.test_well * _KEY + self.test_day)[active]
+        q = w * _KEY + d
+        prev = np.searchsorted(key, q, side="left") - 1
+        nxt = np.searchsorted(key, q, side="right")
+        has_prev = (prev >= 0) & (key[np.maximum(prev, 0)] // _KEY == w)
+        has_next = (nxt < len(key)) & (key[np.minimum(nxt, len(key) - 1)] // _KEY == w)
+        lo = np.where(has_prev, key[np.maximum(prev, 0)] % _KEY + 1, 0)
+        hi = np.where(has_next, key[np.minimum(nxt, len(key) - 1)] % _KEY - 1, end)
+        keep = d <= end
+        return lo[keep], np.maximum(hi[keep], lo[keep])
+
+    # -- computation ---------------------------------------------------------
+
+    def _test_table(self):
+        """Active tests (dated within the fiscal range) with the slope to each well's next test."""
+        active = self.test_day <= self.n_days - 1
+        tw, td, tr = self.test_well[active], self.test_day[active], self.test_rate[active]
+        same_well = tw[1:] == tw[:-1]
+        slope = np.zeros(len(tr))
+        slope[:-1] = np.where(same_well, (tr[1:] - tr[:-1]) / np.where(same_well, td[1:] - td[:-1], 1), 0.0)
+        wells = np.arange(len(self.wells))
+        return {"key": tw * _KEY + td, "day": td, "rate": tr, "slope": slope,
+                "start": np.searchsorted(tw, wells, side="left"), "end": np.searchsorted(tw, wells, side="right")}
+
+    @staticmethod
+    def _interpolate(days, table):
+        """(len(days), n_wells) theoretical rates: linear between tests, constant outside (NaN without tests)."""
+        start, end = table["start"][:, None], table["end"][:, None]
+        if len(table["key"]) == 0:
+            return np.full((len(days), len(start)), np.nan)
+        q = np.arange(len(start))[:, None] * _KEY + days[None, :]   # (wells, days): sorted queries
+        lo = np.searchsorted(table["key"], q.ravel(), side="right").reshape(q.shape) - 1
+        before = lo < start                                          # ahead of the first test: hold it
+        idx = np.minimum(np.maximum(lo, start), len(table["key"]) - 1)
+        out = table["rate"][idx] + np.where(before, 0.0, table["slope"][idx] * (days[None, :] - table["day"][idx]))
+        out[(end == start).ravel()] = np.nan
+        return out.T
+
+    # -- storage -------------------------------------------------------------
+
+    def _align_splits(self):
+        table = getattr(self, "_zone_table", None)
+        if table is not None:
+            z = table.set_index("Well_ID").reindex(self.wells)[self.zones]
+            self.splits = z.fillna(0.0).to_numpy(float)              # wells without splits add to no zone
+        elif len(self.splits) < len(self.wells):
+            self.splits = np.vstack([self.splits, np.zeros((len(self.wells) - len(self.splits), len(self.zones)))])
+        np.save(os.path.join(self.path, "zone_splits.npy"), self.splits)
+
+    def _save_meta(self):
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump({"start": str(self.start.date()), "n_days": self.n_days, "wells": self.wells,
+                       "zones": self.zones}, f)
+
+    def _months(self, days):
+        """{'YYYY-MM': (first_day, last_day)} for the month partitions containing `days`."""
+        dates = self.start + pd.to_timedelta(np.asarray(days), unit="D")
+        out = {}
+        for period in pd.PeriodIndex(dates, freq="M").unique():
+            first = max((period.start_time - self.start).days, 0)
+            last = min((period.end_time.normalize() - self.start).days, self.n_days - 1)
+            out[str(period)] = (first, last)
+        return out
+
+    def _load(self, month):
+        """Month partition padded to the current day span and well count (new rows/columns are NaN)."""
+        first, last = self._months([self._month_first_day(month)])[month]
+        n, m = last - first + 1, len(self.wells)
+        folder = os.path.join(self.path, month)
+        part = {}
+        for name in ARRAYS + SERIES + ("zones",):
+            file = os.path.join(folder, f"{name}.npy")
+            shape = (n, m) if name in ARRAYS else (n, len(self.zones)) if name == "zones" else (n,)
+            full = np.full(shape, 0.0 if name == "zones" else np.nan, order="F")
+            if os.path.exists(file):
+                old = np.load(file)
+                full[tuple(slice(0, k) for k in old.shape)] = old
+            part[name] = full
+        return part
+
+    def _month_first_day(self, month):
+        return max((pd.Period(month, freq="M").start_time - self.start).days, 0)
+
+    def _save(self, month, part):
+        folder = os.path.join(self.path, month)
+        os.makedirs(folder, exist_ok=True)
+        for name, arr in part.items():
+            tmp = os.path.join(folder, f".{name}.tmp.npy")
+            np.save(tmp, np.asfortranarray(arr))
+            os.replace(tmp, os.path.join(folder, f"{name}.npy"))
+
+    # -- reading -------------------------------------------------------------
+
+    def read(self, kind="allocated", start=None, end=None, wells=None):
+        """
+        One stored quantity as a Date-indexed DataFrame.
+
+        Args:
+            kind (str): 'theoretical' or 'allocated' (wells as columns), 'zones', 'fiscal' or 'factor'.
+            start, end: Date range (inclusive); default the whole history.
+            wells (list): Subset of wells for the per-well arrays.
+        """
+        first = 0 if start is None else max((pd.Timestamp(start) - self.start).days, 0)
+        last = self.n_days - 1 if end is None else min((pd.Timestamp(end) - self.start).days, self.n_days - 1)
+        cols = None if wells is None else pd.Index(self.wells).get_indexer(wells)
+        blocks = []
+        for month, (m0, m1) in self._months(np.arange(first, last + 1)).items():
+            part = self._load(month)[kind][max(first, m0) - m0:min(last, m1) - m0 + 1]
+            blocks.append(part[:, cols] if cols is not None and kind in ARRAYS else part)
+        data = np.concatenate(blocks) if blocks else np.zeros((0,))
+        index = pd.Index(self.start + pd.to_timedelta(np.arange(first, last + 1), unit="D"), name="Date")
+        if kind in ARRAYS:
+            return pd.DataFrame(data, index=index, columns=wells if wells is not None else self.wells)
+        if kind == "zones":
+            return pd.DataFrame(data, index=index, columns=self.zones)
+        return pd.Series(data, index=index, name=kind)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def _notebook_allocation(df_fiscal, df_tests, df_zones):
+    """The notebook's full recompute (reference for parity and timing)."""
+    master_df = pd.DataFrame({"Date": df_fiscal["Date"]})
+    df_tests_pivot = df_tests.pivot(index="Date", columns="Well_ID", values="Test_Rate_BOPD")
+    df_theoretical = df_tests_pivot.reindex(master_df["Date"]).interpolate(method="linear", limit_direction="both")
+    df_theoretical["Theoretical_Total"] = df_theoretical.sum(axis=1)
+    df_calc = pd.merge(df_fiscal, df_theoretical["Theoretical_Total"], on="Date")
+    df_calc["Allocation_Factor"] = df_calc["Fiscal_Meter_BOPD"] / df_calc["Theoretical_Total"]
+    df_allocated = df_theoretical.drop(columns=["Theoretical_Total"]).multiply(df_calc["Allocation_Factor"].values,
+                                                                              axis=0)
+    zones = [c for c in df_zones.columns if c != "Well_ID"]
+    zone_production = df_allocated @ df_zones.set_index("Well_ID").loc[df_allocated.columns, zones]
+    return df_allocated, zone_production
+
+
+def make_field(n_wells=6_000, years=20, seed=0):
+    """Synthetic fiscal, test and zone-split tables in the layout of 01_Dataset_Creation.ipynb."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2006-01-01", periods=365 * years, freq="D")
+    n_tests = -(-len(dates) // 30)
+    day = np.arange(n_tests)[None, :] * 30 + rng.integers(0, 30, (n_wells, n_tests))
+    qi = rng.uniform(100, 1_000, n_wells)[:, None]
+    decline = rng.uniform(1e-4, 5e-4, n_wells)[:, None]
+    rate = np.round(qi * np.exp(-decline * day) * rng.normal(1, 0.05, day.shape), 2)
+    keep = (day < len(dates)).ravel()
+    tests = pd.DataFrame({"Date": dates[day.ravel()[keep]],
+                          "Well_ID": np.repeat([f"W{i:05d}" for i in range(n_wells)], n_tests)[keep],
+                          "Test_Rate_BOPD": rate.ravel()[keep]})
+    total = (qi * np.exp(-decline * np.arange(len(dates))[None, :])).sum(axis=0)
+    fiscal = pd.DataFrame({"Date": dates, "Fiscal_Meter_BOPD": np.round(total * rng.normal(0.98, 0.04, len(dates)), 2)})
+    splits = rng.dirichlet(np.ones(4), n_wells)
+    zones = pd.DataFrame(splits, columns=["Zone_A", "Zone_B", "Zone_C", "Zone_D"]).assign(
+        Well_ID=[f"W{i:05d}" for i in range(n_wells)])[["Well_ID", "Zone_A", "Zone_B", "Zone_C", "Zone_D"]]
+    return fiscal, tests, zones
+
+
+def benchmark(n_wells=6_000, years=20, store_path=None):
+    """
+    Parity with the notebook (full and incremental), then a 6,000-well / 20-year morning update.
+
+    The scale store (~700 MB) goes to a temp dir that is removed afterwards,
+    unless store_path is given (it is then rebuilt from empty and kept).
+    """
+    import shutil
+    import tempfile
+
+    fiscal = pd.read_csv("production_daily.csv", parse_dates=["Date"])
+    tests = pd.read_csv("well_tests.csv", parse_dates=["Date"])
+    zones = pd.read_csv("well_zone_splits.csv")
+    ref_alloc, ref_zones = _notebook_allocation(fiscal, tests, zones)
+
+    tmp = tempfile.mkdtemp()
+    try:
+        full = AllocationStore.build(os.path.join(tmp, "full"), fiscal, tests, zones)
+        alloc = full.read("allocated")[ref_alloc.columns]
+        print(f"Full build vs notebook: allocated max |diff| {np.nanmax(np.abs(alloc.to_numpy() - ref_alloc.to_numpy())):.1e}, "
+              f"zones max |diff| {np.abs(full.read('zones').to_numpy() - ref_zones.to_numpy()).max():.1e} bbl/d")
+
+        # Replay: history up to a cut-off, then one fiscal day (and its tests) at a time
+        cut = fiscal["Date"].iloc[-60]
+        inc = AllocationStore.build(os.path.join(tmp, "inc"), fiscal[fiscal.Date < cut], tests[tests.Date < cut], zones)
+        stats = []
+        for day in fiscal.Date[fiscal.Date >= cut]:
+            stats.append(inc.update(fiscal=fiscal[fiscal.Date == day], tests=tests[tests.Date == day])["days"])
+        diff = np.nanmax(np.abs(inc.read("allocated")[ref_alloc.columns].to_numpy() - ref_alloc.to_numpy()))
+        print(f"Incremental replay of 60 days: allocated max |diff| vs notebook {diff:.1e}; "
+              f"median {np.median(stats):.0f} days recomputed per update")
+    finally:
+        shutil.rmtree(tmp)
+
+    # Scale: initial build, then a typical morning (one fiscal day + the week's test reports)
+    fiscal, tests, zones = make_field(n_wells, years)
+    last = fiscal.Date.iloc[-1]
+    late = tests.Date > last - pd.Timedelta(days=7)
+    start = time.perf_counter()
+    _notebook_allocation(fiscal, tests, zones)
+    t_nb = time.perf_counter() - start
+    workdir = store_path or tempfile.mkdtemp()
+    shutil.rmtree(workdir, ignore_errors=True)     # always start from an empty store
+    try:
+        start = time.perf_counter()
+        store = AllocationStore.build(workdir, fiscal.iloc[:-1], tests[~late], zones)
+        t_build = time.perf_counter() - start
+        start = time.perf_counter()
+        stats = store.update(fiscal=fiscal.iloc[-1:], tests=tests[late])
+        t_update = time.perf_counter() - start
+        print(f"{n_wells:,} wells x {years} years: notebook full recompute {t_nb:.1f} s, "
+              f"initial build {t_build:.1f} s; "
+              f"morning update ({late.sum()} tests + 1 fiscal day) {t_update:.2f} s, "
+              f"{stats['days']} days in {stats['partitions']} partitions recomputed")
+        corrected = tests[tests.Date == fiscal.Date.iloc[len(fiscal) // 2]].iloc[:1].assign(
+            Test_Rate_BOPD=lambda d: d.Test_Rate_BOPD * 1.1)
+        start = time.perf_counter()
+        stats = store.update(tests=corrected)
+        print(f"Correct one {corrected.Date.iloc[0].date()} test: {time.perf_counter() - start:.2f} s, "
+              f"{stats['days']} days in {stats['partitions']} partitions recomputed")
+        start = time.perf_counter()
+        zones_month = store.read("zones", last - pd.Timedelta(days=29), last)
+        print(f"Read last 30 days of zone volumes: {(time.perf_counter() - start) * 1e3:.0f} ms "
+              f"({zones_month.iloc[-1].round(0).to_dict()})")
+    finally:
+        if store_path is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return zones_month
+
+
+if __name__ == "__main__":
+    benchmark()
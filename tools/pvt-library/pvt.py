@@ -0,0 +1,472 @@
+import hashlib
+import inspect
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+TABLE_VERSION = 1          # bump when a correlation changes, so cached tables are rebuilt
+
+
+# ---------------------------------------------------------------------------
+# Bubble point (the pvt-benchmarking / hybrid-physics-model correlations)
+# ---------------------------------------------------------------------------
+
+def pb_standing(rs, temp_f, api, sg_gas):
+    """Standing bubble point (psia): 18.2 * ((Rs / yg)^0.83 * 10^(0.00091 T - 0.0125 API) - 1.4)."""
+    rs, temp_f, api, sg_gas = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (rs, temp_f, api, sg_gas)))
+    return 18.2 * ((rs / sg_gas) ** 0.83 * 10 ** (0.00091 * temp_f - 0.0125 * api) - 1.4)
+
+
+def pb_vasquez_beggs(rs, temp_f, api, sg_gas):
+    """Vasquez-Beggs bubble point (psia), with the API <= 30 / > 30 constant sets chosen per element."""
+    rs, temp_f, api, sg_gas = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (rs, temp_f, api, sg_gas)))
+    heavy = api <= 30
+    c1 = np.where(heavy, 27.624, 56.18)
+    c2 = np.where(heavy, 0.914328, 0.84246)
+    c3 = np.where(heavy, 11.172, 10.393)
+    return (c1 * rs / (sg_gas * np.exp(c3 * api / (temp_f + 460)))) ** (1 / c2)
+
+
+def pb_glaso(rs, temp_f, api, sg_gas):
+    """Glaso bubble point (psia): log Pb = 1.7669 + 1.7447 log A - 0.30218 (log A)^2."""
+    rs, temp_f, api, sg_gas = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (rs, temp_f, api, sg_gas)))
+    log_a = np.log10((rs / sg_gas) ** 0.816 * temp_f ** 0.172 * api ** -0.989)
+    return 10 ** (1.7669 + 1.7447 * log_a - 0.30218 * log_a ** 2)
+
+
+# ---------------------------------------------------------------------------
+# Oil properties
+# ---------------------------------------------------------------------------
+
+def rs_standing(p, temp_f, api, sg_gas, rsb=None):
+    """Standing solution GOR (scf/STB) at pressure p, capped at rsb (the total GOR) above the bubble point."""
+    p = np.asarray(p, dtype=float)
+    rs = sg_gas * ((p / 18.2 + 1.4) * 10 ** (0.0125 * api - 0.00091 * np.asarray(temp_f, dtype=float))) ** (1 / 0.83)
+    return rs if rsb is None else np.minimum(rs, rsb)
+
+
+def bo_standing(rs, temp_f, api, sg_gas):
+    """Standing saturated oil FVF (bbl/STB)."""
+    sg_oil = 141.5 / (131.5 + np.asarray(api, dtype=float))
+    return 0.9759 + 0.00012 * (rs * np.sqrt(sg_gas / sg_oil) + 1.25 * np.asarray(temp_f, dtype=float)) ** 1.2
+
+
+def bo(p, temp_f, api, sg_gas, rsb):
+    """
+    Oil FVF (bbl/STB) for a black oil of total GOR rsb: Standing below the
+    bubble point, Vasquez-Beggs compressibility shrinkage above it.
+    """
+    p, temp_f = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(temp_f, dtype=float))
+    pb = pb_standing(rsb, temp_f, api, sg_gas)
+    bo_sat = bo_standing(rs_standing(np.minimum(p, pb), temp_f, api, sg_gas, rsb), temp_f, api, sg_gas)
+    a = (-1433 + 5 * rsb + 17.2 * temp_f - 1180 * sg_gas + 12.61 * api) / 1e5
+    return np.where(p > pb, bo_sat * np.exp(-a * np.log(np.maximum(p, pb) / pb)), bo_sat)
+
+
+def dead_oil_viscosity(api, temp_f):
+    """Simplified dead-oil viscosity (cp) of fbhp-calculation's calc_oil_viscosity; oil_viscosity uses Beggs-Robinson."""
+    return 1.8653e6 * np.power(np.asarray(api, dtype=float), -2.22) * np.power(np.asarray(temp_f, dtype=float), -0.7931)
+
+
+def oil_viscosity(p, temp_f, api, sg_gas, rsb):
+    """
+    Live-oil viscosity (cp): Beggs-Robinson dead and saturated oil, Vasquez-Beggs above the bubble point.
+    """
+    p, temp_f = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(temp_f, dtype=float))
+    x = temp_f ** -1.163 * np.exp(6.9824 - 0.04658 * api)
+    mu_od = 10 ** x - 1
+    pb = pb_standing(rsb, temp_f, api, sg_gas)
+    rs = rs_standing(np.minimum(p, pb), temp_f, api, sg_gas, rsb)
+    mu_sat = 10.715 * (rs + 100) ** -0.515 * mu_od ** (5.44 * (rs + 150) ** -0.338)
+    m = 2.6 * p ** 1.187 * np.exp(-11.513 - 8.98e-5 * p)
+    return np.where(p > pb, mu_sat * (np.maximum(p, pb) / pb) ** m, mu_sat)
+
+
+def surface_tension(api, temp_f, p_psi):
+    """Baker-Swerdloff oil surface tension (dyne/cm), as in fbhp-calculation, floored at 1."""
+    sigma_68 = 39 - 0.2571 * np.asarray(api, dtype=float)
+    sigma_100 = 37.5 - 0.2571 * np.asarray(api, dtype=float)
+    temp_f = np.asarray(temp_f, dtype=float)
+    sigma_t = np.where(temp_f > 68, sigma_68 - (temp_f - 68) * (sigma_68 - sigma_100) / 32, sigma_68)
+    return np.maximum(1.0, sigma_t * (1 - 0.002 * np.asarray(p_psi, dtype=float)))
+
+
+# ---------------------------------------------------------------------------
+# Gas properties
+# ---------------------------------------------------------------------------
+
+_DAK = (0.3265, -1.0700, -0.5339, 0.01569, -0.05165, 0.5475, -0.7361, 0.1844, 0.1056, 0.6134, 0.7210)
+
+
+def z_factor(p, temp_f, sg_gas, tol=1e-12, max_iter=50):
+    """
+    Dranchuk-Abou-Kassem gas deviation factor with Sutton pseudo-critical properties.
+
+    The reduced density equation is solved by Newton's method for all points
+    at once; converged points are frozen so the loop ends with the slowest one.
+    """
+    a1, a2, a3, a4, a5, a6, a7, a8, a9, a10, a11 = _DAK
+    p, temp_f = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(temp_f, dtype=float))
+    shape, p, temp_f = p.shape, p.ravel(), temp_f.ravel()
+    tpc = 169.2 + 349.5 * sg_gas - 74.0 * sg_gas ** 2
+    ppc = 756.8 - 131.0 * sg_gas - 3.6 * sg_gas ** 2
+    tpr, ppr = (temp_f + 460) / tpc, p / ppc
+    c1 = a1 + a2 / tpr + a3 / tpr ** 3 + a4 / tpr ** 4 + a5 / tpr ** 5
+    c2 = a6 + a7 / tpr + a8 / tpr ** 2
+    c3 = a9 * (a7 / tpr + a8 / tpr ** 2)
+    c4 = a10 / tpr ** 3
+    k = 0.27 * ppr / tpr
+
+    rho = k.copy()                                   # z = 1 start
+    active = p > 0
+    for _ in range(max_iter):
+        r = rho[active]
+        kk, e = k[active], np.exp(-a11 * r ** 2)
+        f = 1 + c1[active] * r + c2[active] * r ** 2 - c3[active] * r ** 5 \
+            + c4[active] * r ** 2 * (1 + a11 * r ** 2) * e - kk / r
+        df = c1[active] + 2 * c2[active] * r - 5 * c3[active] * r ** 4 \
+            + c4[active] * e * (2 * r + 2 * a11 * r ** 3 - 2 * a11 ** 2 * r ** 5) + kk / r ** 2
+        step = f / df
+        rho[active] = np.maximum(r - step, 0.5 * r)
+        done = np.abs(step) < tol * np.maximum(r, 1e-12)
+        active[np.flatnonzero(active)[done]] = False
+        if not active.any():
+            break
+    return np.where(p > 0, k / np.maximum(rho, 1e-300), 1.0).reshape(shape)
+
+
+def gas_fvf(p, temp_f, z):
+    """Gas FVF (bbl/scf), 0 at p == 0 (fbhp-calculation's calc_bg with T in F)."""
+    p = np.asarray(p, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(p == 0, 0.0, 0.005035 * z * (np.asarray(temp_f, dtype=float) + 460) / p)
+
+
+def gas_density(p, temp_f, sg_gas, z):
+    """Gas density (lb/ft3) = 2.7 p yg / (z T)."""
+    return 2.7 * np.asarray(p, dtype=float) * sg_gas / (z * (np.asarray(temp_f, dtype=float) + 460))
+
+
+def gas_viscosity(temp_f, sg_gas, rho_g):
+    """
+    Lee-Gonzalez-Eakin gas viscosity (cp) from density in lb/ft3.
+
+    fbhp-calculation's calc_gas_viscosity misplaces the molecular weight in K
+    and drops the 1e-4 factor, reading roughly 20x high. This is the
+    published form.
+    """
+    t_r = np.asarray(temp_f, dtype=float) + 460
+    mw = 28.97 * sg_gas
+    k = (9.4 + 0.02 * mw) * t_r ** 1.5 / (209 + 19 * mw + t_r)
+    x = 3.5 + 986 / t_r + 0.01 * mw
+    return 1e-4 * k * np.exp(x * (np.asarray(rho_g, dtype=float) / 62.4) ** (2.4 - 0.2 * x))
+
+
+# ---------------------------------------------------------------------------
+# Per-fluid evaluation and (p, T) lookup tables
+# ---------------------------------------------------------------------------
+
+PROPERTIES = ("rs", "bo", "mu_o", "z", "bg", "rho_g", "mu_g")
+_LOG_COLUMNS = ("mu_o", "mu_g")      # tabulated as ln(mu): viscosities vary exponentially with T
+
+
+def fluid_properties(p, temp_f, api, sg_gas, rsb, properties=PROPERTIES):
+    """
+    Direct evaluation of black-oil properties for one fluid at arrays of p (psia) and T (F).
+
+    Returns:
+        dict: {property: np.ndarray} for the requested names in PROPERTIES.
+    """
+    p, temp_f = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(temp_f, dtype=float))
+    out = {}
+    if "rs" in properties:
+        out["rs"] = rs_standing(np.minimum(p, pb_standing(rsb, temp_f, api, sg_gas)), temp_f, api, sg_gas, rsb)
+    if "bo" in properties:
+        out["bo"] = bo(p, temp_f, api, sg_gas, rsb)
+    if "mu_o" in properties:
+        out["mu_o"] = oil_viscosity(p, temp_f, api, sg_gas, rsb)
+    if {"z", "bg", "rho_g", "mu_g"} & set(properties):
+        z = z_factor(p, temp_f, sg_gas)
+        rho_g = gas_density(p, temp_f, sg_gas, z)
+        out.update({"z": z, "bg": gas_fvf(p, temp_f, z), "rho_g": rho_g,
+                    "mu_g": gas_viscosity(temp_f, sg_gas, rho_g)})
+    return {name: out[name] for name in properties}
+
+
+class PVTTable:
+    """
+    Black-oil properties of one fluid tabulated on a uniform (ln(p/pb), T) grid and read back by bilinear interpolation.
+
+    The pressure axis is ln(p / pb(T)) with the bubble point on a grid line.
+    The saturated/undersaturated kink of rs, bo and mu_o therefore never cuts
+    through a cell, and nodes are densest at low pressure. Viscosities are
+    stored as ln(mu). bg and rho_g are computed exactly from the interpolated z.
+
+    Lookups find their cell by index arithmetic, with no search. All
+    requested properties share that one cell lookup. Points outside
+    p_range/t_range fall back to direct evaluation.
+
+    At build time every cell centre is evaluated directly and compared with
+    the interpolated value. The worst absolute and relative deviations per
+    property are stored in `error_`. While any relative error exceeds `rtol`,
+    the axis with the larger edge-midpoint error is refined by halving its
+    spacing, up to `max_points` nodes. Tables are cached on disk under a hash
+    of the fluid, the grid arguments and TABLE_VERSION, so a fluid is
+    tabulated once and reloaded afterwards.
+
+    Args:
+        api, sg_gas, rsb (float): Oil gravity (API), gas gravity, total GOR (scf/STB).
+        p_range, t_range (tuple): Grid bounds (psia, F).
+        n_p, n_t (int): Initial grid nodes along pressure and temperature.
+        rtol (float): Target max relative interpolation error at cell centres.
+        max_points (int): Largest grid (n_p * n_t) refinement may reach.
+        properties (tuple): Names from PROPERTIES to tabulate.
+    """
+
+    def __init__(self, api, sg_gas, rsb, p_range=(14.7, 6_000.0), t_range=(60.0, 350.0), n_p=256, n_t=64,
+                 rtol=1e-3, max_points=4_000_000, properties=PROPERTIES):
+        self.fluid = {"api": float(api), "sg_gas": float(sg_gas), "rsb": float(rsb)}
+        self.p_range, self.t_range = tuple(map(float, p_range)), tuple(map(float, t_range))
+        self.properties = tuple(properties)
+        self.rtol = rtol
+        while True:
+            self._build(n_p, n_t)
+            if max(e[1] for e in self.error_.values()) <= rtol or 2 * n_p * n_t > max_points:
+                break
+            if self._axis_error[0] >= self._axis_error[1]:
+                n_p = 2 * n_p - 1
+            else:
+                n_t = 2 * n_t - 1
+
+    @property
+    def columns(self):
+        """Stored columns: bg and rho_g are derived from z (bg ~ 1/p interpolates poorly near atmospheric)."""
+        cols = [k for k in self.properties if k not in ("bg", "rho_g")]
+        if "z" not in cols and len(cols) < len(self.properties):
+            cols.append("z")
+        return tuple(cols)
+
+    def _pb(self, temp_f):
+        return pb_standing(self.fluid["rsb"], temp_f, self.fluid["api"], self.fluid["sg_gas"])
+
+    def _build(self, n_p, n_t):
+        # Pressure axis is x = ln(p / pb(T)) with x = 0 on a node, so the saturated/undersaturated
+        # kink of rs, bo and mu_o falls on a grid line, and nodes crowd towards low pressure
+        # where rs, mu_o and bg ~ 1/p change fastest relative to their value.
+        pb = self._pb(np.array(self.t_range))
+        x_lo, x_hi = np.log(self.p_range[0] / pb.max()), np.log(self.p_range[1] / pb.min())
+        below = max(1, int(round((n_p - 1) * -x_lo / (x_hi - x_lo))))
+        dx = -x_lo / below
+        self.x = x_lo + dx * np.arange(below + int(np.ceil(x_hi / dx - 1e-9)) + 1)
+        self.t = np.linspace(*self.t_range, n_t)
+        xx, tt = np.meshgrid(self.x, self.t, indexing="ij")
+        values = fluid_properties(np.exp(xx) * self._pb(tt), tt, properties=self.columns, **self.fluid)
+        self.values = np.stack([np.log(values[k]) if k in _LOG_COLUMNS else values[k]
+                                for k in self.columns])                                 # (n_col, n_x, n_t)
+        # cell-centre check of the bilinear interpolant
+        xc, tc = np.meshgrid((self.x[1:] + self.x[:-1]) / 2, (self.t[1:] + self.t[:-1]) / 2, indexing="ij")
+        pc = np.exp(xc) * self._pb(tc)
+        exact = fluid_properties(pc, tc, properties=self.properties, **self.fluid)
+        approx = self._derive(pc, tc, (self.values[:, 1:, 1:] + self.values[:, :-1, 1:]
+                                       + self.values[:, 1:, :-1] + self.values[:, :-1, :-1]) / 4, self.properties)
+        self.error_ = {}
+        for name in self.properties:
+            diff = np.abs(approx[name] - exact[name])
+            self.error_[name] = (float(diff.max()), float((diff / np.maximum(np.abs(exact[name]), 1e-30)).max()))
+        # edge midpoints along each axis tell refinement which axis to split
+        self._axis_error = []
+        for axis in (0, 1):
+            xe, te = (((g[1:] + g[:-1]) / 2 if k == axis else g) for k, g in enumerate((self.x, self.t)))
+            xe, te = np.meshgrid(xe, te, indexing="ij")
+            pe = np.exp(xe) * self._pb(te)
+            lo = [slice(None)] * 3
+            hi = [slice(None)] * 3
+            lo[axis + 1], hi[axis + 1] = slice(None, -1), slice(1, None)
+            exact = fluid_properties(pe, te, properties=self.properties, **self.fluid)
+            approx = self._derive(pe, te, (self.values[tuple(lo)] + self.values[tuple(hi)]) / 2, self.properties)
+            self._axis_error.append(max(
+                float((np.abs(approx[n] - exact[n]) / np.maximum(np.abs(exact[n]), 1e-30)).max())
+                for n in self.properties))
+
+    def _derive(self, p, temp_f, v, names):
+        out = {n: v[self.columns.index(n)] for n in names if n in self.columns}
+        for n in _LOG_COLUMNS:
+            if n in out:
+                out[n] = np.exp(out[n])
+        if "bg" in names or "rho_g" in names:
+            z = v[self.columns.index("z")]
+            if "bg" in names:
+                out["bg"] = gas_fvf(p, temp_f, z)
+            if "rho_g" in names:
+                out["rho_g"] = gas_density(p, temp_f, self.fluid["sg_gas"], z)
+        return {n: out[n] for n in names}
+
+    def __call__(self, p, temp_f, properties=None):
+        """
+        Interpolated properties at arrays of p (psia) and T (F).
+
+        Returns:
+            dict: {property: np.ndarray}
+        """
+        names = self.properties if properties is None else tuple(properties)
+        p, temp_f = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(temp_f, dtype=float))
+        shape = p.shape
+        p, temp_f = p.ravel(), temp_f.ravel()
+        n_p, n_t = len(self.x), len(self.t)
+        with np.errstate(divide="ignore", invalid="ignore"):        # p <= 0 goes to the direct fallback
+            fp = (np.log(p / self._pb(temp_f)) - self.x[0]) * ((n_p - 1) / (self.x[-1] - self.x[0]))
+            ft = (temp_f - self.t[0]) * ((n_t - 1) / (self.t[-1] - self.t[0]))
+            i = np.clip(np.nan_to_num(fp), 0, n_p - 2).astype(np.intp)
+            j = np.clip(np.nan_to_num(ft), 0, n_t - 2).astype(np.intp)
+        wp, wt = fp - i, ft - j
+        need_z = "bg" in names or "rho_g" in names
+        base = i * n_t + j
+        corners = (base + 1, base + n_t, base + n_t + 1)
+        v = [None] * len(self.columns)
+        for k, c in enumerate(self.columns):
+            if c not in names and not (c == "z" and need_z):
+                continue
+            col = self.values[k].ravel()
+            lo = col.take(base)
+            lo += (col.take(corners[0]) - lo) * wt
+            hi = col.take(corners[1])
+            hi += (col.take(corners[2]) - hi) * wt
+            lo += (hi - lo) * wp
+            v[k] = lo
+        out = self._derive(p, temp_f, v, names)
+        outside = (p < self.p_range[0]) | (p > self.p_range[1]) | (ft < 0) | (ft > n_t - 1)
+        if outside.any():
+            direct = fluid_properties(p[outside], temp_f[outside], properties=names, **self.fluid)
+            for n in names:
+                out[n][outside] = direct[n]
+        return {n: out[n].reshape(shape) for n in names}
+
+    # -- disk cache ----------------------------------------------------------
+
+    @classmethod
+    def key(cls, api, sg_gas, rsb, **kwargs):
+        """Cache key: sha1 of the fluid, every grid/refinement argument (defaults filled in) and TABLE_VERSION."""
+        bound = inspect.signature(cls.__init__).bind(None, float(api), float(sg_gas), float(rsb), **kwargs)
+        bound.apply_defaults()
+        spec = {k: list(v) if isinstance(v, tuple) else v for k, v in bound.arguments.items() if k != "self"}
+        spec["version"] = TABLE_VERSION
+        return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+    @classmethod
+    def cached(cls, api, sg_gas, rsb, cache_dir=".pvt_cache", **kwargs):
+        """Load the table for this fluid/grid from cache_dir, building and saving it on a miss."""
+        path = os.path.join(cache_dir, f"pvt_{cls.key(api, sg_gas, rsb, **kwargs)}.npz")
+        if os.path.exists(path):
+            with np.load(path) as data:
+                table = cls.__new__(cls)
+                meta = json.loads(str(data["meta"]))
+                table.fluid, table.rtol = meta["fluid"], meta["rtol"]
+                table.p_range, table.t_range = tuple(meta["p_range"]), tuple(meta["t_range"])
+                table.properties = tuple(meta["properties"])
+                table.error_ = {k: tuple(v) for k, v in meta["error"].items()}
+                table.x, table.t, table.values = data["x"], data["t"], data["values"]
+            return table
+        table = cls(api, sg_gas, rsb, **kwargs)
+        meta = {"fluid": table.fluid, "rtol": table.rtol, "p_range": table.p_range, "t_range": table.t_range,
+                "properties": table.properties, "error": table.error_}
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, x=table.x, t=table.t, values=table.values, meta=json.dumps(meta))
+        os.replace(tmp, path)
+        return table
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def _notebook_pb(df):
+    """pvt_benchmarking.ipynb: Standing on Series, Vasquez-Beggs via np.vectorize, Glaso on Series."""
+    def calc_pb_vasquez_beggs(rs, temp_f, api, sg_gas):
+        if api <= 30:
+            C1, C2, C3 = 27.624, 0.914328, 11.172
+        else:
+            C1, C2, C3 = 56.18, 0.84246, 10.393
+        return (C1 * rs / (sg_gas * np.exp((C3 * api) / (temp_f + 460)))) ** (1 / C2)
+
+    def standing_correlation(row):                  # hybrid-physics-model's row-wise df.apply
+        a = (row["Rs"] / row["Gas_Grav"]) ** 0.83
+        b = (0.00091 * row["Temp_F"]) - (0.0125 * row["API"])
+        return 18.2 * ((a * (10 ** b)) - 1.4)
+
+    args = (df["Solution_GOR_scf_stb"], df["Temperature_F"], df["Oil_Gravity_API"], df["Gas_Gravity"])
+    t0 = time.perf_counter()
+    standing = df.rename(columns={"Solution_GOR_scf_stb": "Rs", "Temperature_F": "Temp_F", "Oil_Gravity_API": "API",
+                                  "Gas_Gravity": "Gas_Grav"}).apply(standing_correlation, axis=1).to_numpy()
+    t1 = time.perf_counter()
+    vb = np.vectorize(calc_pb_vasquez_beggs)(*args)
+    t2 = time.perf_counter()
+    return standing, vb, t1 - t0, t2 - t1
+
+
+def benchmark(n_points=10_000_000, cache_dir=".pvt_cache"):
+    """Parity with the notebook implementations, then direct vs table evaluation at n_points."""
+    import shutil
+
+    lab = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "reservoir-engineering",
+                                   "pvt-benchmarking", "pvt_lab_data.csv"))
+    big = pd.concat([lab] * max(1, 100_000 // len(lab)), ignore_index=True)
+    ref_standing, ref_vb, t_apply, t_vec = _notebook_pb(big)
+    args = (big["Solution_GOR_scf_stb"].to_numpy(), big["Temperature_F"].to_numpy(),
+            big["Oil_Gravity_API"].to_numpy(), big["Gas_Gravity"].to_numpy())
+    start = time.perf_counter()
+    standing, vb, glaso = pb_standing(*args), pb_vasquez_beggs(*args), pb_glaso(*args)
+    t_arr = time.perf_counter() - start
+    print(f"Bubble point on {len(big):,} rows: Standing max |diff| {np.abs(standing - ref_standing).max():.1e}, "
+          f"Vasquez-Beggs {np.abs(vb - ref_vb).max():.1e}; df.apply {t_apply:.2f} s, np.vectorize {t_vec:.2f} s, "
+          f"arrays (all three) {t_arr * 1e3:.0f} ms")
+
+    rng = np.random.default_rng(0)
+    fluid = {"api": 35.0, "sg_gas": 0.75, "rsb": 650.0}
+    p = rng.uniform(50, 5_500, n_points)
+    t = rng.uniform(80, 300, n_points)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    start = time.perf_counter()
+    table = PVTTable.cached(cache_dir=cache_dir, **fluid)
+    t_build = time.perf_counter() - start
+    start = time.perf_counter()
+    PVTTable.cached(cache_dir=cache_dir, **fluid)
+    t_load = time.perf_counter() - start
+    print(f"Table {len(table.x)} x {len(table.t)}: built in {t_build:.1f} s, reloaded from cache in {t_load * 1e3:.0f} ms")
+
+    chunk = 1_000_000
+    direct, looked = {}, {}
+    start = time.perf_counter()
+    for s in range(0, n_points, chunk):
+        for k, v in fluid_properties(p[s:s + chunk], t[s:s + chunk], **fluid).items():
+            direct.setdefault(k, []).append(v)
+    t_direct = time.perf_counter() - start
+    start = time.perf_counter()
+    for s in range(0, n_points, chunk):
+        for k, v in table(p[s:s + chunk], t[s:s + chunk]).items():
+            looked.setdefault(k, []).append(v)
+    t_table = time.perf_counter() - start
+    print(f"{n_points:,} points, all {len(PROPERTIES)} properties: direct {t_direct:.1f} s, "
+          f"table {t_table:.1f} s ({t_direct / t_table:.1f}x)")
+    for k in PROPERTIES:
+        d, l = np.concatenate(direct[k]), np.concatenate(looked[k])
+        rel = np.abs(l - d) / np.maximum(np.abs(d), 1e-30)
+        print(f"  {k:6s} max rel. error {rel.max():.1e} (cell-centre bound {table.error_[k][1]:.1e}), "
+              f"99.9th pct {np.percentile(rel, 99.9):.1e}")
+    for k in ("z", "mu_o"):
+        start = time.perf_counter()
+        fluid_properties(p[:chunk], t[:chunk], properties=(k,), **fluid)
+        t_d = time.perf_counter() - start
+        start = time.perf_counter()
+        table(p[:chunk], t[:chunk], properties=(k,))
+        t_l = time.perf_counter() - start
+        print(f"  {k} alone: direct {chunk / t_d / 1e6:.1f} M points/s, table {chunk / t_l / 1e6:.1f} M points/s")
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark()
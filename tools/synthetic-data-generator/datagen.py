@@ -0,0 +1,523 @@
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+class SyntheticGenerator:
+    """
+    Base class for the portfolio's synthetic data generators.
+
+    A generator is a list of independent entities (wells, pumps, cards,
+    samples). Each entity draws from its own random stream seeded with
+    (seed, stream id, entity index), so any chunk of entities can be
+    regenerated on its own, in any order, on any worker, and produce the
+    same rows as a full serial run.
+
+    Subclasses set `tables` and implement `generate_entity(i, rng)`, which
+    returns {table: {column: np.ndarray}} for one entity. Shared context
+    (e.g. the master stratigraphy) is rebuilt deterministically from the
+    seed in `__init__`, so it never has to be shipped to workers.
+    """
+
+    tables = ()
+    stream = 0
+    # Offset for streams that seed shared context rather than entities
+    CONTEXT_STREAM = 1000
+
+    def __init__(self, scale=1.0, seed=42):
+        self.scale = scale
+        self.seed = seed
+
+    @property
+    def n_entities(self):
+        raise NotImplementedError
+
+    def rng(self, i, stream=None):
+        """Random generator for entity i (independent of every other entity)."""
+        return np.random.default_rng([self.seed, self.stream if stream is None else stream, int(i)])
+
+    def context_rng(self, i=0):
+        """Random generator for shared context (layouts, templates) rebuilt on every worker."""
+        return self.rng(i, stream=self.CONTEXT_STREAM + self.stream)
+
+    def generate_entity(self, i, rng):
+        raise NotImplementedError
+
+    def generate_chunk(self, start, stop):
+        """DataFrames (one per table) for entities [start, stop)."""
+        columns = {table: {} for table in self.tables}
+        for i in range(start, stop):
+            for table, cols in self.generate_entity(i, self.rng(i)).items():
+                for name, values in cols.items():
+                    columns[table].setdefault(name, []).append(values)
+        return {table: pd.DataFrame({name: np.concatenate(parts) for name, parts in cols.items()})
+                for table, cols in columns.items() if cols}
+
+    def generate(self):
+        """Whole dataset in memory (only sensible at small scales)."""
+        return self.generate_chunk(0, self.n_entities)
+
+    def chunks(self, chunk_size):
+        """(start, stop) entity ranges of at most chunk_size entities."""
+        return [(s, min(s + chunk_size, self.n_entities)) for s in range(0, self.n_entities, chunk_size)]
+
+
+def _scaled(n, scale):
+    return max(1, int(round(n * scale)))
+
+
+# ----------------------------------------------------------------------
+# Generators
+# ----------------------------------------------------------------------
+class ESPRunToFailure(SyntheticGenerator):
+    """
+    Array version of production-engineering/esp-failure-prediction/01_Data_Generator.py.
+    One entity = one (pump, cycle) run to failure; scale multiplies n_pumps.
+    """
+
+    tables = ('esp_sensor_data',)
+    stream = 1
+
+    def __init__(self, scale=1.0, seed=42, n_pumps=5, cycles_per_pump=2):
+        super().__init__(scale, seed)
+        self.n_pumps = _scaled(n_pumps, scale)
+        self.cycles_per_pump = cycles_per_pump
+
+    @property
+    def n_entities(self):
+        return self.n_pumps * self.cycles_per_pump
+
+    def generate_entity(self, i, rng):
+        pump_id, cycle = divmod(i, self.cycles_per_pump)
+        lifetime = int(rng.integers(500, 1500))
+        base_amp = 50 + rng.normal(0, 2)
+        base_vib = 0.5 + rng.normal(0, 0.1)
+        base_temp = 180 + rng.normal(0, 5)
+
+        t = np.arange(lifetime)
+        # Healthy phase: 0 to 80% of life. Fault phase: exponential degradation.
+        fault = t > 0.8 * lifetime
+        health = np.where(t < 0.8 * lifetime, 1.0, np.exp((t - 0.8 * lifetime) / 50))
+
+        return {'esp_sensor_data': {
+            'pump_id': np.full(lifetime, pump_id + 1),
+            'cycle_id': np.full(lifetime, cycle + 1),
+            'timestamp_hour': t,
+            'amperage': base_amp + rng.normal(0, 1, lifetime) + np.where(fault, 0.05 * health, 0.0),
+            'vibration': base_vib + rng.normal(0, 0.05, lifetime) + np.where(fault, 0.02 * health, 0.0),
+            'motor_temp_f': base_temp + 0.1 * (t / lifetime * 10) + rng.normal(0, 1, lifetime),
+            'RUL': lifetime - t - 1,
+        }}
+
+
+class DynoCards(SyntheticGenerator):
+    """
+    Array version of production-engineering/rod-pump-failure/01_Data_Generator.py.
+    One entity = one card; scale multiplies n_samples_per_class.
+    """
+
+    tables = ('synthetic_dyno_cards',)
+    stream = 2
+    classes = ('Normal', 'Fluid Pound', 'Gas Interference')
+
+    def __init__(self, scale=1.0, seed=42, n_samples_per_class=300, n_points=100):
+        super().__init__(scale, seed)
+        self.n_per_class = _scaled(n_samples_per_class, scale)
+        self.n_points = n_points
+        t = np.linspace(0, 2 * np.pi, n_points)
+        self.t = t
+        self.pos = 0.5 * (1 - np.cos(t))
+
+    @property
+    def n_entities(self):
+        return len(self.classes) * self.n_per_class
+
+    @staticmethod
+    def _smooth(y, box_pts):
+        return np.convolve(y, np.ones(box_pts) / box_pts, mode='same')
+
+    def _normal(self, rng, noise):
+        n, pos = self.n_points, self.pos
+        half, tw = n // 2, n // 10
+        load = np.where(np.arange(n) < half, 0.8 + 0.1 * pos, 0.25 - 0.05 * pos)
+        load[half - tw:half + tw] = np.linspace(0.9, 0.2, 2 * tw)
+        load[-tw:] = np.linspace(0.2, 0.8, tw)
+        load[:tw] = np.linspace(0.2, 0.8, tw)
+        return self._smooth(load + rng.normal(0, noise, n), 3)
+
+    def _fluid_pound(self, rng, noise, severity):
+        n, pos = self.n_points, self.pos
+        half = n // 2
+        pound = half + int(half * severity)
+        idx = np.arange(n)
+        load = np.select([idx < half, idx < pound], [0.8 + 0.1 * pos, 0.75 - 0.05 * pos], 0.25 - 0.05 * pos)
+        load[pound:pound + 5] = np.linspace(0.7, 0.25, 5)[:len(load[pound:pound + 5])]
+        load[half - 5:half + 5] = np.linspace(0.9, 0.75, 10)
+        load[-5:] = np.linspace(0.25, 0.8, 5)
+        load[:5] = np.linspace(0.25, 0.8, 5)
+        return self._smooth(load + rng.normal(0, noise, n), 3)
+
+    def _gas_interference(self, rng, noise):
+        t = self.t
+        load = 0.5 * self.pos + 0.2 + 0.15 * np.sin(t) + 0.02 * np.sin(t * 5)
+        return self._smooth(load + rng.normal(0, noise, self.n_points), 5)
+
+    def generate_entity(self, i, rng):
+        k, j = divmod(i, self.n_per_class)
+        label = self.classes[k]
+        noise = rng.uniform(0.01, 0.03)
+        if label == 'Normal':
+            load = self._normal(rng, noise)
+        elif label == 'Fluid Pound':
+            load = self._fluid_pound(rng, noise, rng.uniform(0.3, 0.7))
+        else:
+            load = self._gas_interference(rng, noise)
+
+        n = self.n_points
+        return {'synthetic_dyno_cards': {
+            'Card_ID': np.full(n, f"{label}_{j}", dtype=object),
+            'Label': np.full(n, label, dtype=object),
+            'Position': self.pos,
+            'Load': load,
+            'Sequence_Index': np.arange(n),
+        }}
+
+
+FACIES_PROPERTIES = {
+    0: {'Name': 'Clean Sand',    'GR': (30, 5),   'RHOB': (2.20, 0.03), 'NPHI': (0.15, 0.02), 'RT': (50, 10)},
+    1: {'Name': 'Shaly Sand',    'GR': (60, 8),   'RHOB': (2.35, 0.04), 'NPHI': (0.22, 0.03), 'RT': (20, 5)},
+    2: {'Name': 'Siltstone',     'GR': (80, 10),  'RHOB': (2.45, 0.03), 'NPHI': (0.25, 0.03), 'RT': (10, 2)},
+    3: {'Name': 'Marine Shale',  'GR': (120, 15), 'RHOB': (2.55, 0.05), 'NPHI': (0.35, 0.04), 'RT': (3, 1)},
+    4: {'Name': 'Organic Shale', 'GR': (150, 20), 'RHOB': (2.30, 0.05), 'NPHI': (0.30, 0.04), 'RT': (15, 5)},
+    5: {'Name': 'Limestone',     'GR': (15, 5),   'RHOB': (2.71, 0.02), 'NPHI': (0.02, 0.01), 'RT': (200, 50)},
+    6: {'Name': 'Dolomite',      'GR': (20, 8),   'RHOB': (2.85, 0.03), 'NPHI': (0.05, 0.02), 'RT': (150, 40)},
+    7: {'Name': 'Anhydrite',     'GR': (5, 2),    'RHOB': (2.95, 0.01), 'NPHI': (0.01, 0.01), 'RT': (1000, 200)},
+    8: {'Name': 'Tight Sand',    'GR': (40, 8),   'RHOB': (2.55, 0.04), 'NPHI': (0.08, 0.02), 'RT': (80, 20)},
+    9: {'Name': 'Coal',          'GR': (25, 5),   'RHOB': (1.40, 0.10), 'NPHI': (0.45, 0.05), 'RT': (30, 10)},
+}
+LOG_LIMITS = {'GR': (0, 500), 'RHOB': (1.1, 3.5), 'NPHI': (0, 0.8), 'RT': (0.1, 5000)}
+
+
+class ElectrofaciesField(SyntheticGenerator):
+    """
+    Array version of reservoir-engineering/electrofacies-classification/01_Data_Generator.py.
+    One entity = one well; scale multiplies n_wells. The master stratigraphy
+    is shared by every well and rebuilt from the seed.
+    """
+
+    tables = ('field_well_data',)
+    stream = 3
+
+    def __init__(self, scale=1.0, seed=99, n_wells=15, rows_per_well=15000, n_layers=500):
+        super().__init__(scale, seed)
+        self.n_wells = _scaled(n_wells, scale)
+        self.rows_per_well = rows_per_well
+
+        rng = self.context_rng()
+        steps = rng.choice([0, 0, 0, 1, -1, 2, -2], size=n_layers)
+        facies = np.empty(n_layers, dtype=int)
+        current = 3  # Start with Marine Shale
+        for k, step in enumerate(steps):
+            current = min(max(current + step, 0), 9)
+            facies[k] = current
+        self.master_facies = facies
+        self.master_thickness = rng.integers(100, 800, size=n_layers)
+
+        ids = np.arange(10)
+        self.names = np.array([FACIES_PROPERTIES[f]['Name'] for f in ids], dtype=object)
+        self.means = {log: np.array([FACIES_PROPERTIES[f][log][0] for f in ids]) for log in LOG_LIMITS}
+        self.stds = {log: np.array([FACIES_PROPERTIES[f][log][1] for f in ids]) for log in LOG_LIMITS}
+
+    @property
+    def n_entities(self):
+        return self.n_wells
+
+    def generate_entity(self, i, rng):
+        x, y = rng.integers(0, 10000, size=2)
+        start_depth = 1000 + x * 0.05 + y * -0.02  # Structural dip plane
+
+        # Stretch/squeeze enough master layers to fill the well, then truncate
+        n_master = len(self.master_facies)
+        min_layers = int(np.ceil(self.rows_per_well / (0.7 * self.master_thickness.min()))) + 1
+        layer_idx = np.arange(min_layers) % n_master
+        thickness = (self.master_thickness[layer_idx] * rng.uniform(0.7, 1.3, min_layers)).astype(int)
+        ends = np.cumsum(thickness)
+        n_layers = int(np.searchsorted(ends, self.rows_per_well, side='left')) + 1
+        thickness = thickness[:n_layers]
+        thickness[-1] -= ends[n_layers - 1] - self.rows_per_well
+        keep = thickness > 0
+        thickness, layer_idx = thickness[keep], layer_idx[:n_layers][keep]
+
+        fid = np.repeat(self.master_facies[layer_idx], thickness)
+        n = fid.size
+        offsets = np.repeat(np.cumsum(thickness) - thickness, thickness)
+        k = np.arange(n) - offsets                           # Sample index within its layer
+        size = np.repeat(thickness, thickness)
+
+        # Depth: each layer is linspace(top, top + thick * 0.1524, thick); the next layer starts at its last depth
+        step = np.where(thickness > 1, thickness * 0.1524 / np.maximum(thickness - 1, 1), 0.0)
+        layer_top = start_depth + np.concatenate([[0.0], np.cumsum(step * (thickness - 1))[:-1]])
+        depth = np.repeat(layer_top, thickness) + k * np.repeat(step, thickness)
+        drift = np.where(size > 1, -0.5 + k / np.maximum(size - 1, 1), -0.5)
+
+        logs = {log: rng.normal(self.means[log][fid], self.stds[log][fid]) for log in LOG_LIMITS}
+        logs['RHOB'] = logs['RHOB'] + drift * 0.05
+        logs = {log: np.clip(values, *LOG_LIMITS[log]) for log, values in logs.items()}
+
+        return {'field_well_data': {
+            'Well_ID': np.full(n, f'WELL-{i + 1:02d}', dtype=object),
+            'X_Loc': np.full(n, x),
+            'Y_Loc': np.full(n, y),
+            'Depth_m': depth,
+            'GR': logs['GR'], 'RHOB': logs['RHOB'], 'NPHI': logs['NPHI'], 'RT': logs['RT'],
+            'Facies_Label': fid,
+            'Facies_Name': self.names[fid],
+        }}
+
+
+class ReservoirTimeseries(SyntheticGenerator):
+    """
+    Array version of reservoir-engineering/lstm-reservoir-surrogate/01_Data_Generator.py.
+    The generator is vectorized per chunk (each sample still owns its random
+    stream); scale multiplies n_samples.
+    """
+
+    tables = ('reservoir_timeseries_data',)
+    stream = 4
+
+    def __init__(self, scale=1.0, seed=42, n_samples=3000, n_months=24, b=0.4):
+        super().__init__(scale, seed)
+        self.n_samples = _scaled(n_samples, scale)
+        self.n_months = n_months
+        self.b = b
+
+    @property
+    def n_entities(self):
+        return self.n_samples
+
+    def generate_chunk(self, start, stop):
+        rngs = [self.rng(i) for i in range(start, stop)]
+        u = np.array([r.random(4) for r in rngs])
+        z = np.array([r.standard_normal(self.n_months) for r in rngs])
+        phi = 0.15 + 0.20 * u[:, 0]
+        perm = 50 + 750 * u[:, 1]
+        p_init = 2500 + 2000 * u[:, 2]
+        h = 20 + 80 * u[:, 3]
+
+        qi = (perm * 0.5) * (p_init * 0.1) * (h * 0.2) / 1000
+        Di = (perm / 1000) / (phi * 5)
+        t = np.arange(1, self.n_months + 1)
+        q = qi[:, None] / (1 + self.b * Di[:, None] * t) ** (1 / self.b)
+        q = q + z * (qi[:, None] * 0.02)  # Simulator noise, 2% of qi
+
+        df = pd.DataFrame({'Porosity': phi, 'Permeability_mD': perm,
+                           'Initial_Pressure_psi': p_init, 'Thickness_ft': h})
+        profiles = pd.DataFrame(q, columns=[f'Month_{m}' for m in t])
+        return {'reservoir_timeseries_data': pd.concat([df, profiles], axis=1)}
+
+
+class CRMField(SyntheticGenerator):
+    """
+    Array version of reservoir-engineering/crm-analysis/01_Data_Generator.py
+    (and 03_Advance_Data_Generator.py with `layout='distance'`).
+
+    Output is the notebooks' wide layout (Date, I01.., P01..), so entities
+    are days and a chunk is a date range with every well as a column. Each
+    day draws its injection and noise vectors from its own stream; producer
+    taus, connections and gains are shared context built in __init__.
+
+    The CRMP recursion is a day loop vectorized over producers. A chunk
+    starting at day d replays days [0, d) to get the producer rates at its
+    start, drawing the daily vectors without keeping them, so memory stays
+    at one chunk of rows. The last state is remembered, so a serial run
+    never replays. With layout='distance' the chunk holding day 0 also
+    writes the well_locations table.
+    """
+
+    stream = 5
+
+    def __init__(self, scale=1.0, seed=42, n_days=1000, n_injectors=10, n_producers=40,
+                 layout='random', field_size=5000.0, start='2020-01-01'):
+        super().__init__(scale, seed)
+        if layout not in ('random', 'distance'):
+            raise ValueError("layout must be 'random' or 'distance'")
+        self.n_days = n_days
+        self.n_injectors = _scaled(n_injectors, scale)
+        self.n_producers = _scaled(n_producers, scale)
+        self.layout = layout
+        self.field_size = field_size
+        self.dates = pd.date_range(start=start, periods=n_days, freq='D')
+        self.tables = ('production_injection_data', 'well_locations') if layout == 'distance' \
+            else ('production_injection_data',)
+        self.names = [f'I{i + 1:02d}' for i in range(self.n_injectors)] \
+            + [f'P{p + 1:02d}' for p in range(self.n_producers)]
+        if layout == 'distance':
+            self.inj_xy = np.array([self._location(i) for i in range(self.n_injectors)])
+        self._build_producers()
+        self._state = (1, self.q0)
+
+    @property
+    def n_entities(self):
+        return self.n_days
+
+    def _location(self, i):
+        return self.context_rng(i).uniform(0, self.field_size, 2)
+
+    def _build_producers(self):
+        """tau, initial rate and up to 3 (injector, gain) connections per producer, padded with gain 0."""
+        k = min(3, self.n_injectors)
+        self.decay = np.empty(self.n_producers)
+        self.q0 = np.empty(self.n_producers)
+        self.conn = np.zeros((self.n_producers, k), dtype=int)
+        self.gains = np.zeros((self.n_producers, k))
+        for p in range(self.n_producers):
+            rng = self.context_rng(self.n_injectors + p)
+            xy = rng.uniform(0, self.field_size, 2)  # same draw as _location
+            self.decay[p] = np.exp(-1 / rng.uniform(10, 50))
+            if self.layout == 'distance':
+                dist = np.hypot(*(self.inj_xy - xy).T)
+                connected = np.argsort(dist)[:k]
+                weights = rng.uniform(0.2, 0.5, size=k)
+            else:
+                n_conn = min(int(rng.integers(2, 4)), self.n_injectors)
+                connected = rng.choice(self.n_injectors, size=n_conn, replace=False)
+                weights = rng.uniform(0.1, 0.4, size=n_conn)
+            self.conn[p, :len(connected)] = connected
+            self.gains[p, :len(connected)] = weights
+            self.q0[p] = rng.uniform(500, 1000)
+
+    def _day(self, d):
+        """Injection rates and producer drive (1 - decay) * sum_i f_ij I_i + noise on day d."""
+        rng = self.rng(d)
+        inj = np.abs(rng.normal(1000, 300, self.n_injectors))
+        noise = rng.normal(0, 5, self.n_producers)
+        return inj, (1 - self.decay) * (inj[self.conn] * self.gains).sum(axis=1) + noise
+
+    def generate_chunk(self, start, stop):
+        day, q = self._state if self._state[0] <= max(start, 1) else (1, self.q0)
+        for d in range(day, start):
+            q = self.decay * q + self._day(d)[1]
+
+        rates = np.empty((stop - start, len(self.names)))
+        for row, d in enumerate(range(start, stop)):
+            inj, drive = self._day(d)
+            # q[t] = decay * q[t-1] + (1 - decay) * sum_i f_ij I_i[t] + noise[t]
+            if d > 0:
+                q = self.decay * q + drive
+            rates[row, :self.n_injectors] = inj
+            rates[row, self.n_injectors:] = q
+        self._state = (max(stop, 1), q)
+
+        df = pd.DataFrame(rates, columns=self.names)
+        df.insert(0, 'Date', self.dates[start:stop])
+        tables = {'production_injection_data': df}
+        if self.layout == 'distance' and start == 0:
+            xy = np.array([self._location(i) for i in range(len(self.names))])
+            tables['well_locations'] = pd.DataFrame({
+                'Well': self.names, 'Type': ['Inj'] * self.n_injectors + ['Prod'] * self.n_producers,
+                'X': xy[:, 0], 'Y': xy[:, 1]})
+        return tables
+
+
+GENERATORS = {
+    'esp': ESPRunToFailure,
+    'dyno': DynoCards,
+    'electrofacies': ElectrofaciesField,
+    'lstm': ReservoirTimeseries,
+    'crm': CRMField,
+    'crm_advance': lambda **kw: CRMField(layout='distance', **kw),
+}
+
+
+# ----------------------------------------------------------------------
+# Chunked writer
+# ----------------------------------------------------------------------
+def _write_chunk(args):
+    generator, start, stop, out_dir, fmt, part = args
+    rows = {}
+    for table, df in generator.generate_chunk(start, stop).items():
+        path = os.path.join(out_dir, table, f'part-{part:05d}.{fmt}')
+        if fmt == 'parquet':
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+        rows[table] = len(df)
+    return rows
+
+
+def write_dataset(generator, out_dir, fmt='csv', chunk_size=100, n_jobs=1, merge_csv=False):
+    """
+    Generate a dataset chunk by chunk and write one part file per chunk.
+
+    Memory is bounded by chunk_size entities per worker: nothing is collected
+    in the parent process. Parts are written as out_dir/<table>/part-NNNNN.<fmt>
+    (readable with pd.read_parquet(dir) or by concatenating the CSVs).
+
+    Args:
+        generator (SyntheticGenerator): Configured generator (scale, seed, ...).
+        out_dir (str): Output directory (existing parts are replaced).
+        fmt (str): 'csv' or 'parquet'.
+        chunk_size (int): Entities per part file.
+        n_jobs (int): Worker processes (1 = run in the current process).
+        merge_csv (bool): Stream the CSV parts into a single <table>.csv.
+
+    Returns:
+        dict: Rows written per table.
+    """
+    if fmt not in ('csv', 'parquet'):
+        raise ValueError("fmt must be 'csv' or 'parquet'")
+    for table in generator.tables:
+        shutil.rmtree(os.path.join(out_dir, table), ignore_errors=True)
+        os.makedirs(os.path.join(out_dir, table))
+
+    tasks = [(generator, start, stop, out_dir, fmt, part)
+             for part, (start, stop) in enumerate(generator.chunks(chunk_size))]
+    if n_jobs == 1:
+        totals = _sum_rows(map(_write_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            totals = _sum_rows(pool.map(_write_chunk, tasks))
+
+    if merge_csv and fmt == 'csv':
+        for table in generator.tables:
+            merge_parts(os.path.join(out_dir, table), os.path.join(out_dir, f'{table}.csv'))
+    return totals
+
+
+def _sum_rows(results):
+    totals = {}
+    for rows in results:
+        for table, n in rows.items():
+            totals[table] = totals.get(table, 0) + n
+    return totals
+
+
+def merge_parts(part_dir, out_path):
+    """Concatenate CSV part files into one file, keeping only the first header."""
+    parts = sorted(f for f in os.listdir(part_dir) if f.endswith('.csv'))
+    with open(out_path, 'wb') as out:
+        for k, name in enumerate(parts):
+            with open(os.path.join(part_dir, name), 'rb') as f:
+                header = f.readline()
+                if k == 0:
+                    out.write(header)
+                shutil.copyfileobj(f, out)
+
+
+def benchmark(scale=10, out_dir='generated_data', fmt='csv', n_jobs=1):
+    """Rows per second of every generator at the given scale."""
+    for name, factory in GENERATORS.items():
+        generator = factory(scale=scale)
+        start = time.perf_counter()
+        rows = write_dataset(generator, os.path.join(out_dir, name), fmt=fmt, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - start
+        total = sum(rows.values())
+        print(f"{name:14s} x{scale:<5} {total:>10d} rows in {elapsed:6.2f} s ({total / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    benchmark()